@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class BMSFrame:
+    """One complete sample of the pack"""
+    __slots__ = ("sequence", "timestamp", "voltages", "temperatures", "current")
+
+    def __init__(self, sequence, timestamp, voltages, temperatures, current):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.voltages = voltages
+        self.temperatures = temperatures
+        self.current = current
+
+
+class SimulatedSource:
+    """Random pack data, used until a real BMS connection is available"""
+    def __init__(self, num_cells, num_temps):
+        self.num_cells = num_cells
+        self.num_temps = num_temps
+
+    def __call__(self):
+        voltages = np.random.uniform(3.1, 4.1, self.num_cells)
+        temperatures = np.random.uniform(15, 45, self.num_temps)
+        current = np.random.uniform(-50, 50)
+        return voltages, temperatures, current
+
+
+class AcquisitionWorker(threading.Thread):
+    """Samples a data source at a fixed period and queues complete frames.
+
+    The queue is bounded. When the consumer falls behind, the oldest queued
+    frame is discarded so sampling never blocks on the GUI.
+    """
+    def __init__(self, source, period_ms=500, max_queued=8):
+        super().__init__(name="BMSAcquisition", daemon=True)
+        self.source = source
+        self.period_ms = period_ms
+        self.frames = queue.Queue(maxsize=max_queued)
+        self.dropped = 0  # Frames discarded because the queue was full
+        self.sequence = 0
+        self._stop_event = threading.Event()
+
+    def set_period(self, period_ms):
+        """Change the sampling period, takes effect on the next sample"""
+        if period_ms <= 0:
+            raise ValueError("Update rate must be positive")
+        self.period_ms = period_ms
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        next_sample = time.monotonic()
+        while not self._stop_event.is_set():
+            voltages, temperatures, current = self.source()
+            frame = BMSFrame(self.sequence, time.time(), voltages, temperatures, current)
+            self.sequence += 1
+            self.push(frame)
+
+            # Schedule against the ideal timeline so the rate does not drift,
+            # but skip ahead instead of bursting if we fell behind
+            next_sample += self.period_ms / 1000.0
+            delay = next_sample - time.monotonic()
+            if delay < 0:
+                next_sample = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def push(self, frame):
+        """Queue a frame, discarding the oldest one if the queue is full"""
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def drain(self):
+        """Return all queued frames, oldest first"""
+        frames = []
+        while True:
+            try:
+                frames.append(self.frames.get_nowait())
+            except queue.Empty:
+                return frames
@@ -0,0 +1,178 @@
+import math
+
+from can_bus import frame_key
+
+
+def frame_bits(dlc, extended=False):
+    """Worst-case length of a data frame in bits, including stuff bits and interframe space.
+
+    g is the number of bits subject to stuffing besides the data field,
+    34 for standard and 54 for extended identifiers. The worst case has a
+    stuff bit after every four bits following the first five.
+    """
+    g = 54 if extended else 34
+    return g + 8 * dlc + 13 + (g + 8 * dlc - 1) // 4
+
+
+def priority_key(can_id, extended=False):
+    """Arbitration order of an ID, lower keys win.
+
+    The 11-bit base ID is compared first; a standard frame beats an
+    extended frame with the same base ID.
+    """
+    if extended:
+        return (can_id >> 18, 1, can_id & 0x3FFFF)
+    return (can_id, 0, 0)
+
+
+class MessageTiming:
+    """Analysis result of one message"""
+    __slots__ = ("name", "can_id", "extended", "dlc", "period_ms", "bits", "transmit_ms", "blocking_ms",
+                 "response_ms")
+
+    def __init__(self, message, bit_time_ms):
+        self.name = message.name
+        self.can_id = message.can_id
+        self.extended = message.extended
+        self.dlc = message.dlc
+        self.period_ms = message.period_ms if message.periodic else 0
+        self.bits = frame_bits(self.dlc, self.extended)
+        self.transmit_ms = self.bits * bit_time_ms
+        self.blocking_ms = None
+        self.response_ms = None  # Worst-case response time, inf when unbounded
+
+    @property
+    def signature(self):
+        return (self.dlc, self.extended, self.period_ms)
+
+    @property
+    def utilization(self):
+        return self.transmit_ms / self.period_ms if self.period_ms else 0.0
+
+    @property
+    def schedulable(self):
+        return not self.period_ms or self.response_ms <= self.period_ms
+
+
+class BusLoadAnalyzer:
+    """Bus utilization and worst-case response times of a CAN message set.
+
+    Response times follow the revised analysis of Davis et al. (2007) with
+    deadlines equal to periods and no queuing jitter. On-demand messages
+    add no load but can still block higher priority messages.
+
+    update() compares the new message set with the previous one and only
+    recomputes the response times of messages whose interference or
+    blocking changed, i.e. those at or below the highest priority change.
+    """
+    def __init__(self, bitrate=500000):
+        self.bitrate = bitrate
+        self.timings = []  # In priority order
+        self.by_key = {}
+
+    @property
+    def bit_time_ms(self):
+        return 1000.0 / self.bitrate
+
+    def set_bitrate(self, bitrate):
+        if bitrate <= 0:
+            raise ValueError("Bitrate must be positive")
+        if bitrate != self.bitrate:
+            self.bitrate = bitrate
+            self.timings = []
+            self.by_key = {}
+
+    def update(self, messages):
+        """Analyze a message set, reusing results that did not change; returns the number recomputed"""
+        old_order = [frame_key(timing.can_id, timing.extended) for timing in self.timings]
+        timings = []
+        for message in messages:
+            timing = MessageTiming(message, self.bit_time_ms)
+            old = self.by_key.get(frame_key(message.can_id, message.extended))
+            if old is not None and old.signature == timing.signature:
+                timing.blocking_ms = old.blocking_ms
+                timing.response_ms = old.response_ms
+            timings.append(timing)
+        timings.sort(key=lambda timing: priority_key(timing.can_id, timing.extended))
+
+        # The first position whose higher priority set differs from last time
+        first_changed = len(timings)
+        for i, timing in enumerate(timings):
+            key = frame_key(timing.can_id, timing.extended)
+            if timing.response_ms is None or i >= len(old_order) or old_order[i] != key:
+                first_changed = i
+                break
+
+        # Blocking is the longest lower priority frame that may already be on the bus
+        blocking = [0.0] * len(timings)
+        longest = 0.0
+        for i in range(len(timings) - 1, -1, -1):
+            blocking[i] = longest
+            longest = max(longest, timings[i].transmit_ms)
+
+        recomputed = 0
+        for i, timing in enumerate(timings):
+            if i >= first_changed or timing.blocking_ms != blocking[i]:
+                timing.blocking_ms = blocking[i]
+                timing.response_ms = self.response_time(timings, i)
+                recomputed += 1
+
+        self.timings = timings
+        self.by_key = {frame_key(timing.can_id, timing.extended): timing for timing in timings}
+        return recomputed
+
+    def response_time(self, timings, index):
+        """Worst-case response time of timings[index] in ms"""
+        timing = timings[index]
+        if not timing.period_ms:
+            return timing.blocking_ms + timing.transmit_ms
+        higher = [(other.transmit_ms, other.period_ms) for other in timings[:index] if other.period_ms]
+        bit_time = self.bit_time_ms
+
+        # Length of the priority level busy period, which is unbounded at full load
+        if sum(c / t for c, t in higher) + timing.utilization >= 1.0:
+            return math.inf
+        level = higher + [(timing.transmit_ms, timing.period_ms)]
+        busy = timing.blocking_ms + timing.transmit_ms
+        while True:
+            following = timing.blocking_ms + sum(math.ceil(busy / t) * c for c, t in level)
+            if following <= busy:
+                break
+            busy = following
+
+        # Check every instance of the message that falls into the busy period
+        worst = 0.0
+        for q in range(math.ceil(busy / timing.period_ms)):
+            wait = timing.blocking_ms + q * timing.transmit_ms
+            while True:
+                following = timing.blocking_ms + q * timing.transmit_ms + sum(
+                    math.ceil((wait + bit_time) / t) * c for c, t in higher)
+                if following <= wait:
+                    break
+                wait = following
+                if wait - q * timing.period_ms + timing.transmit_ms > timing.period_ms:
+                    # Already late, no need to converge
+                    return wait - q * timing.period_ms + timing.transmit_ms
+            worst = max(worst, wait - q * timing.period_ms + timing.transmit_ms)
+        return worst
+
+    @property
+    def utilization(self):
+        return sum(timing.utilization for timing in self.timings)
+
+    def unschedulable(self):
+        return [timing for timing in self.timings if not timing.schedulable]
+
+    def report(self):
+        """Summary line followed by one line per message, missed periods first"""
+        missed = self.unschedulable()
+        summary = (f"Bus load {self.utilization * 100:.1f}% at {self.bitrate / 1000:g} kbit/s, "
+                   f"{len(self.timings)} messages, {len(missed)} cannot meet their period")
+        lines = []
+        for timing in sorted(self.timings, key=lambda timing: timing.schedulable):
+            can_id = f"0x{timing.can_id:08X}" if timing.extended else f"0x{timing.can_id:03X}"
+            period = f"{timing.period_ms}ms" if timing.period_ms else "on-demand"
+            flag = "" if timing.schedulable else "  MISSED"
+            lines.append(f"{can_id} {timing.name}: {timing.bits} bits, {timing.transmit_ms:.3f}ms, "
+                         f"worst response {timing.response_ms:.3f}ms / {period}{flag}")
+        return summary, lines
@@ -0,0 +1,369 @@
+import heapq
+import queue
+import socket
+import struct
+import threading
+import time
+
+# Linux SocketCAN constants
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_SFF_MASK = 0x000007FF
+CAN_EFF_MASK = 0x1FFFFFFF
+CAN_FRAME = struct.Struct("=IB3x8s")  # struct can_frame
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40)  # Kernel drop counter ancillary data
+
+
+class CANFrame:
+    """A CAN frame as sent or received on a bus"""
+    __slots__ = ("timestamp", "can_id", "data", "extended", "rtr")
+
+    def __init__(self, can_id, data=b"", extended=False, rtr=False, timestamp=0.0):
+        self.timestamp = timestamp
+        self.can_id = can_id
+        self.data = bytes(data)
+        self.extended = extended
+        self.rtr = rtr
+
+    @property
+    def dlc(self):
+        return len(self.data)
+
+
+class LoopbackBus:
+    """In-process bus, for tests and for running without hardware.
+
+    Frames sent on one bus are delivered to every connected peer, and also
+    to the bus itself when receive_own is set.
+    """
+    def __init__(self, receive_own=False, max_queued=0):
+        self.receive_own = receive_own
+        self.frames = queue.Queue(maxsize=max_queued)
+        self.peers = []
+
+    @classmethod
+    def pair(cls):
+        """Two buses connected to each other, like two nodes on one wire"""
+        a, b = cls(), cls()
+        a.peers.append(b)
+        b.peers.append(a)
+        return a, b
+
+    def send(self, frame):
+        frame.timestamp = time.time()
+        for peer in self.peers:
+            peer.frames.put(frame)
+        if self.receive_own:
+            self.frames.put(frame)
+
+    def recv(self, timeout=None):
+        """Next received frame, or None on timeout"""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        pass
+
+
+class SocketCANBus:
+    """Raw SocketCAN interface such as can0 or a virtual vcan0.
+
+    The receive buffer is enlarged so bursts at full bus load are absorbed
+    by the kernel, and frames the kernel still had to drop are counted in
+    dropped.
+    """
+    def __init__(self, channel="vcan0", receive_buffer=1 << 20):
+        self.channel = channel
+        self.dropped = 0
+        self.timeout = None
+        self.sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+        if receive_buffer:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self.sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+        self.sock.bind((channel,))
+
+    def set_filters(self, filters):
+        """Kernel acceptance filters as (can_id, mask) pairs, empty to receive nothing"""
+        data = b"".join(struct.pack("=II", can_id, mask) for can_id, mask in filters)
+        self.sock.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER, data)
+
+    def send(self, frame):
+        can_id = frame.can_id
+        if frame.extended:
+            can_id |= CAN_EFF_FLAG
+        if frame.rtr:
+            can_id |= CAN_RTR_FLAG
+        self.sock.send(CAN_FRAME.pack(can_id, len(frame.data), frame.data.ljust(8, b"\x00")))
+        frame.timestamp = time.time()
+
+    def recv(self, timeout=None):
+        """Next received frame, or None on timeout"""
+        if timeout != self.timeout:
+            self.sock.settimeout(timeout)
+            self.timeout = timeout
+        try:
+            raw, ancillary, _, _ = self.sock.recvmsg(CAN_FRAME.size, socket.CMSG_SPACE(4))
+        except socket.timeout:
+            return None
+        for level, kind, value in ancillary:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                self.dropped = struct.unpack("=I", value[:4])[0]
+        can_id, dlc, data = CAN_FRAME.unpack(raw)
+        extended = bool(can_id & CAN_EFF_FLAG)
+        return CANFrame(can_id & (CAN_EFF_MASK if extended else CAN_SFF_MASK), data[:dlc],
+                        extended, bool(can_id & CAN_RTR_FLAG), time.time())
+
+    def close(self):
+        self.sock.close()
+
+
+class PeriodTiming:
+    """Achieved period statistics of one periodic message"""
+    __slots__ = ("period_ms", "count", "last_sent", "total", "min_ms", "max_ms", "max_jitter_ms")
+
+    def __init__(self, period_ms):
+        self.period_ms = period_ms
+        self.count = 0
+        self.last_sent = None
+        self.total = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+        self.max_jitter_ms = 0.0
+
+    def record(self, sent):
+        if self.last_sent is not None:
+            period_ms = (sent - self.last_sent) * 1000.0
+            self.total += period_ms
+            self.count += 1
+            self.min_ms = min(self.min_ms, period_ms)
+            self.max_ms = max(self.max_ms, period_ms)
+            self.max_jitter_ms = max(self.max_jitter_ms, abs(period_ms - self.period_ms))
+        self.last_sent = sent
+
+    @property
+    def mean_ms(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class TransmitScheduler(threading.Thread):
+    """Sends every periodic message on time from a heap of due times.
+
+    Each message is encoded with the current values right before it is
+    sent. Due times advance by exactly one period, so timing errors do not
+    accumulate; a message that fell more than a period behind is
+    rescheduled from now and counted as an overrun.
+    """
+    def __init__(self, bus, values):
+        super().__init__(name="CANTransmit", daemon=True)
+        self.bus = bus
+        self.values = values  # Mapping of parameter name to physical value
+        self.recorder = None  # Optional CaptureWriter for sent frames
+        self.heap = []
+        self.timing = {}
+        self.overruns = 0
+        self.errors = 0
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self._stop_event = threading.Event()
+
+    def set_messages(self, messages, parameters):
+        """(Re)schedule the periodic messages, compiling their codecs.
+
+        Messages sharing a period are released evenly spread over it rather
+        than all at once, so a reschedule does not burst the whole table.
+        """
+        now = time.monotonic()
+        periodic = [message for message in messages if message.periodic and message.period_ms > 0]
+        same_period = {}
+        for message in periodic:
+            same_period[message.period_ms] = same_period.get(message.period_ms, 0) + 1
+
+        heap = []
+        timing = {}
+        released = {}
+        for sequence, message in enumerate(periodic):
+            codec = message.codec(parameters)
+            period = message.period_ms / 1000.0
+            position = released.get(message.period_ms, 0)
+            released[message.period_ms] = position + 1
+            heap.append((now + period * position / same_period[message.period_ms], sequence, period, message, codec))
+            timing[frame_key(message.can_id, message.extended)] = PeriodTiming(message.period_ms)
+        heapq.heapify(heap)
+
+        with self.lock:
+            self.heap = heap
+            self.timing = timing
+        self.wakeup.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self.wakeup.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with self.lock:
+                delay = self.heap[0][0] - time.monotonic() if self.heap else None
+            if delay is None or delay > 0:
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+                continue
+            self.send_due()
+
+    def send_due(self):
+        """Send every message whose due time has passed"""
+        with self.lock:
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                due, sequence, period, message, codec = self.heap[0]
+                try:
+                    payload = codec.encode(self.values)
+                    frame = CANFrame(message.can_id, payload, message.extended, message.rtr)
+                    self.bus.send(frame)
+                    self.timing[frame_key(message.can_id, message.extended)].record(time.monotonic())
+                    if self.recorder is not None:
+                        self.recorder.write(frame, transmitted=True)
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = e
+
+                due += period
+                if due < now - period:
+                    due = now + period
+                    self.overruns += 1
+                heapq.heapreplace(self.heap, (due, sequence, period, message, codec))
+                now = time.monotonic()
+
+    def timing_report(self):
+        """One line per message, worst jitter first"""
+        with self.lock:
+            timing = sorted(self.timing.items(), key=lambda item: -item[1].max_jitter_ms)
+        lines = []
+        for key, stats in timing:
+            can_id = f"0x{key & ~CAN_EFF_FLAG:08X}" if key & CAN_EFF_FLAG else f"0x{key:03X}"
+            lines.append(f"{can_id}: {stats.period_ms}ms configured, {stats.mean_ms:.2f}ms mean "
+                         f"({stats.min_ms if stats.count else 0:.2f}-{stats.max_ms:.2f}ms), "
+                         f"max jitter {stats.max_jitter_ms:.2f}ms over {stats.count} periods")
+        return lines
+
+
+def frame_key(can_id, extended=False):
+    """Dictionary key of a CAN ID, keeping standard and extended IDs apart"""
+    return can_id | CAN_EFF_FLAG if extended else can_id
+
+
+def allow_only(can_ids, extended=False):
+    """Filters passing only the given IDs, like MATLAB's filterAllowOnly"""
+    mask = (CAN_EFF_MASK if extended else CAN_SFF_MASK) | CAN_EFF_FLAG | CAN_RTR_FLAG
+    return [(frame_key(can_id, extended), mask) for can_id in can_ids]
+
+
+class AcceptanceFilter:
+    """Hardware-style (id, mask) acceptance filters.
+
+    A frame passes when (frame_id & mask) == (id & mask) for any filter.
+    IDs are given as frame_key values, so the extended flag can be masked
+    too. Filters with a full mask are checked with a set lookup.
+    """
+    def __init__(self, filters=None):
+        self.filters = list(filters or [])
+        self.exact = set()
+        self.masked = []
+        for can_id, mask in self.filters:
+            mask &= ~CAN_RTR_FLAG  # Keys do not carry the RTR bit
+            id_bits = (CAN_EFF_MASK if can_id & CAN_EFF_FLAG else CAN_SFF_MASK) | CAN_EFF_FLAG
+            if mask & id_bits == id_bits:
+                self.exact.add(can_id & id_bits)
+            else:
+                self.masked.append((can_id & mask, mask))
+
+    def accepts(self, key):
+        if not self.filters or key in self.exact:
+            return True
+        for can_id, mask in self.masked:
+            if key & mask == can_id:
+                return True
+        return False
+
+
+class ReceiveDispatcher(threading.Thread):
+    """Receives frames, filters them and decodes them by CAN ID.
+
+    Every accepted frame is looked up in a dict of precompiled decoders and
+    its decoded values are stored in a last-value cache. SocketCAN buses
+    get the filters installed in the kernel so rejected frames never reach
+    Python. Replayed captures go through replay(), which shares the lock of
+    the receive thread but is not written to the recorder.
+    """
+    def __init__(self, bus, filters=None):
+        super().__init__(name="CANReceive", daemon=True)
+        self.bus = bus
+        self.filter = AcceptanceFilter(filters)
+        self.recorder = None  # Optional CaptureWriter for received frames
+        self.decoders = {}
+        self.values = {}  # Last decoded value of every signal
+        self.last_seen = {}  # Timestamp of the last frame per CAN ID
+        self.frame_counts = {}
+        self.received = 0
+        self.rejected = 0
+        self.errors = 0
+        self._lock = threading.Lock()  # Serialises the receive thread and replays
+        self._stop_event = threading.Event()
+
+        if filters and hasattr(bus, "set_filters"):
+            bus.set_filters(filters)
+
+    def register(self, can_id, decoder, extended=False, callback=None):
+        """Decode frames with this ID, optionally calling callback(frame, values)"""
+        self.decoders[frame_key(can_id, extended)] = (decoder, callback)
+
+    def register_messages(self, messages, parameters):
+        """Replace the registered decoders with the codecs of the configured messages"""
+        decoders = {frame_key(message.can_id, message.extended): (message.codec(parameters), None)
+                    for message in messages}
+        self.decoders = decoders  # Swapped whole, so deleted and renumbered messages stop decoding
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            frame = self.bus.recv(timeout=0.1)
+            if frame is not None:
+                self.dispatch(frame)
+
+    def dispatch(self, frame, record=True):
+        with self._lock:
+            return self._dispatch(frame, record)
+
+    def replay(self, frame):
+        """Decode a frame from a capture without recording it again"""
+        return self.dispatch(frame, record=False)
+
+    def _dispatch(self, frame, record):
+        self.received += 1
+        if record and self.recorder is not None:
+            self.recorder.write(frame)
+        key = frame_key(frame.can_id, frame.extended)
+        if not self.filter.accepts(key):
+            self.rejected += 1
+            return None
+
+        self.frame_counts[key] = self.frame_counts.get(key, 0) + 1
+        self.last_seen[key] = frame.timestamp
+        entry = self.decoders.get(key)
+        if entry is None:
+            return None
+
+        decoder, callback = entry
+        try:
+            values = decoder.decode(frame.data)
+        except Exception:
+            self.errors += 1
+            return None
+        self.values.update(values)
+        if callback is not None:
+            callback(frame, values)
+        return values
@@ -0,0 +1,228 @@
+import glob
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+
+from can_bus import CANFrame
+
+# File header: magic, format version and record size
+CAPTURE_MAGIC = b"BMSCAN\x00\x01"
+HEADER = struct.Struct("<8sII")
+FORMAT_VERSION = 1
+
+# One fixed-size record per frame, the same layout as a struct and a NumPy dtype
+RECORD = struct.Struct("<dIBB2x8s")
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("can_id", "<u4"), ("flags", "u1"), ("dlc", "u1"),
+                         ("reserved", "V2"), ("data", "u1", (8,))])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+FLAG_EXTENDED = 0x01
+FLAG_RTR = 0x02
+FLAG_TX = 0x04  # Frame was sent by this application
+
+INDEX_STRIDE = 1024  # Records between two entries of the sparse timestamp index
+
+
+def capture_files(base_path):
+    """All files of a rotated capture, oldest first"""
+    root, ext = os.path.splitext(base_path)
+    return sorted(glob.glob(f"{glob.escape(root)}_[0-9][0-9][0-9]{ext}"))
+
+
+def capture_parts(path):
+    """The given capture file followed by the later files of its rotation"""
+    root, ext = os.path.splitext(path)
+    match = re.fullmatch(r"(.*)_\d{3}", root)
+    if match is None:
+        return [path]
+    return [part for part in capture_files(match.group(1) + ext) if part >= path]
+
+
+class CaptureWriter:
+    """Records CAN frames into binary capture files.
+
+    Records are packed into a preallocated buffer and written in large
+    chunks. When a file reaches max_bytes the capture continues in the next
+    file, name_000.bcap, name_001.bcap and so on. write() may be called
+    from the transmit and receive threads at the same time.
+    """
+    def __init__(self, base_path, max_bytes=256 << 20, buffer_records=4096):
+        self.base_path = base_path
+        self.max_bytes = max(max_bytes, HEADER.size + RECORD.size)
+        self.buffer = bytearray(buffer_records * RECORD.size)
+        self.buffered = 0  # Bytes used in buffer
+        self.file = None
+        self.file_index = -1
+        self.file_bytes = 0
+        self.records = 0
+        self.lock = threading.Lock()
+        self.open_next()
+
+    def open_next(self):
+        if self.file is not None:
+            self.file.close()
+        self.file_index += 1
+        root, ext = os.path.splitext(self.base_path)
+        self.file = open(f"{root}_{self.file_index:03d}{ext or '.bcap'}", "wb")
+        self.file.write(HEADER.pack(CAPTURE_MAGIC, FORMAT_VERSION, RECORD.size))
+        self.file_bytes = HEADER.size
+
+    def write(self, frame, transmitted=False):
+        flags = (FLAG_EXTENDED if frame.extended else 0) | (FLAG_RTR if frame.rtr else 0) | (FLAG_TX if transmitted else 0)
+        with self.lock:
+            if self.file is None:
+                return
+            if self.file_bytes + self.buffered + RECORD.size > self.max_bytes:
+                self.flush_buffer()
+                self.open_next()
+            RECORD.pack_into(self.buffer, self.buffered, frame.timestamp, frame.can_id, flags,
+                             len(frame.data), frame.data)
+            self.buffered += RECORD.size
+            self.records += 1
+            if self.buffered == len(self.buffer):
+                self.flush_buffer()
+
+    def flush_buffer(self):
+        if self.buffered:
+            self.file.write(memoryview(self.buffer)[:self.buffered])
+            self.file_bytes += self.buffered
+            self.buffered = 0
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.flush_buffer()
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.flush_buffer()
+                self.file.close()
+                self.file = None
+
+
+class CaptureReader:
+    """Memory-mapped view of one capture file.
+
+    records is a structured NumPy array backed directly by the file, so
+    opening even a multi-gigabyte capture reads nothing up front. A sparse
+    index holding every INDEX_STRIDE-th timestamp narrows a seek down to
+    one block of records.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            self.file.close()
+            raise ValueError(f"{path} is not a CAN capture file")
+        magic, version, record_size = HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC or record_size != RECORD.size:
+            self.file.close()
+            raise ValueError(f"{path} is not a CAN capture file")
+
+        count = (os.fstat(self.file.fileno()).st_size - HEADER.size) // RECORD.size
+        if count:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.map, RECORD_DTYPE, count, HEADER.size)
+        else:
+            self.map = None
+            self.records = np.zeros(0, RECORD_DTYPE)
+        self.index = np.array(self.records["timestamp"][::INDEX_STRIDE])
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def start_time(self):
+        return float(self.records["timestamp"][0]) if len(self) else None
+
+    @property
+    def end_time(self):
+        return float(self.records["timestamp"][-1]) if len(self) else None
+
+    def seek(self, timestamp):
+        """Position of the first record at or after timestamp"""
+        block = max(int(np.searchsorted(self.index, timestamp, side="left")) - 1, 0)
+        start = block * INDEX_STRIDE
+        timestamps = self.records["timestamp"][start:start + 2 * INDEX_STRIDE]
+        return start + int(np.searchsorted(timestamps, timestamp, side="left"))
+
+    def frame(self, position):
+        record = self.records[position]
+        flags = int(record["flags"])
+        return CANFrame(int(record["can_id"]), record["data"][:record["dlc"]].tobytes(),
+                        bool(flags & FLAG_EXTENDED), bool(flags & FLAG_RTR), float(record["timestamp"]))
+
+    def frames(self, start=0, stop=None, chunk=INDEX_STRIDE):
+        """Yield the frames of a record range, converted a chunk at a time"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for chunk_start in range(start, stop, chunk):
+            block = self.records[chunk_start:min(chunk_start + chunk, stop)]
+            payloads = block["data"].tobytes()
+            rows = zip(block["timestamp"].tolist(), block["can_id"].tolist(),
+                       block["flags"].tolist(), block["dlc"].tolist())
+            for i, (timestamp, can_id, flags, dlc) in enumerate(rows):
+                yield CANFrame(can_id, payloads[8 * i:8 * i + dlc], bool(flags & FLAG_EXTENDED),
+                               bool(flags & FLAG_RTR), timestamp)
+
+    def close(self):
+        self.records = np.zeros(0, RECORD_DTYPE)
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+class CaptureReplay(threading.Thread):
+    """Replays capture files into a frame sink such as ReceiveDispatcher.dispatch.
+
+    speed is the playback rate relative to real time, e.g. 1 or 60; None
+    replays as fast as the sink accepts frames. Frames keep their recorded
+    timestamps.
+    """
+    def __init__(self, paths, sink, speed=1.0, start_time=None):
+        super().__init__(name="CANReplay", daemon=True)
+        self.paths = list(paths)
+        self.sink = sink
+        self.speed = speed
+        self.start_time = start_time
+        self.replayed = 0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        try:
+            self.replay()
+        except Exception as e:
+            self.error = e
+
+    def replay(self):
+        origin = None  # (capture time, wall clock time) playback is paced from
+        for path in self.paths:
+            reader = CaptureReader(path)
+            frames = reader.frames(reader.seek(self.start_time) if self.start_time is not None else 0)
+            try:
+                for frame in frames:
+                    if self._stop_event.is_set():
+                        return
+                    if self.speed:
+                        if origin is None:
+                            origin = (frame.timestamp, time.monotonic())
+                        delay = origin[1] + (frame.timestamp - origin[0]) / self.speed - time.monotonic()
+                        if delay > 0.001:
+                            self._stop_event.wait(delay)
+                    self.sink(frame)
+                    self.replayed += 1
+            finally:
+                frames.close()  # Releases its views of the mapping before it is closed
+                reader.close()
@@ -0,0 +1,443 @@
+import struct
+
+import numpy as np
+
+# struct codes and sizes of the parameter types used in the registry
+TYPE_CODES = {
+    "uint8": "B", "int8": "b",
+    "uint16": "H", "int16": "h",
+    "uint32": "I", "int32": "i",
+}
+TYPE_SIZES = {name: struct.calcsize(code) for name, code in TYPE_CODES.items()}
+BYTE_ORDERS = {"little": "<", "big": ">"}
+
+
+def type_size(param_type):
+    """Number of bytes a parameter type occupies, hex/unknown types take one"""
+    return TYPE_SIZES.get(param_type, 1)
+
+
+def type_range(param_type):
+    """Lowest and highest raw value of an integer type"""
+    bits = 8 * TYPE_SIZES[param_type]
+    if param_type.startswith("u"):
+        return 0, (1 << bits) - 1
+    return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+
+def scale_factor(scale):
+    """Reciprocal of a scale, kept exact for scales like 0.001 or 0.0001"""
+    factor = 1.0 / scale
+    return round(factor) if abs(factor - round(factor)) < 1e-9 else factor
+
+
+def to_raw(value, factor, offset, low, high):
+    """Physical to raw value, rounded half away from zero and saturated.
+
+    This matches MATLAB's uint16()/int16() casts used by the test scripts,
+    e.g. uint16(voltage*10000).
+    """
+    scaled = (value - offset) * factor
+    raw = int(scaled + 0.5) if scaled >= 0 else -int(0.5 - scaled)
+    return low if raw < low else high if raw > high else raw
+
+
+def to_raw_array(values, factor, offset, low, high):
+    """Vectorized to_raw() for a whole array of physical values, NaN becomes 0"""
+    scaled = (np.asarray(values, dtype=float) - offset) * factor
+    raw = np.nan_to_num(np.trunc(scaled + np.copysign(0.5, scaled)), nan=0.0)
+    return np.clip(raw, low, high).astype(np.int64)
+
+
+class CodecField:
+    """One parameter placed at a byte offset of a message"""
+    __slots__ = ("name", "start", "type", "scale", "factor", "offset", "byteorder", "size", "low", "high")
+
+    def __init__(self, name, start, param_type, scale=1, offset=0, byteorder="little"):
+        if param_type not in TYPE_CODES:
+            raise ValueError(f"Unsupported parameter type '{param_type}' for {name}")
+        if byteorder not in BYTE_ORDERS:
+            raise ValueError(f"Unsupported byte order '{byteorder}' for {name}")
+        self.name = name
+        self.start = start
+        self.type = param_type
+        self.scale = scale
+        self.factor = scale_factor(scale)
+        self.offset = offset
+        self.byteorder = byteorder
+        self.size = TYPE_SIZES[param_type]
+        self.low, self.high = type_range(param_type)
+
+
+class MessageCodec:
+    """Encoder/decoder for one CAN message, compiled once into a struct.Struct.
+
+    Fields are byte aligned. Bytes not covered by a field carry a constant
+    value. Encoding and decoding a frame is a single struct call plus
+    scaling; there are no per-byte loops.
+    """
+    def __init__(self, fields, dlc=8, constants=None):
+        self.fields = sorted(fields, key=lambda field: field.start)
+        self.dlc = dlc
+        constants = constants or {}
+        self.constants = dict(constants)  # Byte index -> value of the bytes not covered by a field
+
+        # Pick the byte order used by most multi-byte fields; fields with
+        # the other order are carried as raw byte strings
+        orders = [field.byteorder for field in self.fields if field.size > 1]
+        self.byteorder = "big" if orders.count("big") > orders.count("little") else "little"
+
+        fmt = [BYTE_ORDERS[self.byteorder]]
+        template = []
+        slots = []
+        position = 0
+        for field in self.fields:
+            if field.start < position:
+                raise ValueError(f"Parameter {field.name} overlaps the previous parameter")
+            if field.start + field.size > dlc:
+                raise ValueError(f"Parameter {field.name} does not fit in {dlc} bytes")
+
+            # Constant bytes before this field
+            for i in range(position, field.start):
+                fmt.append("B")
+                template.append(constants.get(i, 0))
+
+            swapped = field.size > 1 and field.byteorder != self.byteorder
+            fmt.append(f"{field.size}s" if swapped else TYPE_CODES[field.type])
+            index = len(template)
+            template.append(b"\x00" * field.size if swapped else 0)
+            slots.append((index, field, swapped))
+            position = field.start + field.size
+
+        for i in range(position, dlc):
+            fmt.append("B")
+            template.append(constants.get(i, 0))
+
+        self.struct = struct.Struct("".join(fmt))
+        self.template = template
+        self.slots = slots
+        self.names = [field.name for field in self.fields]
+        self.batch_layout = None
+
+    @classmethod
+    def from_data_bytes(cls, data_bytes, parameters, dlc=None):
+        """Compile a message from its per-byte layout.
+
+        data_bytes holds one entry per byte, either a parameter name or a
+        hex value. A multi-byte parameter fills as many consecutive entries
+        as its type needs, e.g. Cell_1|Cell_1 for a uint16.
+        """
+        dlc = len(data_bytes) if dlc is None else dlc
+        fields = []
+        constants = {}
+        i = 0
+        while i < dlc:
+            entry = data_bytes[i] if i < len(data_bytes) else "00"
+            param = parameters.get(entry) if entry else None
+            if param is None or param.get("type") not in TYPE_CODES:
+                constants[i] = int(entry, 16) if entry and entry != "--" else 0
+                i += 1
+                continue
+
+            size = TYPE_SIZES[param["type"]]
+            if list(data_bytes[i:i + size]) != [entry] * size:
+                raise ValueError(f"Parameter {entry} ({param['type']}) needs {size} consecutive bytes")
+            fields.append(CodecField(entry, i, param["type"], param.get("scale", 1),
+                                     param.get("offset", 0), param.get("byteorder", "little")))
+            i += size
+        return cls(fields, dlc, constants)
+
+    def encode_raw(self, raw_values):
+        """Pack raw integer values, keyed by parameter name"""
+        args = list(self.template)
+        for index, field, swapped in self.slots:
+            raw = raw_values.get(field.name, 0)
+            args[index] = raw.to_bytes(field.size, field.byteorder, signed=field.low < 0) if swapped else raw
+        return self.struct.pack(*args)
+
+    def encode(self, values):
+        """Pack physical values, keyed by parameter name, into the payload"""
+        args = list(self.template)
+        for index, field, swapped in self.slots:
+            raw = to_raw(values.get(field.name, field.offset), field.factor, field.offset, field.low, field.high)
+            args[index] = raw.to_bytes(field.size, field.byteorder, signed=field.low < 0) if swapped else raw
+        return self.struct.pack(*args)
+
+    def decode_raw(self, payload):
+        """Unpack the raw integer value of every parameter"""
+        raw = self.struct.unpack_from(payload)
+        values = {}
+        for index, field, swapped in self.slots:
+            value = raw[index]
+            values[field.name] = int.from_bytes(value, field.byteorder, signed=field.low < 0) if swapped else value
+        return values
+
+    def decode(self, payload):
+        """Unpack the physical value of every parameter"""
+        raw = self.struct.unpack_from(payload)
+        values = {}
+        for index, field, swapped in self.slots:
+            value = raw[index]
+            if swapped:
+                value = int.from_bytes(value, field.byteorder, signed=field.low < 0)
+            values[field.name] = value / field.factor + field.offset
+        return values
+
+    def decode_batch(self, payloads, raw=False):
+        """Decode an (N x dlc) uint8 array of payloads into one column per parameter"""
+        if self.batch_layout is None:
+            self.batch_layout = SignalLayout(self.signals(), self.dlc)
+        return self.batch_layout.decode_batch(payloads, raw)
+
+    def signals(self):
+        """The fields of this message as bit-level signal definitions"""
+        signals = []
+        for field in self.fields:
+            # Motorola signals are addressed by their most significant bit
+            start_bit = 8 * field.start if field.byteorder == "little" else 8 * field.start + 7
+            signals.append(SignalDefinition(field.name, start_bit, 8 * field.size, field.low < 0,
+                                            field.byteorder, field.scale, field.offset))
+        return signals
+
+
+class SignalDefinition:
+    """A signal at an arbitrary bit position of a CAN payload.
+
+    Bit numbering follows the DBC convention: bit k is bit k % 8 of byte
+    k // 8. Little-endian (Intel) signals start at their least significant
+    bit, like pack(message, value, 48, 16, 'LittleEndian') in MATLAB.
+    Big-endian (Motorola) signals start at their most significant bit.
+
+    multiplex is None for plain signals, "M" for the multiplexor of the
+    message, or the multiplexor value a multiplexed signal belongs to.
+    initial is the physical value sent when no value is given, the offset
+    when None.
+    """
+    __slots__ = ("name", "start_bit", "length", "signed", "byteorder", "scale", "factor", "offset",
+                 "unit", "minimum", "maximum", "multiplex", "initial", "shift", "mask", "low", "high")
+
+    def __init__(self, name, start_bit, length, signed=False, byteorder="little", scale=1, offset=0,
+                 unit="", minimum=None, maximum=None, multiplex=None, initial=None):
+        if not 1 <= length <= 64:
+            raise ValueError(f"Signal {name} must be 1 to 64 bits long")
+        if byteorder not in BYTE_ORDERS:
+            raise ValueError(f"Unsupported byte order '{byteorder}' for {name}")
+        self.name = name
+        self.start_bit = start_bit
+        self.length = length
+        self.signed = signed
+        self.byteorder = byteorder
+        self.scale = scale
+        self.factor = scale_factor(scale)
+        self.offset = offset
+        self.unit = unit
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplex = multiplex
+        self.initial = initial
+
+        # Right shift of the signal in the 64-bit payload word of its byte order
+        if byteorder == "little":
+            self.shift = start_bit
+        else:
+            msb_index = 8 * (start_bit // 8) + 7 - start_bit % 8  # Counted from the first bit sent
+            self.shift = 64 - msb_index - length
+        if self.shift < 0 or self.shift + length > 64:
+            raise ValueError(f"Signal {name} does not fit in 8 bytes")
+
+        self.mask = (1 << length) - 1
+        if signed:
+            self.low, self.high = -(1 << (length - 1)), (1 << (length - 1)) - 1
+        else:
+            self.low, self.high = 0, self.mask
+
+    @property
+    def default(self):
+        """Physical value sent when none is given"""
+        return self.offset if self.initial is None else self.initial
+
+    def to_dict(self):
+        return {
+            "name": self.name, "start_bit": self.start_bit, "length": self.length, "signed": self.signed,
+            "byteorder": self.byteorder, "scale": self.scale, "offset": self.offset, "unit": self.unit,
+            "minimum": self.minimum, "maximum": self.maximum, "multiplex": self.multiplex,
+            "initial": self.initial,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["start_bit"], data["length"], data.get("signed", False),
+                   data.get("byteorder", "little"), data.get("scale", 1), data.get("offset", 0),
+                   data.get("unit", ""), data.get("minimum"), data.get("maximum"), data.get("multiplex"),
+                   data.get("initial"))
+
+
+class SignalLayout:
+    """Encoder/decoder for a message made of bit-level signals.
+
+    Single frames are handled as one 64-bit integer per byte order. Captured
+    payloads are decoded in batch: the (N x 8) byte array is viewed as N
+    64-bit words and every signal becomes one shift-and-mask over the whole
+    capture.
+
+    In multiplexed messages only the signals selected by the multiplexor
+    value are encoded or decoded; in batch results the other rows of a
+    multiplexed signal are NaN. When encode() is not given a multiplexor
+    value it sends the multiplexed groups in turn, round-robin.
+    """
+    def __init__(self, signals, dlc=8):
+        self.signals = list(signals)
+        self.dlc = dlc
+        self.names = [signal.name for signal in self.signals]
+        self.by_name = {signal.name: signal for signal in self.signals}
+
+        multiplexors = [signal for signal in self.signals if signal.multiplex == "M"]
+        if len(multiplexors) > 1:
+            raise ValueError("A message can only have one multiplexor signal")
+        self.multiplexor = multiplexors[0] if multiplexors else None
+        if self.multiplexor is not None:
+            # Decode the multiplexor before the signals it selects
+            self.signals.remove(self.multiplexor)
+            self.signals.insert(0, self.multiplexor)
+
+        # Signals in every frame, and the groups selected by each multiplexor value
+        self.plain = [signal for signal in self.signals if not isinstance(signal.multiplex, int)]
+        self.groups = {}
+        for signal in self.signals:
+            if isinstance(signal.multiplex, int):
+                self.groups.setdefault(signal.multiplex, []).append(signal)
+        self.mux_values = sorted(self.groups)
+        self.next_mux = 0  # Position in mux_values of the next round-robin group
+
+        for signal in self.signals:
+            if dlc < 8 and not signal_fits(signal, dlc):
+                raise ValueError(f"Signal {signal.name} does not fit in {dlc} bytes")
+
+    def encode_raw(self, raw_values):
+        """Pack raw integer values, keyed by signal name"""
+        little = 0
+        big = 0
+        signals = self.plain
+        if self.groups:
+            signals = signals + self.groups.get(raw_values.get(self.multiplexor.name, 0), [])
+        for signal in signals:
+            raw = (raw_values.get(signal.name, 0) & signal.mask) << signal.shift
+            if signal.byteorder == "little":
+                little |= raw
+            else:
+                big |= raw
+        word = little | int.from_bytes(big.to_bytes(8, "big"), "little")
+        return word.to_bytes(8, "little")[:self.dlc]
+
+    def encode(self, values):
+        """Pack physical values, keyed by signal name, into the payload"""
+        raw_values = {}
+        signals = self.plain
+        if self.multiplexor is not None:
+            # The multiplexor value is used as is
+            mux = values.get(self.multiplexor.name)
+            if mux is None and self.mux_values:
+                mux = self.mux_values[self.next_mux]
+                self.next_mux = (self.next_mux + 1) % len(self.mux_values)
+            raw_values[self.multiplexor.name] = int(mux or 0)
+            signals = signals[1:] + self.groups.get(raw_values[self.multiplexor.name], [])
+        for signal in signals:
+            raw_values[signal.name] = to_raw(values.get(signal.name, signal.default), signal.factor,
+                                             signal.offset, signal.low, signal.high)
+        return self.encode_raw(raw_values)
+
+    def decode_raw(self, payload):
+        """Unpack the raw integer value of every signal"""
+        payload = bytes(payload).ljust(8, b"\x00")
+        words = {"little": int.from_bytes(payload, "little"), "big": int.from_bytes(payload, "big")}
+        values = {}
+        signals = self.plain
+        if self.groups:
+            # The multiplexor comes first and selects the group to decode
+            mux = (words[self.multiplexor.byteorder] >> self.multiplexor.shift) & self.multiplexor.mask
+            signals = signals + self.groups.get(mux, [])
+        for signal in signals:
+            raw = (words[signal.byteorder] >> signal.shift) & signal.mask
+            if signal.signed and raw > signal.high:
+                raw -= 1 << signal.length
+            values[signal.name] = raw
+        return values
+
+    def decode(self, payload):
+        """Unpack the physical value of every signal"""
+        values = self.decode_raw(payload)
+        for name, raw in values.items():
+            signal = self.by_name[name]
+            if signal is not self.multiplexor:
+                values[name] = raw / signal.factor + signal.offset
+        return values
+
+    def encode_batch(self, columns, raw=False):
+        """Encode columns of values, keyed by signal name, into an (N x dlc) uint8 array.
+
+        Missing signals encode as their offset. Physical values are rounded
+        and saturated like encode(); in multiplexed messages each row only
+        carries the group its multiplexor column selects.
+        """
+        rows = len(next(iter(columns.values()))) if columns else 0
+        words = {"little": np.zeros(rows, dtype=np.uint64), "big": np.zeros(rows, dtype=np.uint64)}
+        mux = None
+        if self.multiplexor is not None:
+            mux = np.asarray(columns.get(self.multiplexor.name, np.zeros(rows)), dtype=np.int64)
+
+        for signal in self.signals:
+            if signal.name not in columns and raw:
+                continue
+            values = np.broadcast_to(np.asarray(columns.get(signal.name, signal.default), dtype=float), (rows,))
+            if raw or signal is self.multiplexor:
+                values = to_raw_array(values, 1, 0, signal.low, signal.high)
+            else:
+                values = to_raw_array(values, signal.factor, signal.offset, signal.low, signal.high)
+            bits = (values.astype(np.uint64) & np.uint64(signal.mask)) << np.uint64(signal.shift)
+            if isinstance(signal.multiplex, int) and mux is not None:
+                bits[mux != signal.multiplex] = 0
+            words[signal.byteorder] |= bits
+
+        word = words["little"] | words["big"].byteswap()
+        return word.astype("<u8").view(np.uint8).reshape(rows, 8)[:, :self.dlc]
+
+    def decode_batch(self, payloads, raw=False):
+        """Decode an (N x dlc) uint8 array of payloads into one column per signal"""
+        payloads = np.asarray(payloads, dtype=np.uint8)
+        if payloads.ndim != 2:
+            raise ValueError("Payloads must be an (N x 8) array")
+        if payloads.shape[1] != 8 or not payloads.flags.c_contiguous:
+            padded = np.zeros((payloads.shape[0], 8), dtype=np.uint8)
+            padded[:, :min(8, payloads.shape[1])] = payloads[:, :8]
+            payloads = padded
+
+        # Reinterpret each row as a 64-bit word, no copy needed
+        words = {}
+        columns = {}
+        for signal in self.signals:
+            if signal.byteorder not in words:
+                words[signal.byteorder] = payloads.view(BYTE_ORDERS[signal.byteorder] + "u8")[:, 0]
+            column = (words[signal.byteorder] >> np.uint64(signal.shift)) & np.uint64(signal.mask)
+
+            if signal.signed:
+                # Two's complement sign extension
+                sign = np.int64(1 << (signal.length - 1)) if signal.length < 64 else None
+                column = column.view(np.int64) if sign is None else (column.astype(np.int64) ^ sign) - sign
+            elif signal.length <= 32:
+                column = column.astype(np.int64)
+
+            if raw or signal is self.multiplexor:
+                columns[signal.name] = column
+            else:
+                column = column / signal.factor + signal.offset
+                if isinstance(signal.multiplex, int) and self.multiplexor is not None:
+                    column[columns[self.multiplexor.name] != signal.multiplex] = np.nan
+                columns[signal.name] = column
+        return columns
+
+
+def signal_fits(signal, dlc):
+    """Whether all bits of a signal lie within the first dlc bytes"""
+    if signal.byteorder == "little":
+        return signal.start_bit + signal.length <= 8 * dlc
+    return signal.shift >= 8 * (8 - dlc)
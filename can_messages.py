@@ -0,0 +1,163 @@
+from can_bus import frame_key
+from can_codec import MessageCodec, SignalDefinition, SignalLayout
+
+
+def parse_can_id(value):
+    """CAN ID from an int or a hex string like "0x680" """
+    if isinstance(value, int):
+        return value
+    return int(str(value).strip(), 16)
+
+
+class CANMessage:
+    """Definition of one configured CAN message"""
+    __slots__ = ("can_id", "name", "dlc", "extended", "rtr", "periodic", "period_ms", "data_bytes", "signals",
+                 "_codec")
+
+    def __init__(self, can_id, name, dlc=8, extended=False, rtr=False, periodic=True, period_ms=1000,
+                 data_bytes=None, signals=None):
+        self.can_id = parse_can_id(can_id)
+        self.name = name
+        self.dlc = int(dlc)
+        self.extended = extended
+        self.rtr = rtr
+        self.periodic = periodic
+        self.period_ms = int(period_ms) if periodic else 0
+        self.data_bytes = list(data_bytes) if data_bytes is not None else ["00"] * self.dlc
+        self.signals = list(signals) if signals else []  # Bit-level layout, replaces data_bytes
+        self._codec = None
+
+        max_id = 0x1FFFFFFF if extended else 0x7FF
+        if not 0 <= self.can_id <= max_id:
+            raise ValueError(f"CAN ID 0x{self.can_id:X} is out of range for a {'extended' if extended else 'standard'} frame")
+        if not 0 <= self.dlc <= 8:
+            raise ValueError("DLC must be between 0 and 8")
+        if periodic and self.period_ms <= 0:
+            raise ValueError("Period must be a positive number of milliseconds")
+
+    @property
+    def key(self):
+        """frame_key of the message, standard and extended IDs are kept apart"""
+        return frame_key(self.can_id, self.extended)
+
+    @property
+    def id_text(self):
+        return f"0x{self.can_id:08X}" if self.extended else f"0x{self.can_id:03X}"
+
+    def label(self):
+        """One-line summary shown in the message list"""
+        period_text = f"({self.period_ms}ms)" if self.periodic else "(on-demand)"
+        multiplexed = sum(1 for signal in self.signals if isinstance(signal.multiplex, int))
+        if multiplexed:
+            layout = f"{self.signals[0].name} selects {multiplexed} multiplexed signals"
+        elif self.signals:
+            layout = "|".join(f"{signal.name}@{signal.start_bit}:{signal.length}" for signal in self.signals)
+        else:
+            layout = "|".join(self.data_bytes)
+        return f"{self.id_text} [{self.dlc}] {self.name} {period_text}: {layout}"
+
+    def codec(self, parameters):
+        """Compiled codec for this message, built on first use"""
+        if self._codec is None:
+            if self.signals:
+                self._codec = SignalLayout(self.signals, self.dlc)
+            else:
+                self._codec = MessageCodec.from_data_bytes(self.data_bytes, parameters, self.dlc)
+        return self._codec
+
+    def to_dict(self):
+        return {
+            "id": self.id_text,
+            "dlc": self.dlc,
+            "name": self.name,
+            "extended": self.extended,
+            "rtr": self.rtr,
+            "periodic": self.periodic,
+            "period_ms": self.period_ms,
+            "data_bytes": list(self.data_bytes),
+            "signals": [signal.to_dict() for signal in self.signals],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["name"], data.get("dlc", 8), data.get("extended", False),
+                   data.get("rtr", False), data.get("periodic", True), data.get("period_ms", 0),
+                   data.get("data_bytes"), [SignalDefinition.from_dict(item) for item in data.get("signals", [])])
+
+
+class MessageTable:
+    """Ordered collection of CAN messages, indexed by CAN ID and by name"""
+    def __init__(self):
+        self.messages = []
+        self.by_id = {}  # frame_key -> message, like ReceiveDispatcher
+        self.by_name = {}
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def get_by_id(self, can_id, extended=False):
+        return self.by_id.get(frame_key(parse_can_id(can_id), extended))
+
+    def get_by_name(self, name):
+        return self.by_name.get(name)
+
+    def check_unique(self, message, ignore=None):
+        other = self.by_id.get(message.key)
+        if other is not None and other is not ignore:
+            raise ValueError(f"CAN ID {message.id_text} is already used by {other.name}")
+        other = self.by_name.get(message.name)
+        if other is not None and other is not ignore:
+            raise ValueError(f"A message named {message.name} already exists")
+
+    def add(self, message):
+        """Append a message and return its index"""
+        self.check_unique(message)
+        self.messages.append(message)
+        self.by_id[message.key] = message
+        self.by_name[message.name] = message
+        return len(self.messages) - 1
+
+    def replace(self, index, message):
+        old = self.messages[index]
+        self.check_unique(message, ignore=old)
+        del self.by_id[old.key]
+        del self.by_name[old.name]
+        self.messages[index] = message
+        self.by_id[message.key] = message
+        self.by_name[message.name] = message
+
+    def remove(self, index):
+        message = self.messages.pop(index)
+        del self.by_id[message.key]
+        del self.by_name[message.name]
+        return message
+
+    def clear(self):
+        self.messages.clear()
+        self.by_id.clear()
+        self.by_name.clear()
+
+    def invalidate_codecs(self):
+        """Drop compiled codecs, e.g. after parameter definitions changed"""
+        for message in self.messages:
+            message._codec = None
+
+    def to_dicts(self):
+        return [message.to_dict() for message in self.messages]
+
+    def load(self, messages):
+        """Replace the table with the given messages, leaving it unchanged on error"""
+        table = MessageTable()
+        for message in messages:
+            table.add(message)
+        self.messages, self.by_id, self.by_name = table.messages, table.by_id, table.by_name
+
+    def load_dicts(self, items):
+        """Replace the table with messages from to_dicts() output"""
+        self.load(CANMessage.from_dict(item) for item in items)
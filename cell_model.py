@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cycler_data import read_cycler_chunks
+from ocv_extraction import OCV_COLUMNS, OCV_REQUIRED, select_ocv_rows
+
+PARAMETER_NAMES = ("K0", "K1", "K2", "K3", "K4", "R_charge", "R_discharge", "H")
+EPSILON = 0.001  # A, currents this small keep the previous hysteresis state
+SOC_LIMITS = (0.0001, 0.9999)  # Keeps 1/S and the logarithms finite
+
+
+def hysteresis_state(current, epsilon=EPSILON, initial=1):
+    """h_k of the zero-state hysteresis model: the sign of the current, held while it is near zero"""
+    current = np.asarray(current, dtype=float)
+    sign = np.where(current > epsilon, 1, np.where(current < -epsilon, -1, 0))
+    # Forward fill: every row takes the sign of the last row with a clear direction
+    last = np.where(sign != 0, np.arange(len(sign)), -1)
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, sign[np.maximum(last, 0)], initial)
+
+
+def design_matrix(soc, current, epsilon=EPSILON):
+    """Regression matrix of model.m, one row per sample and one column per parameter.
+
+    soc is a fraction and current is as the cycler logs it, positive when
+    charging. The model is U = K0 - K1/S - K2*S + K3*ln(S) + K4*ln(1-S)
+    - R*I - h*H with separate resistances for charge and discharge. Like
+    model.m, I is the negated cycler current, so R and H come out positive.
+    """
+    soc = np.clip(np.asarray(soc, dtype=float), *SOC_LIMITS)
+    current = -np.asarray(current, dtype=float)  # Positive when discharging, as in model.m
+    matrix = np.empty((len(soc), len(PARAMETER_NAMES)))
+    matrix[:, 0] = 1.0
+    matrix[:, 1] = -1.0 / soc
+    matrix[:, 2] = -soc
+    matrix[:, 3] = np.log(soc)
+    matrix[:, 4] = np.log1p(-soc)
+    matrix[:, 5] = np.where(current < 0, -current, 0.0)
+    matrix[:, 6] = np.where(current >= 0, -current, 0.0)
+    matrix[:, 7] = -hysteresis_state(current, epsilon)
+    return matrix
+
+
+class CellModel:
+    """Fitted zero-state hysteresis model of one cell or data set"""
+    def __init__(self, coefficients, rms=np.nan, samples=0, name="", temperature=None):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.rms = rms  # Residual in V
+        self.samples = samples
+        self.name = name
+        self.temperature = temperature  # Mean cell temperature of the data in °C, if known
+
+    @property
+    def parameters(self):
+        return dict(zip(PARAMETER_NAMES, self.coefficients))
+
+    def ocv(self, soc):
+        """Open circuit voltage at SOC given as a fraction"""
+        k0, k1, k2, k3, k4 = self.coefficients[:5]
+        soc = np.clip(np.asarray(soc, dtype=float), *SOC_LIMITS)
+        return k0 - k1 / soc - k2 * soc + k3 * np.log(soc) + k4 * np.log1p(-soc)
+
+    def voltage(self, soc, current, epsilon=EPSILON):
+        """Terminal voltage for a sequence of SOC and current samples"""
+        return design_matrix(soc, current, epsilon) @ self.coefficients
+
+    def profile(self, points=101):
+        """OCV curve as a temperature profile of the OCV tab, SOC in %"""
+        soc = np.linspace(0.0, 100.0, points)
+        return {"soc": [round(value, 6) for value in soc],
+                "ocv": [round(value, 6) for value in self.ocv(soc / 100.0)]}
+
+    def summary(self):
+        values = ", ".join(f"{name}={value:.5g}" for name, value in self.parameters.items())
+        return f"{self.name}: {values}, RMS {self.rms * 1000:.2f} mV over {self.samples} samples"
+
+
+def fit(soc, current, voltage, epsilon=EPSILON, name="", temperature=None):
+    """Least-squares fit of the model to one data set.
+
+    Constant-current charge and discharge alone make the offset, resistance
+    and hysteresis columns linearly dependent, and lstsq would then return
+    an arbitrary split between them. Such data is refused.
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    matrix = design_matrix(soc, current, epsilon)
+    if np.linalg.matrix_rank(matrix) < len(PARAMETER_NAMES):
+        raise ValueError(f"{name or 'The data'} cannot separate every model parameter, "
+                         "it needs rests or current steps besides constant-current charge and discharge")
+    coefficients = np.linalg.lstsq(matrix, voltage, rcond=None)[0]
+    residual = matrix @ coefficients - voltage
+    rms = float(np.sqrt(np.mean(residual * residual))) if len(voltage) else np.nan
+    return CellModel(coefficients, rms, len(voltage), name, temperature)
+
+
+def select_model_rows(chunk, last_soc=np.nan):
+    """Capacity test rows of select_ocv_rows() and the rests that follow them.
+
+    No charge moves during a rest, so a rest row takes the SOC of the last
+    row with current, as long as that row was a capacity test row. last_soc
+    carries that SOC over from the previous chunk. Returns the row mask,
+    the SOC of those rows in % and the SOC to pass with the next chunk.
+    """
+    keep, soc = select_ocv_rows(chunk)
+    current = chunk["Current"]
+    known = np.full(len(current), np.nan)
+    known[keep] = soc
+
+    # Forward fill over the rests from the last row with current
+    last = np.where(current != 0, np.arange(len(current)), -1)
+    np.maximum.accumulate(last, out=last)
+    filled = np.where(last >= 0, known[np.maximum(last, 0)], last_soc)
+
+    rows = keep | ((chunk["CycleIndex"] > 1) & (current == 0) & ~np.isnan(filled))
+    return rows, filled[rows], filled[-1] if len(filled) else last_soc
+
+
+def fit_cycler_file(file_path, epsilon=EPSILON):
+    """Fit the capacity test rows of a cycler export and the rests between them"""
+    parts = {"soc": [], "current": [], "voltage": [], "temperature": []}
+    last_soc = np.nan
+    for chunk in read_cycler_chunks(file_path, OCV_COLUMNS, required=OCV_REQUIRED):
+        keep, soc, last_soc = select_model_rows(chunk, last_soc)
+        parts["soc"].append(soc / 100.0)
+        parts["current"].append(chunk["Current"][keep])
+        parts["voltage"].append(chunk["Voltage"][keep])
+        parts["temperature"].append(chunk["T1"][keep])
+    data = {key: np.concatenate(values) if values else np.array([]) for key, values in parts.items()}
+    if len(data["voltage"]) < len(PARAMETER_NAMES):
+        raise ValueError(f"{file_path} has too few capacity test and rest rows to fit the model")
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    temperature = data["temperature"][~np.isnan(data["temperature"])]
+    return fit(data["soc"], data["current"], data["voltage"], epsilon, name,
+               float(temperature.mean()) if len(temperature) else None)
+
+
+def submit_many(executor, function, items):
+    """Start a fit function for every item on an executor, returns the futures in order"""
+    return [executor.submit(function, item) for item in items]
+
+
+def fit_many(function, items, max_workers=None):
+    """Apply a fit function to every item, in parallel processes when there is more than one"""
+    items = list(items)
+    if len(items) <= 1 or max_workers == 1:
+        return [function(item) for item in items]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return [future.result() for future in submit_many(executor, function, items)]
+
+
+def fit_dataset(dataset):
+    """fit() of a dict with soc, current and voltage and optionally name and temperature"""
+    return fit(**dataset)
+
+
+def fit_datasets(datasets, max_workers=None):
+    """CellModel of every data set, fitted in parallel processes"""
+    return fit_many(fit_dataset, datasets, max_workers)
+
+
+def fit_cycler_files(file_paths, max_workers=None):
+    """CellModel of every cycler export, each file loaded and fitted in its own process"""
+    return fit_many(fit_cycler_file, file_paths, max_workers)
+
+
+def submit_cycler_files(executor, file_paths):
+    """fit_cycler_files() for callers that poll the futures instead of waiting, e.g. the GUI"""
+    return submit_many(executor, fit_cycler_file, file_paths)
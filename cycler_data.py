@@ -0,0 +1,138 @@
+import csv
+import itertools
+
+import numpy as np
+
+# Columns of the cycler exports used by the test scripts
+CYCLER_COLUMNS = ("TotalTime", "Voltage", "Current", "T1", "SOC_DOD", "StepIndex", "CycleIndex")
+
+
+def parse_duration(text):
+    """Seconds from a cycler time such as "12.5", "01:02:03.5" or "1.01:02:03" """
+    text = text.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    days = 0
+    hours, minutes, seconds = text.rsplit(":", 2)
+    if "." in hours:
+        days, hours = hours.split(".", 1)
+    return ((int(days) * 24 + int(hours)) * 60 + int(minutes)) * 60 + float(seconds)
+
+
+def parse_durations(values):
+    """parse_duration() of a whole column at once, raises ValueError if any value does not parse"""
+    text = np.char.strip(np.asarray(values, dtype=str))
+    try:
+        return text.astype(float)
+    except ValueError:
+        pass
+    parts = np.char.rpartition(text, ":")
+    seconds = parts[:, 2].astype(float)
+    parts = np.char.rpartition(parts[:, 0], ":")
+    minutes = parts[:, 2].astype(float)
+    parts = np.char.partition(parts[:, 0], ".")  # Days are written as d.hh
+    has_days = parts[:, 1] == "."
+    days = np.where(has_days, parts[:, 0], "0").astype(float)
+    hours = np.where(has_days, parts[:, 2], parts[:, 0]).astype(float)
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def parse_column(values, name):
+    """Float array of one column of text values, NaN where a value does not parse"""
+    values = np.asarray(values, dtype=str)
+    column = np.full(len(values), np.nan)
+    # Usually only a few values, like the empty first row, are blank
+    filled = np.char.str_len(np.char.strip(values)) > 0
+    try:
+        column[filled] = parse_durations(values[filled]) if name == "TotalTime" else values[filled].astype(float)
+        return column
+    except ValueError:
+        pass
+    parse = parse_duration if name == "TotalTime" else float
+    for i, value in enumerate(values):
+        try:
+            column[i] = parse(value)
+        except (TypeError, ValueError):
+            pass
+    return column
+
+
+def parse_block(lines, columns, indexes):
+    """Columns of a block of CSV lines as float arrays.
+
+    The numeric columns go through np.loadtxt in one call and TotalTime
+    through parse_durations(). Blocks with blank or text values, quoting or
+    short rows, which is rare after the first row, fall back to the csv
+    module and parse_column(), giving NaN where a value is missing.
+    """
+    numeric = [(name, index) for name, index in zip(columns, indexes) if name != "TotalTime"]
+    try:
+        data = {}
+        if numeric:
+            values = np.loadtxt(lines, delimiter=",", usecols=[index for _, index in numeric], dtype=float,
+                                comments=None, ndmin=2)
+            data = {name: values[:, position] for position, (name, _) in enumerate(numeric)}
+        if "TotalTime" in columns:
+            text = np.loadtxt(lines, delimiter=",", usecols=[indexes[columns.index("TotalTime")]], dtype=str,
+                              comments=None, ndmin=1)
+            data["TotalTime"] = parse_durations(text)
+        return data
+    except ValueError:
+        pass
+    rows = list(csv.reader(lines))
+    width = max(indexes) + 1
+    rows = [row if len(row) >= width else row + [""] * (width - len(row)) for row in rows]
+    return {name: parse_column([row[index] for row in rows], name) for name, index in zip(columns, indexes)}
+
+
+def read_cycler_chunks(file_path, columns=CYCLER_COLUMNS, chunk_rows=16384, progress=None, required=None):
+    """Stream cycler columns as dicts of float arrays, chunk_rows rows at a time.
+
+    Only the wanted columns are kept and every chunk is parsed as one block
+    by parse_block(), so files larger than memory can be processed
+    quickly. Rows missing a value in any of the required columns, all
+    columns by default, are dropped, like the empty first row of the
+    exports; other missing values are NaN. TotalTime is converted to
+    seconds. progress is called with the bytes read so far after every
+    chunk.
+    """
+    columns = tuple(columns)
+    required = columns if required is None else tuple(required)
+    with open(file_path, "r", newline="", encoding="utf-8-sig") as file:
+        header = next(csv.reader([file.readline()]), [])
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError(f"{file_path} has no column {', '.join(missing)}")
+        indexes = [header.index(name) for name in columns]
+
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                break
+            data = parse_block(lines, columns, indexes)
+            valid = np.ones(len(data[columns[0]]), dtype=bool)  # np.loadtxt skips blank lines
+            for name in required:
+                valid &= ~np.isnan(data[name])
+            if progress is not None:
+                progress(file.buffer.tell())
+            if valid.any():
+                yield {name: data[name][valid] for name in columns}
+
+
+def load_cycler_csv(file_path, columns=CYCLER_COLUMNS, max_rows=None):
+    """Read cycler columns into float arrays, keyed by column name.
+
+    Rows missing any of the columns, like the empty first row of the
+    exports, are skipped. TotalTime is converted to seconds.
+    """
+    chunks = []
+    rows = 0
+    for chunk in read_cycler_chunks(file_path, columns):
+        chunks.append(chunk)
+        rows += len(chunk[columns[0]])
+        if max_rows is not None and rows >= max_rows:
+            break
+    return {name: np.concatenate([chunk[name] for chunk in chunks])[:max_rows] if chunks else np.array([])
+            for name in columns}
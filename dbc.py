@@ -0,0 +1,214 @@
+import re
+
+from can_bus import CAN_EFF_FLAG, frame_key
+from can_codec import SignalDefinition
+from can_messages import CANMessage
+
+# One compiled pattern per DBC statement kind
+MESSAGE_RE = re.compile(r"BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)")
+SIGNAL_RE = re.compile(
+    r"SG_\s+(\w+)\s*(M|m\d+)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*"
+    r"\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)\s*\[\s*([^|\s]+)\s*\|\s*([^\]\s]+)\s*\]\s*\"([^\"]*)\"")
+COMMENT_RE = re.compile(r"CM_\s+(?:(BO_)\s+(\d+)|(SG_)\s+(\d+)\s+(\w+))\s+\"((?:[^\"\\]|\\.)*)\"\s*;", re.S)
+CYCLE_TIME_RE = re.compile(r"BA_\s+\"GenMsgCycleTime\"\s+BO_\s+(\d+)\s+(\d+)\s*;")
+START_VALUE_RE = re.compile(r"BA_\s+\"GenSigStartValue\"\s+SG_\s+(\d+)\s+(\w+)\s+([^;\s]+)\s*;")
+
+# Pseudo message some tools use to hold signals that are not sent
+INDEPENDENT_SIGNALS = "VECTOR__INDEPENDENT_SIG_MSG"
+
+
+def dbc_id(message):
+    """Message ID as written in a DBC file, bit 31 marks extended IDs"""
+    return message.can_id | CAN_EFF_FLAG if message.extended else message.can_id
+
+
+def parameter_type(signal):
+    """Smallest registry type holding a signal, e.g. uint16 for a 12-bit signal"""
+    for bits in (8, 16, 32):
+        if signal.length <= bits:
+            return f"{'int' if signal.signed else 'uint'}{bits}"
+    return "hex"
+
+
+def parse_number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+class DBCDatabase:
+    """Messages, signals and parameters loaded from a DBC file.
+
+    Signals are indexed by name and by (frame_key, name), since the same
+    signal name may appear in several messages.
+    """
+    def __init__(self):
+        self.messages = []
+        self.parameters = {}
+        self.signals = {}  # Signal name -> (message, signal), first definition wins
+        self.message_signals = {}  # (frame_key, signal name) -> signal
+        self.comments = {}  # DBC ID or (DBC ID, signal name) -> comment
+
+    def add_message(self, message):
+        self.messages.append(message)
+        key = frame_key(message.can_id, message.extended)
+        for signal in message.signals:
+            self.signals.setdefault(signal.name, (message, signal))
+            self.message_signals[key, signal.name] = signal
+
+    def signal(self, name, can_id=None, extended=False):
+        """Signal by name, within one message when can_id is given"""
+        if can_id is None:
+            entry = self.signals.get(name)
+            return entry[1] if entry else None
+        return self.message_signals.get((frame_key(can_id, extended), name))
+
+
+def parse_dbc(text):
+    """Parse the messages, signals, comments, cycle times and start values of a DBC file.
+
+    Every message is compiled into its codec here, so a layout the codec
+    cannot handle is reported on import rather than on first use.
+    """
+    comments = {}
+    for match in COMMENT_RE.finditer(text):
+        if match.group(1):
+            comments[int(match.group(2))] = match.group(6).replace('\\"', '"')
+        else:
+            comments[int(match.group(4)), match.group(5)] = match.group(6).replace('\\"', '"')
+    periods = {int(raw_id): int(period) for raw_id, period in CYCLE_TIME_RE.findall(text)}
+    start_values = {(int(raw_id), name): float(value) for raw_id, name, value in START_VALUE_RE.findall(text)}
+
+    database = DBCDatabase()
+    database.comments = comments
+    pending = None  # (raw_id, name, dlc, signals) of the message being read
+
+    def finish():
+        raw_id, name, dlc, signals = pending
+        if name == INDEPENDENT_SIGNALS:
+            return
+        period = periods.get(raw_id, 0)
+        message = CANMessage(raw_id & ~CAN_EFF_FLAG, name, dlc, extended=bool(raw_id & CAN_EFF_FLAG),
+                             periodic=period > 0, period_ms=period, signals=signals)
+        try:
+            message.codec(database.parameters)
+        except ValueError as e:
+            raise ValueError(f"Invalid layout of message {name}: {e}") from e
+        database.add_message(message)
+
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("SG_") and pending is not None:
+            match = SIGNAL_RE.match(line)
+            if match is None:
+                raise ValueError(f"Malformed signal in message {pending[1]}: {line}")
+            (name, mux, start, length, order, sign, scale, offset,
+             minimum, maximum, unit) = match.groups()
+            if mux:
+                mux = "M" if mux == "M" else int(mux[1:])
+            scale, offset = parse_number(scale), parse_number(offset)
+            initial = start_values.get((pending[0], name))
+            if initial is not None:
+                initial = initial * scale + offset  # Start values are raw
+            try:
+                signal = SignalDefinition(name, int(start), int(length), sign == "-",
+                                          "little" if order == "1" else "big", scale, offset, unit,
+                                          parse_number(minimum), parse_number(maximum), mux, initial)
+            except ValueError as e:
+                raise ValueError(f"Invalid signal in message {pending[1]}: {e}") from e
+            pending[3].append(signal)
+            if initial is not None and signal.minimum == signal.maximum:
+                continue  # A constant, e.g. a fixed byte of a byte-layout message, is not a parameter
+            if name not in database.parameters:
+                database.parameters[name] = {
+                    "description": comments.get((pending[0], name), name.replace("_", " ")),
+                    "type": parameter_type(signal),
+                    "unit": unit,
+                    "scale": signal.scale,
+                    "offset": signal.offset,
+                    "byteorder": signal.byteorder,
+                }
+        elif line.startswith("BO_ "):
+            if pending is not None:
+                finish()
+            match = MESSAGE_RE.match(line)
+            if match is None:
+                raise ValueError(f"Malformed message: {line}")
+            pending = (int(match.group(1)), match.group(2), int(match.group(3)), [])
+        elif line and pending is not None:
+            # Any other statement ends the signal list of the message
+            finish()
+            pending = None
+    if pending is not None:
+        finish()
+    return database
+
+
+def load_dbc(file_path):
+    with open(file_path, "r", encoding="latin-1") as file:
+        return parse_dbc(file.read())
+
+
+def format_number(value):
+    return f"{value:.10g}"
+
+
+def dump_dbc(messages, parameters, node="BMS"):
+    """DBC text for the configured messages.
+
+    Byte-layout messages are written through their compiled codec, so both
+    kinds of message come out as ordinary DBC signals. Their constant hex
+    bytes become fixed 8-bit signals with a GenSigStartValue, which
+    parse_dbc() turns back into bytes sent with that value.
+    """
+    lines = ['VERSION ""', "", "NS_ :", "", "BS_:", "", f"BU_: {node}", ""]
+    comments = []
+    cycle_times = []
+    start_values = []
+    for message in messages:
+        raw_id = dbc_id(message)
+        lines.append(f"BO_ {raw_id} {message.name}: {message.dlc} {node}")
+        signals = message.signals
+        if not signals:
+            codec = message.codec(parameters)
+            signals = codec.signals() + [
+                SignalDefinition(f"{message.name}_Byte_{index}", 8 * index, 8, minimum=value, maximum=value,
+                                 initial=value)
+                for index, value in sorted(codec.constants.items()) if value]
+        for signal in signals:
+            param = parameters.get(signal.name, {})
+            mux = ""
+            if signal.multiplex == "M":
+                mux = " M"
+            elif signal.multiplex is not None:
+                mux = f" m{signal.multiplex}"
+            minimum = signal.minimum if signal.minimum is not None else signal.low * signal.scale + signal.offset
+            maximum = signal.maximum if signal.maximum is not None else signal.high * signal.scale + signal.offset
+            unit = signal.unit or param.get("unit", "")
+            lines.append(f" SG_ {signal.name}{mux} : {signal.start_bit}|{signal.length}"
+                         f"@{1 if signal.byteorder == 'little' else 0}{'-' if signal.signed else '+'}"
+                         f" ({format_number(signal.scale)},{format_number(signal.offset)})"
+                         f" [{format_number(minimum)}|{format_number(maximum)}] \"{unit}\" Vector__XXX")
+            description = param.get("description")
+            if description:
+                description = description.replace('"', '\\"')
+                comments.append(f'CM_ SG_ {raw_id} {signal.name} "{description}";')
+            if signal.initial is not None:
+                raw = round((signal.initial - signal.offset) / signal.scale)
+                start_values.append(f'BA_ "GenSigStartValue" SG_ {raw_id} {signal.name} {raw};')
+        lines.append("")
+        if message.periodic:
+            cycle_times.append(f'BA_ "GenMsgCycleTime" BO_ {raw_id} {message.period_ms};')
+
+    lines.extend(comments)
+    lines.append('BA_DEF_ BO_ "GenMsgCycleTime" INT 0 65535;')
+    lines.append('BA_DEF_ SG_ "GenSigStartValue" FLOAT -1E+038 1E+038;')
+    lines.append('BA_DEF_DEF_ "GenMsgCycleTime" 0;')
+    lines.append('BA_DEF_DEF_ "GenSigStartValue" 0;')
+    lines.extend(cycle_times)
+    lines.extend(start_values)
+    return "\n".join(lines) + "\n"
+
+
+def save_dbc(file_path, messages, parameters):
+    with open(file_path, "w", encoding="latin-1") as file:
+        file.write(dump_dbc(messages, parameters))
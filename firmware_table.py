@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+
+from can_codec import to_raw_array
+from ocv_lookup import OCVLookup
+
+OCV_SCALE = 10000  # Firmware voltages are in 0.1 mV, like the request packets
+TEMPERATURE_SCALE = 10  # 0.1 °C
+SOC_SCALE = 100  # 0.01 %
+
+
+class FirmwareTable:
+    """OCV profiles resampled onto a uniform SOC x temperature grid for the MCU.
+
+    Rows are temperatures from temperature_min in steps of
+    temperature_step, columns are SOC from 0 to 100 % in equal steps, so the
+    firmware finds its cell with a division instead of a search. Values are
+    uint16 OCV at the x10000 scale used everywhere else in the firmware.
+
+    errors holds, per profile, the largest difference in V between the
+    profile's own piecewise linear curve and the float table
+    (interpolation) and between the float and quantized tables
+    (quantization), both evaluated the way the firmware interpolates.
+    """
+    def __init__(self, profiles, soc_points=101, temperature_step=5.0, name="ocv_table"):
+        if soc_points < 2 or (SOC_SCALE * 100) % (soc_points - 1):
+            raise ValueError(f"{soc_points} SOC points do not give a step in whole 0.01 %")
+        scaled_step = temperature_step * TEMPERATURE_SCALE
+        if scaled_step < 1 or abs(scaled_step - round(scaled_step)) > 1e-9:
+            raise ValueError("The temperature step must be a positive multiple of 0.1 °C")
+        self.lookup = OCVLookup(profiles)
+        self.name = name
+
+        self.soc_grid = np.linspace(0.0, 100.0, soc_points)
+        self.soc_step = self.soc_grid[1]
+        low, high = self.lookup.temperatures[0], self.lookup.temperatures[-1]
+        self.temperature_step = temperature_step
+        self.temperature_min = round(low * TEMPERATURE_SCALE) / TEMPERATURE_SCALE
+        temperature_points = max(int(np.ceil((high - self.temperature_min) / temperature_step - 1e-9)) + 1, 1)
+        self.temperature_grid = self.temperature_min + temperature_step * np.arange(temperature_points)
+
+        self.values = self.lookup.ocv(self.soc_grid[None, :], self.temperature_grid[:, None])
+        self.raw = to_raw_array(self.values, OCV_SCALE, 0, 0, 0xFFFF).astype(np.uint16)
+        self.errors = self.measure_errors(profiles)
+
+    def interpolate(self, table, soc, temperature):
+        """Bilinear interpolation with the direct indexing the firmware uses"""
+        rows, columns = table.shape
+        position = np.clip(np.asarray(soc, dtype=float) / self.soc_step, 0, columns - 1)
+        column = np.minimum(position.astype(np.intp), columns - 2)
+        s_weight = position - column
+        next_column = column + 1
+
+        position = np.clip((np.asarray(temperature, dtype=float) - self.temperature_min) / self.temperature_step,
+                           0, rows - 1)
+        row = np.minimum(position.astype(np.intp), max(rows - 2, 0))
+        t_weight = position - row
+        next_row = np.minimum(row + 1, rows - 1)
+
+        low = table[row, column] * (1 - s_weight) + table[row, next_column] * s_weight
+        high = table[next_row, column] * (1 - s_weight) + table[next_row, next_column] * s_weight
+        return low * (1 - t_weight) + high * t_weight
+
+    def measure_errors(self, profiles, points_per_step=10):
+        """Largest interpolation and quantization error in V, keyed by profile name"""
+        quantized = self.raw / OCV_SCALE
+        errors = {}
+        for name, temperature in zip(self.lookup.names, self.lookup.temperatures):
+            data = profiles[name]
+            order = np.argsort(data["soc"], kind="stable")
+            soc = np.asarray(data["soc"], dtype=float)[order]
+            ocv = np.asarray(data["ocv"], dtype=float)[order]
+
+            # The profile's own points and a fine grid between the table columns
+            dense = np.linspace(soc[0], soc[-1], int((soc[-1] - soc[0]) / self.soc_step * points_per_step) + 1)
+            checked = np.union1d(soc, dense)
+            exact = np.interp(checked, soc, ocv)
+            table = self.interpolate(self.values, checked, temperature)
+            errors[name] = (np.abs(table - exact).max(),
+                            np.abs(self.interpolate(quantized, checked, temperature) - table).max())
+        return errors
+
+    def c_header(self, blob_name=None):
+        """C header with the table dimensions, scales and data"""
+        guard = f"{self.name.upper()}_H"
+        prefix = self.name.upper()
+        rows, columns = self.raw.shape
+        lines = [
+            f"#ifndef {guard}",
+            f"#define {guard}",
+            "#include <stdint.h>",
+            "",
+            "// OCV lookup table, rows are temperatures and columns SOC",
+        ]
+        if blob_name:
+            lines.append(f"// The same table is in {blob_name}, little-endian and row by row")
+        lines += [
+            f"#define {prefix}_SOC_POINTS {columns}",
+            f"#define {prefix}_SOC_STEP {round(self.soc_step * SOC_SCALE)} // 0.01 %",
+            f"#define {prefix}_TEMP_POINTS {rows}",
+            f"#define {prefix}_TEMP_MIN {round(self.temperature_min * TEMPERATURE_SCALE)} // 0.1 °C",
+            f"#define {prefix}_TEMP_STEP {round(self.temperature_step * TEMPERATURE_SCALE)} // 0.1 °C",
+            f"#define {prefix}_SCALE {OCV_SCALE} // OCV = value / {prefix}_SCALE V",
+            f"#define {prefix}_SIZE {self.raw.nbytes} // Bytes",
+            "",
+            f"static const uint16_t {self.name}[{prefix}_TEMP_POINTS][{prefix}_SOC_POINTS] =",
+            "{",
+        ]
+        for temperature, row in zip(self.temperature_grid, self.raw):
+            values = [str(value) for value in row]
+            lines.append(f"    {{ // {temperature:g} °C")
+            for start in range(0, len(values), 12):
+                lines.append("        " + ", ".join(values[start:start + 12]) + ",")
+            lines.append("    },")
+        lines += ["};", "", f"#endif // {guard}", ""]
+        return "\n".join(lines)
+
+    def save(self, header_path):
+        """Write the C header and the binary blob next to it, returns the blob path"""
+        blob_path = os.path.splitext(header_path)[0] + ".bin"
+        with open(header_path, "w", encoding="utf-8") as file:
+            file.write(self.c_header(os.path.basename(blob_path)))
+        with open(blob_path, "wb") as file:
+            file.write(self.raw.astype("<u2").tobytes())
+        return blob_path
+
+    def report(self):
+        """One line per profile with its errors in mV"""
+        return [f"{name}: interpolation {interpolation * 1000:.3f} mV, quantization {quantization * 1000:.3f} mV"
+                for name, (interpolation, quantization) in self.errors.items()]
@@ -0,0 +1,239 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from can_bus import CANFrame, LoopbackBus, SocketCANBus, allow_only
+from can_codec import SignalDefinition, SignalLayout
+from cycler_data import load_cycler_csv
+
+VOLTAGE_ID = 1063
+TEMPERATURE_ID = 1095
+CAPACITY_ID = 551
+SOC_ID = 583
+STATUS_ID = 1031  # Also allowed through by can_testing.m
+
+VOLTAGE_LAYOUT = SignalLayout([
+    SignalDefinition("dt", 0, 16, unit="ms"),
+    SignalDefinition("Voltage_1", 16, 16, scale=0.0001, unit="V"),
+    SignalDefinition("Voltage_2", 32, 16, scale=0.0001, unit="V"),
+    SignalDefinition("Voltage_3", 48, 16, scale=0.0001, unit="V"),
+])
+TEMPERATURE_LAYOUT = SignalLayout([
+    SignalDefinition("Temp_1", 0, 16, scale=0.1, unit="°C"),
+    SignalDefinition("Temp_2", 16, 16, scale=0.1, unit="°C"),
+    SignalDefinition("Temp_3", 32, 16, scale=0.1, unit="°C"),
+    SignalDefinition("Current", 48, 16, signed=True, scale=0.01, unit="A"),
+])
+CAPACITY_LAYOUT = SignalLayout([SignalDefinition(f"Capacity_{i}", 16 * (i - 1), 16, unit="mAh") for i in (1, 2, 3)])
+SOC_LAYOUT = SignalLayout([SignalDefinition(f"Cell_SOC_{i}", 16 * (i - 1), 16, unit="%") for i in (1, 2, 3)]
+                          + [SignalDefinition("Pack_SOC", 48, 16, unit="%")])
+
+
+def encode_rows(cells):
+    """Payloads of both request frames for every row, as two (rows x 8) arrays.
+
+    cells holds the cycler data of the three cells, as returned by
+    load_cycler_csv(). The current is the mean of the three cells.
+    """
+    rows = min(len(cell["TotalTime"]) for cell in cells)
+    total_time = cells[0]["TotalTime"][:rows]
+    dt = np.diff(total_time, prepend=0.0) * 1000.0
+    current = np.mean([cell["Current"][:rows] for cell in cells], axis=0)
+
+    voltages = {"dt": dt}
+    temperatures = {"Current": current}
+    for i, cell in enumerate(cells, start=1):
+        voltages[f"Voltage_{i}"] = cell["Voltage"][:rows]
+        temperatures[f"Temp_{i}"] = cell["T1"][:rows]
+    return VOLTAGE_LAYOUT.encode_batch(voltages), TEMPERATURE_LAYOUT.encode_batch(temperatures)
+
+
+class HILResult:
+    """Responses of one HIL run, one row per cycler row, NaN where none arrived"""
+    def __init__(self, rows):
+        self.capacities = np.full((rows, 3), np.nan)
+        self.cell_socs = np.full((rows, 3), np.nan)
+        self.pack_soc = np.full(rows, np.nan)
+        self.latency = np.full(rows, np.nan)  # Seconds from sending a row to its last response
+        self.timeouts = 0
+        self.duration = 0.0
+
+    def save(self, file_path):
+        np.savez(file_path, capacities=self.capacities, cell_socs=self.cell_socs, pack_soc=self.pack_soc,
+                 latency=self.latency)
+
+
+class HILRunner:
+    """Streams encoded rows to the BMS and collects its responses.
+
+    Python version of can_testing.m. Every cycler row is sent as two
+    frames, 1063 with the time step and cell voltages and 1095 with the
+    temperatures and current. The BMS answers each pair with 551 (cell
+    capacities) and 583 (cell and pack SOC). Responses carry no sequence
+    number, so they are matched to rows in the order they arrive.
+
+    At most window rows are waiting for responses at any time; window=1
+    is the lock-step behaviour of can_testing.m. When nothing arrives for
+    timeout seconds the oldest row is given up on.
+    """
+    def __init__(self, bus, window=16, timeout=1.0):
+        if window < 1:
+            raise ValueError("The window must be at least one row")
+        self.bus = bus
+        self.window = window
+        self.timeout = timeout
+        self._stop_event = threading.Event()
+
+        if hasattr(bus, "set_filters"):
+            bus.set_filters(allow_only([CAPACITY_ID, SOC_ID, STATUS_ID]))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self, voltage_payloads, temperature_payloads, progress=None):
+        rows = len(voltage_payloads)
+        result = HILResult(rows)
+        voltage_frames = [payload.tobytes() for payload in voltage_payloads]
+        temperature_frames = [payload.tobytes() for payload in temperature_payloads]
+        sent_at = np.zeros(rows)
+
+        sent = 0
+        next_capacity = 0  # Row the next capacity response belongs to
+        next_soc = 0
+        last_progress = time.monotonic()
+        start = last_progress
+        while min(next_capacity, next_soc) < rows and not self._stop_event.is_set():
+            completed = min(next_capacity, next_soc)
+            while sent < rows and sent - completed < self.window:
+                self.bus.send(CANFrame(VOLTAGE_ID, voltage_frames[sent]))
+                self.bus.send(CANFrame(TEMPERATURE_ID, temperature_frames[sent]))
+                sent_at[sent] = time.monotonic()
+                sent += 1
+
+            frame = self.bus.recv(timeout=max(0.0, last_progress + self.timeout - time.monotonic()))
+            now = time.monotonic()
+            if frame is None:
+                # Give up on the oldest row and keep matching from the next one
+                result.timeouts += 1
+                next_capacity = next_soc = max(next_capacity, next_soc, completed + 1)
+                last_progress = now
+                continue
+            if frame.extended:
+                continue
+
+            if frame.can_id == CAPACITY_ID and next_capacity < sent:
+                values = CAPACITY_LAYOUT.decode_raw(frame.data)
+                result.capacities[next_capacity] = (values["Capacity_1"], values["Capacity_2"], values["Capacity_3"])
+                next_capacity += 1
+            elif frame.can_id == SOC_ID and next_soc < sent:
+                values = SOC_LAYOUT.decode_raw(frame.data)
+                result.cell_socs[next_soc] = (values["Cell_SOC_1"], values["Cell_SOC_2"], values["Cell_SOC_3"])
+                result.pack_soc[next_soc] = values["Pack_SOC"]
+                next_soc += 1
+            else:
+                continue
+
+            last_progress = now
+            if min(next_capacity, next_soc) > completed:
+                result.latency[completed] = now - sent_at[completed]
+                if progress is not None:
+                    progress(completed + 1, rows)
+
+        result.duration = time.monotonic() - start
+        return result
+
+
+class BMSStandIn(threading.Thread):
+    """Minimal BMS for running the harness without hardware.
+
+    Starts each cell at an SOC interpolated from its first voltage, then
+    counts coulombs with the received time step and current, answering
+    every 1095 frame with 551 and 583 like the firmware does.
+    """
+    def __init__(self, bus, capacity_mah=2650, ocv_soc=(0, 100), ocv_voltage=(3.0, 4.2)):
+        super().__init__(name="BMSStandIn", daemon=True)
+        self.bus = bus
+        self.capacity_mah = capacity_mah
+        self.ocv_soc = np.asarray(ocv_soc, dtype=float)
+        self.ocv_voltage = np.asarray(ocv_voltage, dtype=float)
+        self.soc = None  # Percent, per cell
+        self.dt_ms = 0
+        self.handled = 0
+        self._stop_event = threading.Event()
+
+        if hasattr(bus, "set_filters"):
+            bus.set_filters(allow_only([VOLTAGE_ID, TEMPERATURE_ID]))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            frame = self.bus.recv(timeout=0.1)
+            if frame is not None and not frame.extended:
+                self.handle(frame)
+
+    def handle(self, frame):
+        if frame.can_id == VOLTAGE_ID:
+            values = VOLTAGE_LAYOUT.decode(frame.data)
+            self.dt_ms = values["dt"]
+            if self.soc is None:
+                voltages = [values["Voltage_1"], values["Voltage_2"], values["Voltage_3"]]
+                self.soc = np.interp(voltages, self.ocv_voltage, self.ocv_soc)
+        elif frame.can_id == TEMPERATURE_ID and self.soc is not None:
+            current = TEMPERATURE_LAYOUT.decode(frame.data)["Current"]
+            charge_mah = current * 1000.0 * self.dt_ms / 3600000.0
+            self.soc = np.clip(self.soc + 100.0 * charge_mah / self.capacity_mah, 0.0, 100.0)
+
+            capacities = self.soc / 100.0 * self.capacity_mah
+            self.bus.send(CANFrame(CAPACITY_ID, CAPACITY_LAYOUT.encode(
+                {f"Capacity_{i}": capacity for i, capacity in enumerate(capacities, start=1)})))
+            socs = {f"Cell_SOC_{i}": soc for i, soc in enumerate(self.soc, start=1)}
+            socs["Pack_SOC"] = self.soc.mean()
+            self.bus.send(CANFrame(SOC_ID, SOC_LAYOUT.encode(socs)))
+            self.handled += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay cycler data to the BMS over CAN")
+    parser.add_argument("cells", nargs=3, help="Cycler CSV files of the three cells")
+    parser.add_argument("--channel", default="can0", help="SocketCAN channel, e.g. can0 or vcan0")
+    parser.add_argument("--loopback", action="store_true", help="Use an in-process bus instead of SocketCAN")
+    parser.add_argument("--standin", action="store_true", help="Answer with a simulated BMS")
+    parser.add_argument("--window", type=int, default=16, help="Rows in flight")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Seconds to wait for a response")
+    parser.add_argument("--rows", type=int, default=10699, help="Rows to replay")
+    parser.add_argument("--output", default="hil_results.npz")
+    args = parser.parse_args()
+
+    cells = [load_cycler_csv(path, max_rows=args.rows) for path in args.cells]
+    voltage_payloads, temperature_payloads = encode_rows(cells)
+
+    if args.loopback:
+        bus, bms_bus = LoopbackBus.pair()
+    else:
+        bus = SocketCANBus(args.channel)
+        bms_bus = SocketCANBus(args.channel) if args.standin else None
+    standin = None
+    if args.standin:
+        standin = BMSStandIn(bms_bus)
+        standin.start()
+
+    try:
+        result = HILRunner(bus, args.window, args.timeout).run(voltage_payloads, temperature_payloads)
+    finally:
+        if standin is not None:
+            standin.stop()
+            standin.join()
+            bms_bus.close()
+        bus.close()
+
+    result.save(args.output)
+    print(f"{len(voltage_payloads)} rows in {result.duration:.2f}s, {result.timeouts} timeouts, "
+          f"median latency {np.nanmedian(result.latency) * 1000:.2f}ms, results in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
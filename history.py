@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Preallocated (channels x samples) float32 ring buffer.
+
+    Every sample is written twice, at head and head + capacity, so the most
+    recent capacity samples are always one contiguous slice. That makes
+    append O(1) and every window a zero-copy view, at the cost of twice the
+    memory of a plain ring.
+    """
+    def __init__(self, channels, capacity, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.channels = channels
+        self.capacity = capacity
+        self.data = np.full((channels, 2 * capacity), np.nan, dtype=dtype)
+        self.head = 0  # Next write position, 0 <= head < capacity
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, values):
+        """Write one sample for every channel"""
+        n = min(len(values), self.channels)
+        column = self.data[:, self.head]
+        column[:n] = values[:n]
+        column[n:] = np.nan
+        self.data[:, self.head + self.capacity] = column
+
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def view(self, start=0, stop=None):
+        """Zero-copy view of samples start..stop, counted from the oldest kept sample"""
+        start, stop, _ = slice(start, stop).indices(self.size)
+        stop = max(start, stop)
+        offset = self.head + self.capacity - self.size
+        return self.data[:, offset + start:offset + stop]
+
+    def clear(self):
+        self.data.fill(np.nan)
+        self.head = 0
+        self.size = 0
+
+
+class PackHistory:
+    """Time history of all cell voltages, temperatures and the pack current"""
+    def __init__(self, num_cells, num_temps, max_samples=14400):
+        self.max_samples = max_samples
+        self.timestamps = RingBuffer(1, max_samples, dtype=np.float64)
+        self.voltages = RingBuffer(num_cells, max_samples)
+        self.temperatures = RingBuffer(num_temps, max_samples)
+        self.current = RingBuffer(1, max_samples)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def nbytes(self):
+        return sum(buf.data.nbytes for buf in (self.timestamps, self.voltages, self.temperatures, self.current))
+
+    def append(self, frame):
+        """Record one acquired frame"""
+        self.timestamps.append((frame.timestamp,))
+        self.voltages.append(frame.voltages)
+        self.temperatures.append(frame.temperatures)
+        self.current.append((frame.current,))
+
+    def last(self, num_samples):
+        """Views of the most recent num_samples samples"""
+        return self.slice(max(0, len(self) - num_samples), len(self))
+
+    def window(self, start_time=None, end_time=None):
+        """Views of all samples with start_time <= timestamp <= end_time"""
+        timestamps = self.timestamps.view()[0]
+        start = 0 if start_time is None else int(np.searchsorted(timestamps, start_time, side="left"))
+        stop = len(self) if end_time is None else int(np.searchsorted(timestamps, end_time, side="right"))
+        return self.slice(start, stop)
+
+    def slice(self, start, stop):
+        """Return (timestamps, voltages, temperatures, current) views for a sample range"""
+        return (self.timestamps.view(start, stop)[0],
+                self.voltages.view(start, stop),
+                self.temperatures.view(start, stop),
+                self.current.view(start, stop)[0])
+
+    def clear(self):
+        for buf in (self.timestamps, self.voltages, self.temperatures, self.current):
+            buf.clear()
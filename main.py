@@ -3,11 +3,36 @@ from tkinter import ttk, messagebox, filedialog, simpledialog
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import random
+import bisect
 import numpy as np
 import json
 import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from acquisition import AcquisitionWorker, BMSFrame, SimulatedSource
+from history import PackHistory
+from pack_stats import PackStatistics, ParameterValues
+from can_codec import MessageCodec, type_size
+from can_messages import CANMessage, MessageTable
+from can_bus import CAN_EFF_FLAG, LoopbackBus, ReceiveDispatcher, SocketCANBus, TransmitScheduler, allow_only
+from bus_load import BusLoadAnalyzer
+from can_capture import CaptureReplay, CaptureWriter, capture_parts
+from cell_model import submit_cycler_files
+from dbc import load_dbc, save_dbc
+from firmware_table import FirmwareTable
+from mux_frames import MultiplexedFrames
+from ocv_extraction import OCVExtraction
+from ocv_lookup import check_profile, parse_temperature
+from parameters import DEFAULT_PARAMETERS, ParameterRegistry
+from profile_store import PROFILE_DTYPE, ProfileStore, load_npz
+from soc_estimation import CoulombCounter
 
 class BMSMonitorApp:
+    # How often the GUI drains the acquisition queue
+    UI_POLL_MS = 50
+    # Edits within this time are drawn together on the OCV graph
+    OCV_REDRAW_MS = 30
+
     def __init__(self, root):
         self.root = root
         self.root.title("Battery Management System Monitor")
@@ -23,101 +48,92 @@ class BMSMonitorApp:
         self.config_tab = ttk.Frame(self.notebook)
         self.can_tab = ttk.Frame(self.notebook)
         self.ocv_tab = ttk.Frame(self.notebook)
+        self.trends_tab = ttk.Frame(self.notebook)
         
         self.notebook.add(self.voltages_tab, text="Cell Voltages")
         self.notebook.add(self.temperatures_tab, text="Temperatures")
+        self.notebook.add(self.trends_tab, text="Trends")
         self.notebook.add(self.config_tab, text="BMS Configuration")
         self.notebook.add(self.can_tab, text="CAN Messages")
         self.notebook.add(self.ocv_tab, text="OCV Mapping")
         
         #bugfix
-        self.bms_parameters = {}
+        self.bms_parameters = ParameterRegistry(DEFAULT_PARAMETERS)
+        self.bms_parameters.listeners.append(self.on_parameters_changed)
+        
+        # Latest measured values, shared with the CAN transmit scheduler
+        self.live_values = ParameterValues()
+        self.can_bus = None
+        self.tx_scheduler = None
+        self.rx_dispatcher = None
+        self.capture_writer = None
+        self.capture_replay = None
 
         # Setup UI components
         self.setup_voltage_tab()
         self.setup_temperature_tab()
+        self.setup_trends_tab()
         self.setup_config_tab()
         self.setup_can_tab()
         self.setup_ocv_tab()
         
-        # Add refresh button
-        self.refresh_btn = tk.Button(root, text="Refresh Data", command=self.refresh_data)
-        self.refresh_btn.pack(pady=10)
+        # Add refresh button and acquisition status
+        status_frame = tk.Frame(root)
+        status_frame.pack(pady=10)
+        
+        self.refresh_btn = tk.Button(status_frame, text="Refresh Data", command=self.refresh_data)
+        self.refresh_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.acquisition_status = tk.Label(status_frame, text="")
+        self.acquisition_status.pack(side=tk.LEFT, padx=5)
+        
+        # Background acquisition feeding the GUI through a bounded queue
+        self.frames_drawn = 0
+        self.frames_coalesced = 0
+        self.history = PackHistory(self.voltage_grid.count, self.temp_grid.count,
+                                   max_samples=self.get_history_length())
+        self.acquisition = AcquisitionWorker(
+            SimulatedSource(self.voltage_grid.count, self.temp_grid.count),
+            period_ms=self.get_update_rate())
+        
+        # Cell SOC by coulomb counting, started from lookuptable.csv
+        self.soc_engine = CoulombCounter.from_csv()
         
         # Initial data load
         self.refresh_data()
+        
+        self.acquisition.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_acquisition()
     
     def setup_voltage_tab(self):
         main_frame = tk.Frame(self.voltages_tab)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create a canvas with scrollbar for voltage displays
-        canvas = tk.Canvas(main_frame)
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Frame inside canvas for voltage displays
-        self.voltage_frame = tk.Frame(canvas)
-        canvas.create_window((0, 0), window=self.voltage_frame, anchor="nw")
-        
-        # Create voltage entry boxes (7 columns x 20 rows)
-        self.voltage_entries = []
-        for i in range(140):
-            row = i // 14
-            col = i % 14
-            
-            frame = tk.Frame(self.voltage_frame)
-            frame.grid(row=row, column=col, padx=5, pady=5)
-            
-            label = tk.Label(frame, text=f"Cell {i+1}")
-            label.pack()
-            
-            entry = tk.Entry(frame, width=8, justify='center', readonlybackground='white')
-            entry.pack()
-            entry.config(state='readonly')
-            self.voltage_entries.append(entry)
+        # Pack-level voltage summary
+        self.voltage_summary = tk.Label(main_frame, text="", anchor=tk.W, font=("", 10, "bold"))
+        self.voltage_summary.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
         
-        # Configure scrolling
-        self.voltage_frame.update_idletasks()
-        canvas.config(scrollregion=canvas.bbox("all"))
+        # Single canvas grid for the cell voltages, sized by calculate_total_cells
+        self.voltage_grid = CellGridView(main_frame, "Cell", "{:.3f}V", decimals=3,
+                                         thresholds=(3.3, 4.0),
+                                         colors=("#ffffcc", "#e6ffe6", "#ffcccc"))
     
     def setup_temperature_tab(self):
         main_frame = tk.Frame(self.temperatures_tab)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create a canvas with scrollbar for temperature displays
-        canvas = tk.Canvas(main_frame)
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Frame inside canvas for temperature displays
-        self.temp_frame = tk.Frame(canvas)
-        canvas.create_window((0, 0), window=self.temp_frame, anchor="nw")
+        # Pack-level temperature summary
+        self.temp_summary = tk.Label(main_frame, text="", anchor=tk.W, font=("", 10, "bold"))
+        self.temp_summary.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
         
-        # Create temperature entry boxes (6 columns x 20 rows)
-        self.temp_entries = []
-        for i in range(120):
-            row = i // 14
-            col = i % 14
-            
-            frame = tk.Frame(self.temp_frame)
-            frame.grid(row=row, column=col, padx=5, pady=5)
-            
-            label = tk.Label(frame, text=f"Temp {i+1}")
-            label.pack()
-            
-            entry = tk.Entry(frame, width=8, justify='center', readonlybackground='white')
-            entry.pack()
-            entry.config(state='readonly')
-            self.temp_entries.append(entry)
-        
-        # Configure scrolling
-        self.temp_frame.update_idletasks()
-        canvas.config(scrollregion=canvas.bbox("all"))
+        # Single canvas grid for the temperature sensors, sized by calculate_total_cells
+        self.temp_grid = CellGridView(main_frame, "Temp", "{:.1f}°C", decimals=1,
+                                      thresholds=(20, 40),
+                                      colors=("#ccccff", "#e6ffe6", "#ffcccc"))
+    
+    def setup_trends_tab(self):
+        self.trend_plot = TrendPlot(self.trends_tab)
     
     def setup_config_tab(self):
         # Create a canvas with scrollbar for configuration
@@ -249,6 +265,11 @@ class BMSMonitorApp:
         self.update_rate_entry.grid(row=1, column=1, padx=10, pady=5)
         self.update_rate_entry.insert(0, "500")
         
+        ttk.Label(comm_frame, text="History Length (samples):").grid(row=2, column=0, padx=10, pady=5, sticky=tk.W)
+        self.history_length_entry = ttk.Entry(comm_frame, width=10)
+        self.history_length_entry.grid(row=2, column=1, padx=10, pady=5)
+        self.history_length_entry.insert(0, "14400")
+        
         # Save button
         save_btn = ttk.Button(settings_frame, text="Save Configuration", command=self.save_config)
         save_btn.pack(pady=20)
@@ -383,102 +404,100 @@ class BMSMonitorApp:
         ttk.Button(list_button_frame, text="Delete Selected", command=self.delete_can_message).pack(side=tk.LEFT, padx=5)
         ttk.Button(list_button_frame, text="Export Messages", command=self.export_can_messages).pack(side=tk.LEFT, padx=5)
         ttk.Button(list_button_frame, text="Import Messages", command=self.import_can_messages).pack(side=tk.LEFT, padx=5)
+        ttk.Button(list_button_frame, text="Import DBC", command=self.import_dbc).pack(side=tk.LEFT, padx=5)
+        ttk.Button(list_button_frame, text="Export DBC", command=self.export_dbc).pack(side=tk.LEFT, padx=5)
+        ttk.Button(list_button_frame, text="Generate Cell Frames", command=self.generate_multiplexed_frames).pack(side=tk.LEFT, padx=5)
+        
+        # Bus connection and periodic transmission
+        bus_frame = ttk.LabelFrame(parent, text="CAN Bus")
+        bus_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(bus_frame, text="Backend:").grid(row=0, column=0, padx=10, pady=5, sticky=tk.W)
+        self.bus_backend_var = tk.StringVar(value="Loopback")
+        ttk.Combobox(bus_frame, textvariable=self.bus_backend_var, values=["Loopback", "SocketCAN"],
+                     width=12, state="readonly").grid(row=0, column=1, padx=10, pady=5)
+        
+        ttk.Label(bus_frame, text="Channel:").grid(row=0, column=2, padx=10, pady=5, sticky=tk.W)
+        self.bus_channel_entry = ttk.Entry(bus_frame, width=10)
+        self.bus_channel_entry.grid(row=0, column=3, padx=10, pady=5)
+        self.bus_channel_entry.insert(0, "vcan0")
+        
+        ttk.Label(bus_frame, text="Receive IDs (hex, id/mask):").grid(row=1, column=0, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        self.rx_filter_entry = ttk.Entry(bus_frame, width=30)
+        self.rx_filter_entry.grid(row=1, column=2, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        self.rx_filter_entry.insert(0, "0x227, 0x247, 0x407")
+        
+        ttk.Button(bus_frame, text="Connect", command=self.connect_can_bus).grid(row=0, column=4, padx=5, pady=5)
+        ttk.Button(bus_frame, text="Disconnect", command=self.disconnect_can_bus).grid(row=0, column=5, padx=5, pady=5)
+        ttk.Button(bus_frame, text="Timing Report", command=self.show_transmit_timing).grid(row=1, column=4, padx=5, pady=5)
+        ttk.Button(bus_frame, text="Received Values", command=self.show_received_values).grid(row=1, column=5, padx=5, pady=5)
+        
+        # Recording and replay of bus traffic
+        ttk.Label(bus_frame, text="Replay Speed:").grid(row=2, column=0, padx=10, pady=5, sticky=tk.W)
+        self.replay_speed_var = tk.StringVar(value="1x")
+        ttk.Combobox(bus_frame, textvariable=self.replay_speed_var, values=["1x", "10x", "60x", "600x", "Max"],
+                     width=8).grid(row=2, column=1, padx=10, pady=5)
+        ttk.Button(bus_frame, text="Start Recording", command=self.start_can_recording).grid(row=2, column=2, padx=5, pady=5)
+        ttk.Button(bus_frame, text="Stop Recording", command=self.stop_can_recording).grid(row=2, column=3, padx=5, pady=5)
+        ttk.Button(bus_frame, text="Replay Capture", command=self.replay_can_capture).grid(row=2, column=4, padx=5, pady=5)
+        ttk.Button(bus_frame, text="Stop Replay", command=self.stop_can_replay).grid(row=2, column=5, padx=5, pady=5)
+        
+        # Worst-case bus load of the configured messages
+        ttk.Label(bus_frame, text="Bitrate (kbit/s):").grid(row=3, column=0, padx=10, pady=5, sticky=tk.W)
+        self.bitrate_entry = ttk.Entry(bus_frame, width=10)
+        self.bitrate_entry.grid(row=3, column=1, padx=10, pady=5)
+        self.bitrate_entry.insert(0, "500")
+        self.bitrate_entry.bind("<Return>", lambda event: self.update_bus_load())
+        self.bitrate_entry.bind("<FocusOut>", lambda event: self.update_bus_load())
+        self.bus_load_label = ttk.Label(bus_frame, text="")
+        self.bus_load_label.grid(row=3, column=2, columnspan=3, padx=10, pady=5, sticky=tk.W)
+        ttk.Button(bus_frame, text="Bus Load", command=self.show_bus_load).grid(row=3, column=5, padx=5, pady=5)
+        self.bus_load = BusLoadAnalyzer()
+        
+        # Configured messages, the listbox is only a view of this table
+        self.can_messages = MessageTable()
         
         # Add a few example messages
-        self.msg_listbox.insert(tk.END, "0x680 [8] BMS_Status (1000ms): SOC|Highest_Cell_V|Lowest_Cell_V|Avg_Cell_V|High_Temp|Low_Temp|Status|Flags")
-        self.msg_listbox.insert(tk.END, "0x681 [8] Cell_Voltages (500ms): Cell_1|Cell_2|Cell_3|Cell_4|High_Cell_ID|Low_Cell_ID|00|00")
-        self.msg_listbox.insert(tk.END, "0x682 [8] Temperature_Data (1000ms): Temp_1|Temp_2|Temp_3|Temp_4|High_Temp_ID|Low_Temp_ID|00|00")
+        self.can_messages.add(CANMessage(0x680, "BMS_Status", period_ms=1000, data_bytes=[
+            "SOC", "Highest_Cell_V", "Highest_Cell_V", "Lowest_Cell_V", "Lowest_Cell_V", "High_Temp", "Low_Temp", "Status"]))
+        self.can_messages.add(CANMessage(0x681, "Cell_Voltages", period_ms=500, data_bytes=[
+            "Cell_1", "Cell_1", "Cell_2", "Cell_2", "Cell_3", "Cell_3", "High_Cell_ID", "Low_Cell_ID"]))
+        self.can_messages.add(CANMessage(0x682, "Temperature_Data", period_ms=1000, data_bytes=[
+            "Temp_1", "Temp_2", "Temp_3", "Temp_4", "High_Temp_ID", "Low_Temp_ID", "00", "00"]))
+        self.refresh_message_list()
+        self.update_bus_load()
 
     def setup_parameter_mapping_tab(self, parent):
         # Create a frame for organizing content
         main_frame = ttk.Frame(parent)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create a scrollable frame for parameter definitions
-        canvas = tk.Canvas(main_frame)
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
+        # Prefix search over the parameter names
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        self.param_search_var = tk.StringVar(value="")
+        self.param_search_var.trace_add("write", lambda *args: self.fill_parameter_view())
+        ttk.Entry(search_frame, textvariable=self.param_search_var, width=20).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(search_frame, text="Add Custom Parameter", command=self.add_custom_parameter).pack(side=tk.LEFT, padx=10)
+        ttk.Button(search_frame, text="Generate Cell Parameters", command=self.generate_cell_parameters).pack(side=tk.LEFT, padx=5)
+        
+        # The tree only draws the visible rows, so thousands of parameters stay cheap
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("description", "type", "unit", "scale")
+        self.param_tree = ttk.Treeview(tree_frame, columns=columns, height=12)
+        self.param_tree.heading("#0", text="Parameter", anchor=tk.W)
+        self.param_tree.column("#0", width=160)
+        for column, width in zip(columns, (260, 80, 60, 80)):
+            self.param_tree.heading(column, text=column.capitalize(), anchor=tk.W)
+            self.param_tree.column(column, width=width)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.param_tree.yview)
+        self.param_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        param_frame = ttk.Frame(canvas)
-        canvas.create_window((0, 0), window=param_frame, anchor="nw")
-        
-        # Define the available BMS parameters
-        self.bms_parameters = {
-            # System parameters
-            "SOC": {"description": "State of Charge (%)", "type": "uint8", "unit": "%", "scale": 1},
-            "SOH": {"description": "State of Health (%)", "type": "uint8", "unit": "%", "scale": 1},
-            "Current": {"description": "Pack Current (A)", "type": "int16", "unit": "A", "scale": 0.1},
-            "Voltage": {"description": "Pack Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.1},
-            "Power": {"description": "Pack Power (kW)", "type": "int16", "unit": "kW", "scale": 0.01},
-            "Status": {"description": "BMS Status", "type": "uint8", "unit": "", "scale": 1},
-            "Flags": {"description": "Error/Warning Flags", "type": "uint8", "unit": "", "scale": 1},
-            
-            # Cell voltage parameters
-            "Highest_Cell_V": {"description": "Highest Cell Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "Lowest_Cell_V": {"description": "Lowest Cell Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "Delta_Cell_V": {"description": "Max Cell Voltage Difference (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "Avg_Cell_V": {"description": "Average Cell Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "High_Cell_ID": {"description": "Highest Voltage Cell ID", "type": "uint8", "unit": "", "scale": 1},
-            "Low_Cell_ID": {"description": "Lowest Voltage Cell ID", "type": "uint8", "unit": "", "scale": 1},
-            
-            # Temperature parameters
-            "High_Temp": {"description": "Highest Temperature (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            "Low_Temp": {"description": "Lowest Temperature (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            "Avg_Temp": {"description": "Average Temperature (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            "High_Temp_ID": {"description": "Highest Temperature Sensor ID", "type": "uint8", "unit": "", "scale": 1},
-            "Low_Temp_ID": {"description": "Lowest Temperature Sensor ID", "type": "uint8", "unit": "", "scale": 1},
-            
-            # Cell balancing
-            "Bal_Status": {"description": "Balancing Status", "type": "uint8", "unit": "", "scale": 1},
-            "Cells_Balancing": {"description": "Number of Cells Balancing", "type": "uint8", "unit": "", "scale": 1},
-            
-            # Individual cell/temp values (these would be expanded based on configuration)
-            "Cell_1": {"description": "Cell 1 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "Cell_2": {"description": "Cell 2 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "Cell_3": {"description": "Cell 3 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            "Cell_4": {"description": "Cell 4 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
-            
-            "Temp_1": {"description": "Temperature Sensor 1 (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            "Temp_2": {"description": "Temperature Sensor 2 (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            "Temp_3": {"description": "Temperature Sensor 3 (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            "Temp_4": {"description": "Temperature Sensor 4 (°C)", "type": "int8", "unit": "°C", "scale": 1},
-            
-            # Raw hex value (no parameter mapping)
-            "": {"description": "Custom hex value", "type": "hex", "unit": "", "scale": 1},
-        }
-        
-        # Add headers
-        ttk.Label(param_frame, text="Parameter", font=("", 10, "bold")).grid(row=0, column=0, padx=10, pady=5, sticky=tk.W)
-        ttk.Label(param_frame, text="Description", font=("", 10, "bold")).grid(row=0, column=1, padx=10, pady=5, sticky=tk.W)
-        ttk.Label(param_frame, text="Type", font=("", 10, "bold")).grid(row=0, column=2, padx=10, pady=5, sticky=tk.W)
-        ttk.Label(param_frame, text="Unit", font=("", 10, "bold")).grid(row=0, column=3, padx=10, pady=5, sticky=tk.W)
-        ttk.Label(param_frame, text="Scale", font=("", 10, "bold")).grid(row=0, column=4, padx=10, pady=5, sticky=tk.W)
-        
-        # Add parameter rows to the table
-        row = 1
-        for param_name, param_details in sorted(self.bms_parameters.items()):
-            if param_name == "":
-                continue  # Skip the empty parameter
-                
-            ttk.Label(param_frame, text=param_name).grid(row=row, column=0, padx=10, pady=2, sticky=tk.W)
-            ttk.Label(param_frame, text=param_details["description"]).grid(row=row, column=1, padx=10, pady=2, sticky=tk.W)
-            ttk.Label(param_frame, text=param_details["type"]).grid(row=row, column=2, padx=10, pady=2, sticky=tk.W)
-            ttk.Label(param_frame, text=param_details["unit"]).grid(row=row, column=3, padx=10, pady=2, sticky=tk.W)
-            ttk.Label(param_frame, text=str(param_details["scale"])).grid(row=row, column=4, padx=10, pady=2, sticky=tk.W)
-            row += 1
-        
-        # Add a button to customize parameters (for future expansion)
-        ttk.Button(param_frame, text="Add Custom Parameter", command=self.add_custom_parameter).grid(
-            row=row, column=0, columnspan=2, padx=10, pady=10, sticky=tk.W)
-        
-        ttk.Button(param_frame, text="Generate Cell Parameters", command=self.generate_cell_parameters).grid(
-            row=row, column=2, columnspan=3, padx=10, pady=10, sticky=tk.W)
-        
-        # Configure canvas for scrolling
-        param_frame.update_idletasks()
-        canvas.config(scrollregion=canvas.bbox("all"))
+        self.param_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.fill_parameter_view()
         
         # Add some instructions
         instruction_frame = ttk.LabelFrame(parent, text="Instructions")
@@ -488,6 +507,7 @@ class BMSMonitorApp:
             "1. Define CAN messages in the Message Configuration tab\n"
             "2. Use the parameter names from this table in the data byte fields\n"
             "3. Each parameter will be automatically encoded according to its type and scale\n"
+            "   (16-bit parameters occupy two consecutive bytes)\n"
             "4. For custom hex values, leave the parameter selection empty and enter the hex value"
         )
         
@@ -518,7 +538,6 @@ class BMSMonitorApp:
         ttk.Label(self.bytes_frame, text="Description").grid(row=0, column=13, padx=5, pady=5)
         
         # Create entries for each byte
-        param_names = [""] + sorted([name for name in self.bms_parameters.keys() if name])
         y = 0
         z = 0
         for i in range(num_bytes):
@@ -536,7 +555,9 @@ class BMSMonitorApp:
             
             # Parameter selection
             param_var = tk.StringVar(value="")
-            param_combo = ttk.Combobox(self.bytes_frame, textvariable=param_var, values=param_names, width=15, state="readonly")
+            # The parameter list is only filled when the combobox opens
+            param_combo = ttk.Combobox(self.bytes_frame, textvariable=param_var, width=15, state="readonly")
+            param_combo.configure(postcommand=lambda combo=param_combo: self.fill_param_combo(combo))
             param_combo.grid(row=i+1-y, column=2+z, padx=5, pady=5)
             param_combo.bind("<<ComboboxSelected>>", lambda e, idx=i: self.on_param_selected(e, idx))
             
@@ -560,6 +581,17 @@ class BMSMonitorApp:
             desc = self.bms_parameters[param_name]["description"]
             combo.desc_label.config(text=desc)
             
+            # Multi-byte parameters also occupy the following bytes
+            size = type_size(self.bms_parameters[param_name]["type"])
+            if param_name and 1 < size <= len(self.byte_param_vars) - byte_idx:
+                for i in range(byte_idx + 1, byte_idx + size):
+                    self.byte_param_vars[i].set(param_name)
+                    self.byte_param_combos[i].desc_label.config(text=f"{desc} (cont.)")
+                    self.byte_entries[i].config(state="normal")
+                    self.byte_entries[i].delete(0, tk.END)
+                    self.byte_entries[i].insert(0, "--")
+                    self.byte_entries[i].config(state="disabled")
+            
             # If parameter is selected, disable the hex entry and show a placeholder
             if param_name:
                 self.byte_entries[byte_idx].config(state="disabled")
@@ -592,14 +624,14 @@ class BMSMonitorApp:
         self.profile_listbox.grid(row=0, column=1, rowspan=2, padx=5, pady=5)
         
         # Add default temperature profiles
-        self.temp_profiles = {
+        self.temp_profiles = ProfileStore({
             "25°C": {"soc": [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
                     "ocv": [3.0, 3.2, 3.3, 3.35, 3.4, 3.5, 3.6, 3.7, 3.9, 4.1, 4.2]},
             "0°C": {"soc": [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
                     "ocv": [2.9, 3.1, 3.2, 3.25, 3.3, 3.4, 3.5, 3.6, 3.8, 4.0, 4.1]},
             "45°C": {"soc": [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
                     "ocv": [3.1, 3.3, 3.4, 3.45, 3.5, 3.6, 3.7, 3.8, 4.0, 4.15, 4.25]}
-        }
+        })
         
         # Populate listbox with profile names
         for temp in self.temp_profiles.keys():
@@ -683,12 +715,36 @@ class BMSMonitorApp:
                 command=self.import_ocv_maps).pack(side=tk.LEFT, padx=5)
         ttk.Button(export_import_frame, text="Export Current Profile", 
                 command=self.export_current_ocv_map).pack(side=tk.LEFT, padx=5)
+        ttk.Button(export_import_frame, text="Export Firmware Table", 
+                command=self.export_firmware_table).pack(side=tk.LEFT, padx=5)
+        
+        # Profiles derived from raw cycler exports
+        cycler_frame = ttk.Frame(left_frame)
+        cycler_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Button(cycler_frame, text="Import OCV from Cycler Data", 
+                command=self.import_cycler_ocv).pack(side=tk.LEFT, padx=5)
+        ttk.Button(cycler_frame, text="Fit Cell Model", 
+                command=self.fit_cell_models).pack(side=tk.LEFT, padx=5)
+        self.ocv_extraction = None
+        self.model_executor = None  # Worker processes for the cell model fits, kept between fits
+        self.model_fits = None
         
         # Create graph area
         self.figure, self.ax = plt.subplots(figsize=(6, 4))
         self.canvas = FigureCanvasTkAgg(self.figure, right_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # Set graph labels and properties once, the curves are updated in place
+        self.ax.set_xlabel('State of Charge (%)')
+        self.ax.set_ylabel('Open Circuit Voltage (V)')
+        self.ax.set_title('OCV vs. SOC Relationship by Temperature')
+        self.ax.grid(True)
+        self.ax.set_xlim(0, 100)
+        self.ocv_lines = {}  # One line per plotted profile
+        self.ocv_highlighted = None
+        self.ocv_redraw_job = None
+        
         # Add a graph information frame
         info_frame = ttk.Frame(right_frame)
         info_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -705,15 +761,30 @@ class BMSMonitorApp:
             cells_series = int(self.cells_series_entry.get())
             num_slaves = int(self.num_slaves_entry.get())
             cells_parallel = int(self.cells_parallel_entry.get())
+            temps_per_slave = int(self.temp_sensors_entry.get())
             
             # Calculate total cells
-            total_cells = cells_series * num_slaves * cells_parallel
+            cells_per_slave = cells_series * cells_parallel
+            total_cells = cells_per_slave * num_slaves
+            total_temps = temps_per_slave * num_slaves
             
             # Update the read-only total cells field
             self.total_cells_entry.config(state='normal')
             self.total_cells_entry.delete(0, tk.END)
             self.total_cells_entry.insert(0, str(total_cells))
             self.total_cells_entry.config(state='readonly')
+            
+            # Resize the cell grids, grouped by slave
+            self.voltage_grid.set_layout(total_cells, cells_per_slave)
+            self.temp_grid.set_layout(total_temps, temps_per_slave)
+            self.pack_stats = PackStatistics(cells_per_slave, temps_per_slave, cells_parallel)
+            
+            # Resize the simulated data source and history to match
+            if hasattr(self, 'acquisition'):
+                self.acquisition.source.num_cells = total_cells
+                self.acquisition.source.num_temps = total_temps
+            if hasattr(self, 'history'):
+                self.history = PackHistory(total_cells, total_temps, max_samples=self.history.max_samples)
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numbers in all fields.")
 
@@ -733,67 +804,254 @@ class BMSMonitorApp:
         
     def add_can_message(self):
         try:
-            can_id = self.can_msg_id_entry.get()
-            dlc = self.dlc_var.get()
-            name = self.msg_name_entry.get()
+            message = self.message_from_form()
+            self.can_messages.add(message)
             
-            # Get period text
-            period_text = f"({self.period_entry.get()}ms)" if self.periodic_var.get() else "(on-demand)"
+            # Add to listbox
+            self.msg_listbox.insert(tk.END, message.label())
+            self.update_transmit_schedule()
             
-            # Collect parameters/data bytes
-            data_bytes = []
-            for i in range(int(dlc)):
-                param_name = self.byte_param_vars[i].get()
-                if param_name:
-                    data_bytes.append(param_name)
-                else:
-                    data_bytes.append(self.byte_entries[i].get())
+            messagebox.showinfo("Success", f"CAN message '{message.name}' has been added.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to add message: {str(e)}")
+
+    def message_from_form(self):
+        """Build a CANMessage from the message configuration form"""
+        dlc = int(self.dlc_var.get())
+        periodic = self.periodic_var.get()
+        
+        # Collect parameters/data bytes
+        data_bytes = []
+        for i in range(dlc):
+            param_name = self.byte_param_vars[i].get()
+            if param_name:
+                data_bytes.append(param_name)
+            else:
+                data_bytes.append(self.byte_entries[i].get())
+        
+        return CANMessage(self.can_msg_id_entry.get(), self.msg_name_entry.get().strip(), dlc,
+                          extended=self.msg_type_var.get() == "Extended", rtr=self.rtr_var.get(),
+                          periodic=periodic, period_ms=self.period_entry.get() if periodic else 0,
+                          data_bytes=data_bytes)
+
+    def connect_can_bus(self):
+        """Open the selected bus, send the periodic messages and decode received frames"""
+        self.disconnect_can_bus()
+        try:
+            filters = self.parse_receive_filters(self.rx_filter_entry.get())
             
-            data_str = "|".join(data_bytes)
+            if self.bus_backend_var.get() == "SocketCAN":
+                self.can_bus = SocketCANBus(self.bus_channel_entry.get().strip())
+            else:
+                self.can_bus = LoopbackBus()
             
-            # Create message string
-            message = f"{can_id} [{dlc}] {name} {period_text}: {data_str}"
+            self.tx_scheduler = TransmitScheduler(self.can_bus, self.live_values)
+            self.tx_scheduler.set_messages(self.can_messages, self.bms_parameters)
             
-            # Add to listbox
-            self.msg_listbox.insert(tk.END, message)
+            self.rx_dispatcher = ReceiveDispatcher(self.can_bus, filters)
+            self.rx_dispatcher.register_messages(self.can_messages, self.bms_parameters)
             
-            messagebox.showinfo("Success", f"CAN message '{name}' has been added.")
+            self.tx_scheduler.start()
+            self.rx_dispatcher.start()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to add message: {str(e)}")
+            self.disconnect_can_bus()
+            messagebox.showerror("CAN Error", f"Failed to connect: {str(e)}")
+
+    @staticmethod
+    def parse_receive_filters(text):
+        """Parse "0x227, 0x400/0x700" into acceptance filters, IDs above 0x7FF are extended"""
+        filters = []
+        for part in text.replace(";", ",").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            can_id, _, mask = part.partition("/")
+            can_id = int(can_id, 16)
+            extended = can_id > 0x7FF
+            if mask:
+                filters.append((can_id | CAN_EFF_FLAG if extended else can_id, int(mask, 16) | CAN_EFF_FLAG))
+            else:
+                filters.extend(allow_only([can_id], extended))
+        return filters
+
+    def disconnect_can_bus(self):
+        self.stop_can_replay()
+        self.stop_can_recording()
+        if self.tx_scheduler is not None:
+            self.tx_scheduler.stop()
+            self.tx_scheduler = None
+        if self.rx_dispatcher is not None:
+            self.rx_dispatcher.stop()
+            self.rx_dispatcher = None
+        if self.can_bus is not None:
+            self.can_bus.close()
+            self.can_bus = None
+
+    def update_transmit_schedule(self):
+        """Reschedule and re-register the messages after the message table changed"""
+        self.update_bus_load()
+        if self.tx_scheduler is not None:
+            try:
+                self.tx_scheduler.set_messages(self.can_messages, self.bms_parameters)
+                self.rx_dispatcher.register_messages(self.can_messages, self.bms_parameters)
+            except Exception as e:
+                messagebox.showerror("CAN Error", f"Failed to update transmission: {str(e)}")
+
+    def update_bus_load(self):
+        """Re-run the bus load analysis for the changed messages"""
+        try:
+            self.bus_load.set_bitrate(float(self.bitrate_entry.get()) * 1000)
+        except ValueError:
+            self.bus_load_label.config(text="Invalid bitrate", foreground="red")
+            return
+        
+        self.bus_load.update(self.can_messages)
+        missed = len(self.bus_load.unschedulable())
+        text = f"Bus load {self.bus_load.utilization * 100:.1f}%, "
+        text += f"{missed} messages miss their period" if missed else "all periods met"
+        self.bus_load_label.config(text=text, foreground="red" if missed else "")
+
+    def show_bus_load(self):
+        self.update_bus_load()
+        summary, lines = self.bus_load.report()
+        messagebox.showinfo("Bus Load", summary + "\n\n" + "\n".join(lines[:25]))
+
+    def show_transmit_timing(self):
+        if self.tx_scheduler is None:
+            messagebox.showinfo("Timing Report", "The CAN bus is not connected.")
+            return
+        
+        lines = self.tx_scheduler.timing_report()
+        summary = f"{len(lines)} periodic messages, {self.tx_scheduler.overruns} overruns, {self.tx_scheduler.errors} errors"
+        if self.tx_scheduler.last_error is not None:
+            summary += f"\nLast error: {self.tx_scheduler.last_error}"
+        
+        # Show the worst messages only
+        messagebox.showinfo("Timing Report", summary + "\n\n" + "\n".join(lines[:20]))
+
+    def show_received_values(self):
+        if self.rx_dispatcher is None:
+            messagebox.showinfo("Received Values", "The CAN bus is not connected.")
+            return
+        
+        rx = self.rx_dispatcher
+        summary = f"{rx.received} frames received, {rx.rejected} rejected by filters, {rx.errors} decode errors"
+        if getattr(self.can_bus, "dropped", 0):
+            summary += f", {self.can_bus.dropped} dropped by the kernel"
+        if self.capture_writer is not None:
+            summary += f"\nRecording: {self.capture_writer.records} frames"
+        if self.capture_replay is not None:
+            state = "running" if self.capture_replay.is_alive() else "finished"
+            summary += f"\nReplay {state}: {self.capture_replay.replayed} frames"
+            if self.capture_replay.error is not None:
+                summary += f" (error: {self.capture_replay.error})"
+        counts = [f"0x{key & ~CAN_EFF_FLAG:X}: {count} frames" for key, count in sorted(rx.frame_counts.items())]
+        values = [f"{name} = {value:g}" for name, value in list(rx.values.items())[:30]]
+        messagebox.showinfo("Received Values", "\n".join([summary, ""] + counts[:20] + [""] + values))
+
+    def start_can_recording(self):
+        """Record all sent and received frames into rotating capture files"""
+        if self.can_bus is None:
+            messagebox.showinfo("Recording", "Connect the CAN bus before recording.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".bcap",
+            filetypes=[("CAN Capture Files", "*.bcap"), ("All Files", "*.*")]
+        )
+        
+        if file_path:
+            try:
+                self.stop_can_recording()
+                self.capture_writer = CaptureWriter(file_path)
+                self.tx_scheduler.recorder = self.capture_writer
+                self.rx_dispatcher.recorder = self.capture_writer
+            except Exception as e:
+                messagebox.showerror("Recording Error", f"Failed to start recording: {str(e)}")
+
+    def stop_can_recording(self):
+        if self.capture_writer is None:
+            return
+        if self.tx_scheduler is not None:
+            self.tx_scheduler.recorder = None
+        if self.rx_dispatcher is not None:
+            self.rx_dispatcher.recorder = None
+        self.capture_writer.close()
+        self.capture_writer = None
+
+    def replay_can_capture(self):
+        """Feed a recorded capture into the receive decoders"""
+        if self.rx_dispatcher is None:
+            messagebox.showinfo("Replay", "Connect the CAN bus before replaying a capture.")
+            return
+        
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CAN Capture Files", "*.bcap"), ("All Files", "*.*")]
+        )
+        
+        if file_path:
+            try:
+                speed_text = self.replay_speed_var.get().strip().lower().rstrip("x")
+                speed = None if speed_text == "max" else float(speed_text)
+                if speed is not None and speed <= 0:
+                    raise ValueError("Replay speed must be positive")
+                
+                self.stop_can_replay()
+                self.capture_replay = CaptureReplay(capture_parts(file_path), self.rx_dispatcher.replay, speed)
+                self.capture_replay.start()
+            except ValueError as e:
+                messagebox.showerror("Replay Error", f"Invalid replay speed: {str(e)}")
+            except Exception as e:
+                messagebox.showerror("Replay Error", f"Failed to replay capture: {str(e)}")
+
+    def stop_can_replay(self):
+        if self.capture_replay is not None:
+            self.capture_replay.stop()
+            self.capture_replay = None
+
+    def refresh_message_list(self):
+        """Rebuild the message listbox from the message table"""
+        self.msg_listbox.delete(0, tk.END)
+        if len(self.can_messages):
+            self.msg_listbox.insert(tk.END, *[message.label() for message in self.can_messages])
 
     def test_can_transmit(self):
         try:
             can_id = self.can_msg_id_entry.get()
             dlc = self.dlc_var.get()
             
-            # Create a test message with real values
-            test_values = []
+            # Compile the message layout from the form
+            data_bytes = []
             for i in range(int(dlc)):
                 param_name = self.byte_param_vars[i].get()
-                if param_name:
-                    # Get a simulated value for this parameter
-                    hex_value = self.get_simulated_param_value(param_name)
-                    test_values.append(hex_value)
-                else:
-                    # Use the raw hex value entered
-                    test_values.append(self.byte_entries[i].get())
+                data_bytes.append(param_name if param_name else self.byte_entries[i].get())
+            codec = MessageCodec.from_data_bytes(data_bytes, self.bms_parameters)
+            
+            # Encode the message with measured or simulated values
+            values = {name: self.get_simulated_param_value(name) for name in codec.names}
+            payload = codec.encode(values)
             
             # In a real app, you would send the CAN message here
             # For demo purposes, we'll just show a message box
             messagebox.showinfo("CAN Test Transmit", 
                             f"Message with ID {can_id} and {dlc} bytes would be transmitted:\n"
-                            f"Hex: {' '.join(test_values)}")
+                            f"Hex: {payload.hex(' ').upper()}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to test transmit: {str(e)}")
 
     def get_simulated_param_value(self, param_name):
-        """Generate a simulated value for a given parameter"""
+        """Physical value for a given parameter, simulated if it is not measured"""
         if param_name not in self.bms_parameters:
-            return "00"
+            return 0
             
         param = self.bms_parameters[param_name]
         
-        # Generate a plausible value based on parameter type
+        # Use the measured value where one is available, otherwise
+        # generate a plausible value based on parameter type
+        measured = self.get_measured_param_value(param_name)
+        if measured is not None:
+            return measured
+        
         if param_name == "SOC":
             value = random.randint(0, 100)
         elif param_name == "SOH":
@@ -821,15 +1079,12 @@ class BMSMonitorApp:
         else:
             value = 0
         
-        # Convert to appropriate hex representation based on type
-        if param["type"] == "uint8" or param["type"] == "int8":
-            return f"{value & 0xFF:02X}"
-        elif param["type"] == "uint16" or param["type"] == "int16":
-            # For 16-bit values, we'd actually need two bytes
-            # This is just a simple representation for testing
-            return f"{value & 0xFF:02X}"
-        else:
-            return "00"
+        # The simulated values above are raw, convert them to physical units
+        return value * param["scale"]
+
+    def get_measured_param_value(self, param_name):
+        """Latest physical value of a parameter, or None if it is not measured"""
+        return self.live_values.get(param_name)
 
     def clear_can_form(self):
         self.can_msg_id_entry.delete(0, tk.END)
@@ -852,58 +1107,43 @@ class BMSMonitorApp:
     def edit_can_message(self):
         try:
             selected_index = self.msg_listbox.curselection()[0]
-            message = self.msg_listbox.get(selected_index)
-            
-            # Parse the message
-            # Example format: "0x680 [8] BMS_Status (1000ms): SOC|Highest_Cell_V|Lowest_Cell_V|Avg_Cell_V|High_Temp|Low_Temp|Status|Flags"
-            parts = message.split()
-            
-            # Extract CAN ID, DLC, and name
-            can_id = parts[0]
-            dlc = parts[1].strip('[]')
-            name_end = message.find("(")
-            name = message[message.find("]")+1:name_end].strip()
-            
-            # Extract period if it exists
-            if "(on-demand)" in message:
-                periodic = False
-                period = ""
-            else:
-                periodic = True
-                period_start = message.find("(") + 1
-                period_end = message.find("ms)")
-                period = message[period_start:period_end]
+            message = self.can_messages[selected_index]
             
-            # Extract data bytes or parameter names
-            data_start = message.find(":") + 1
-            data_bytes = message[data_start:].strip().split("|")
+            if message.signals:
+                messagebox.showerror("Edit Error", "Messages with bit-level signals cannot be edited byte by byte.")
+                return
             
-            # Update the form with the parsed values
+            # Update the form with the message definition
             self.can_msg_id_entry.delete(0, tk.END)
-            self.can_msg_id_entry.insert(0, can_id)
+            self.can_msg_id_entry.insert(0, message.id_text)
             
-            self.dlc_var.set(dlc)
+            self.msg_type_var.set("Extended" if message.extended else "Standard")
+            self.dlc_var.set(str(message.dlc))
+            self.rtr_var.set(message.rtr)
             
             self.msg_name_entry.delete(0, tk.END)
-            self.msg_name_entry.insert(0, name)
+            self.msg_name_entry.insert(0, message.name)
             
-            self.periodic_var.set(periodic)
+            self.periodic_var.set(message.periodic)
+            self.period_entry.config(state="normal")
             self.period_entry.delete(0, tk.END)
-            self.period_entry.insert(0, period)
+            self.period_entry.insert(0, str(message.period_ms) if message.periodic else "")
+            self.toggle_period_field()
             
             # Update data bytes frame for the new DLC
             self.update_data_bytes_frame()
             
             # Update the parameter selections and values
-            for i, byte_val in enumerate(data_bytes):
+            for i, byte_val in enumerate(message.data_bytes):
                 if i < len(self.byte_param_vars):
                     # Check if this is a parameter name or hex value
                     if byte_val in self.bms_parameters:
                         # It's a parameter name
                         self.byte_param_vars[i].set(byte_val)
-                        self.byte_entries[i].config(state="disabled")
+                        self.byte_entries[i].config(state="normal")
                         self.byte_entries[i].delete(0, tk.END)
                         self.byte_entries[i].insert(0, "--")
+                        self.byte_entries[i].config(state="disabled")
                         # Update description
                         self.byte_param_combos[i].desc_label.config(text=self.bms_parameters[byte_val]["description"])
                     else:
@@ -914,7 +1154,9 @@ class BMSMonitorApp:
                         self.byte_entries[i].insert(0, byte_val)
             
             # Delete the old message
+            self.can_messages.remove(selected_index)
             self.msg_listbox.delete(selected_index)
+            self.update_transmit_schedule()
             
         except IndexError:
             messagebox.showerror("Selection Error", "Please select a message to edit.")
@@ -927,27 +1169,17 @@ class BMSMonitorApp:
             # Create a dialog to get parameter details
             dialog = CustomParameterDialog(self.root, self.bms_parameters.keys())
             if dialog.result:
-                param_name, description, param_type, unit, scale = dialog.result
+                param_name, description, param_type, unit, scale, byteorder = dialog.result
                 
                 # Add to parameters dictionary
                 self.bms_parameters[param_name] = {
                     "description": description,
                     "type": param_type,
                     "unit": unit,
-                    "scale": float(scale)
+                    "scale": float(scale),
+                    "byteorder": byteorder
                 }
                 
-                # Refresh the parameter mapping tab
-                parent = self.notebook.winfo_children()[2]  # Parameter mapping tab
-                self.setup_parameter_mapping_tab(parent)
-                
-                # Update the comboboxes in the message config tab
-                for combo in self.byte_param_combos:
-                    current_val = combo.get()
-                    param_names = [""] + sorted([name for name in self.bms_parameters.keys() if name])
-                    combo['values'] = param_names
-                    combo.set(current_val)  # Restore current selection
-                    
                 messagebox.showinfo("Success", f"Parameter '{param_name}' has been added.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add parameter: {str(e)}")
@@ -959,11 +1191,14 @@ class BMSMonitorApp:
             num_cells = int(self.total_cells_entry.get()) if hasattr(self, 'total_cells_entry') else 140
             num_temps = int(self.temp_sensors_entry.get()) * int(self.num_slaves_entry.get()) if hasattr(self, 'temp_sensors_entry') and hasattr(self, 'num_slaves_entry') else 120
             
+            # Collect the new parameters so the views are refreshed once
+            new_parameters = {}
+            
             # Generate cell voltage parameters
             for i in range(1, num_cells + 1):
                 param_name = f"Cell_{i}"
                 if param_name not in self.bms_parameters:
-                    self.bms_parameters[param_name] = {
+                    new_parameters[param_name] = {
                         "description": f"Cell {i} Voltage (V)",
                         "type": "uint16",
                         "unit": "V",
@@ -974,38 +1209,71 @@ class BMSMonitorApp:
             for i in range(1, num_temps + 1):
                 param_name = f"Temp_{i}"
                 if param_name not in self.bms_parameters:
-                    self.bms_parameters[param_name] = {
+                    new_parameters[param_name] = {
                         "description": f"Temperature Sensor {i} (°C)",
                         "type": "int8",
                         "unit": "°C",
                         "scale": 1
                     }
             
-            # Refresh the parameter mapping tab
-            parent = self.notebook.winfo_children()[2]  # Parameter mapping tab
-            self.setup_parameter_mapping_tab(parent)
-            
-            # Update the comboboxes in the message config tab
-            for combo in self.byte_param_combos:
-                current_val = combo.get()
-                param_names = [""] + sorted([name for name in self.bms_parameters.keys() if name])
-                combo['values'] = param_names
-                combo.set(current_val)  # Restore current selection
+            self.bms_parameters.update(new_parameters)
+            
+            # Estimate the load of sending every cell voltage in multiplexed frames
+            frames = MultiplexedFrames("Cell", num_cells, first_id=0x700, refresh_ms=1000)
+            messages = [message for message in self.can_messages if not message.name.startswith("Cell_Mux_")]
+            estimate = BusLoadAnalyzer(self.bus_load.bitrate)
+            estimate.update(messages + frames.messages())
+            missed = len(estimate.unschedulable())
+            load_text = (f"Sending all {num_cells} cells every {frames.refresh_ms}ms would load the bus to "
+                         f"{estimate.utilization * 100:.1f}% at {estimate.bitrate / 1000:g} kbit/s"
+                         + (f", {missed} messages would miss their period." if missed else "."))
                 
-            messagebox.showinfo("Success", f"Generated parameters for {num_cells} cells and {num_temps} temperature sensors.")
+            messagebox.showinfo("Success", f"Generated parameters for {num_cells} cells and {num_temps} temperature sensors.\n\n{load_text}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate parameters: {str(e)}")
 
+    def generate_multiplexed_frames(self):
+        """Add multiplexed messages carrying every cell voltage and temperature of the pack"""
+        try:
+            num_cells = int(self.total_cells_entry.get()) if hasattr(self, 'total_cells_entry') else 140
+            num_temps = int(self.temp_sensors_entry.get()) * int(self.num_slaves_entry.get()) if hasattr(self, 'temp_sensors_entry') and hasattr(self, 'num_slaves_entry') else 120
+            refresh_ms = simpledialog.askinteger("Generate Cell Frames", "Full-pack refresh period (ms):",
+                                                 initialvalue=1000, minvalue=1, parent=self.root)
+            if refresh_ms is None:
+                return
+            
+            # Use the registry types of the first cell and sensor
+            cell = self.bms_parameters.get("Cell_1", {"type": "uint16", "scale": 0.001})
+            temp = self.bms_parameters.get("Temp_1", {"type": "int8", "scale": 1})
+            cell_frames = MultiplexedFrames("Cell", num_cells, cell["type"], cell["scale"], cell.get("offset", 0),
+                                            0x700, refresh_ms)
+            temp_frames = MultiplexedFrames("Temp", num_temps, temp["type"], temp["scale"], temp.get("offset", 0),
+                                            0x700 + cell_frames.num_ids, refresh_ms)
+            
+            # Replace previously generated frames
+            messages = [message for message in self.can_messages
+                        if not message.name.startswith(("Cell_Mux_", "Temp_Mux_"))]
+            self.can_messages.load(messages + cell_frames.messages() + temp_frames.messages())
+            self.refresh_message_list()
+            self.update_transmit_schedule()
+            
+            messagebox.showinfo("Success", f"{num_cells} cells in {cell_frames.groups} frames and {num_temps} "
+                                f"sensors in {temp_frames.groups} frames, refreshed every "
+                                f"{max(cell_frames.refresh_ms, temp_frames.refresh_ms)}ms.\n"
+                                f"{self.bus_load_label.cget('text')}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to generate frames: {str(e)}")
+
     def delete_can_message(self):
         try:
             selected_index = self.msg_listbox.curselection()[0]
+            self.can_messages.remove(selected_index)
             self.msg_listbox.delete(selected_index)
+            self.update_transmit_schedule()
         except IndexError:
             messagebox.showerror("Selection Error", "Please select a message to delete.")
 
     def export_can_messages(self):
-        messages = [self.msg_listbox.get(i) for i in range(self.msg_listbox.size())]
-        
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
             filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
@@ -1013,49 +1281,11 @@ class BMSMonitorApp:
         
         if file_path:
             try:
-                # Parse messages into a structured format
-                structured_messages = []
-                
-                for message in messages:
-                    # Parse the message
-                    parts = message.split()
-                    can_id = parts[0]
-                    dlc = parts[1].strip('[]')
-                    
-                    name_end = message.find("(")
-                    name = message[message.find("]")+1:name_end].strip()
-                    
-                    # Extract period if it exists
-                    if "(on-demand)" in message:
-                        periodic = False
-                        period = 0
-                    else:
-                        periodic = True
-                        period_start = message.find("(") + 1
-                        period_end = message.find("ms)")
-                        period = int(message[period_start:period_end])
-                    
-                    # Extract data bytes or parameter names
-                    data_start = message.find(":") + 1
-                    data_bytes = message[data_start:].strip().split("|")
-                    
-                    # Create structured message
-                    msg_data = {
-                        "id": can_id,
-                        "dlc": int(dlc),
-                        "name": name,
-                        "periodic": periodic,
-                        "period_ms": period,
-                        "data_bytes": data_bytes
-                    }
-                    
-                    structured_messages.append(msg_data)
-                
                 # Export as JSON
                 with open(file_path, 'w') as file:
-                    json.dump(structured_messages, file, indent=2)
+                    json.dump(self.can_messages.to_dicts(), file, indent=2)
                     
-                messagebox.showinfo("Export Successful", f"Exported {len(messages)} messages to {file_path}")
+                messagebox.showinfo("Export Successful", f"Exported {len(self.can_messages)} messages to {file_path}")
             except Exception as e:
                 messagebox.showerror("Export Error", f"Error exporting messages: {str(e)}")
 
@@ -1069,33 +1299,87 @@ class BMSMonitorApp:
                 with open(file_path, 'r') as file:
                     messages = json.load(file)
                 
-                # Clear existing messages
-                self.msg_listbox.delete(0, tk.END)
-                
-                # Add imported messages
-                for msg in messages:
-                    can_id = msg["id"]
-                    dlc = msg["dlc"]
-                    name = msg["name"]
-                    
-                    # Format period
-                    if msg["periodic"]:
-                        period_text = f"({msg['period_ms']}ms)"
-                    else:
-                        period_text = "(on-demand)"
-                    
-                    # Format data bytes
-                    data_str = "|".join(msg["data_bytes"])
-                    
-                    # Create message string
-                    message = f"{can_id} [{dlc}] {name} {period_text}: {data_str}"
-                    
-                    # Add to listbox
-                    self.msg_listbox.insert(tk.END, message)
+                # Replace the existing messages
+                self.can_messages.load_dicts(messages)
+                self.refresh_message_list()
+                self.update_transmit_schedule()
                 
                 messagebox.showinfo("Import Successful", f"Imported {len(messages)} messages from {file_path}")
             except Exception as e:
                 messagebox.showerror("Import Error", f"Error importing messages: {str(e)}")
+
+    def import_dbc(self):
+        """Replace the messages with those of a DBC file and add its signals as parameters"""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("DBC Files", "*.dbc"), ("All Files", "*.*")]
+        )
+        
+        if file_path:
+            try:
+                database = load_dbc(file_path)
+                self.can_messages.load(database.messages)
+                self.bms_parameters.update({name: param for name, param in database.parameters.items()
+                                            if name not in self.bms_parameters})
+                self.refresh_message_list()
+                self.update_transmit_schedule()
+                
+                messagebox.showinfo("Import Successful", f"Imported {len(database.messages)} messages with "
+                                    f"{len(database.message_signals)} signals from {file_path}")
+            except Exception as e:
+                messagebox.showerror("Import Error", f"Error importing DBC file: {str(e)}")
+
+    def export_dbc(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".dbc",
+            filetypes=[("DBC Files", "*.dbc"), ("All Files", "*.*")]
+        )
+        
+        if file_path:
+            try:
+                save_dbc(file_path, self.can_messages, self.bms_parameters)
+                messagebox.showinfo("Export Successful", f"Exported {len(self.can_messages)} messages to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Export Error", f"Error exporting DBC file: {str(e)}")
+
+    def on_parameters_changed(self, names):
+        """Update the codecs, the mapping view and the selections for changed parameters"""
+        # Message layouts may refer to the changed parameters
+        if hasattr(self, 'can_messages'):
+            self.can_messages.invalidate_codecs()
+        
+        # The byte comboboxes pick up new names when they next open, see fill_param_combo
+        if not hasattr(self, 'param_tree'):
+            return
+        if len(names) > 100:
+            self.fill_parameter_view()
+            return
+        start, stop = self.bms_parameters.prefix_range(self.param_search_var.get())
+        for name in names:
+            if name and self.param_tree.exists(name):
+                self.param_tree.delete(name)
+        
+        # Insert in index order, so every row lands after the ones before it
+        present = [(self.bms_parameters.index(name), name) for name in names if name and name in self.bms_parameters]
+        for position, name in sorted(present):
+            if start <= position < stop:
+                self.param_tree.insert("", position - start, iid=name, text=name, values=self.parameter_row(name))
+
+    def fill_param_combo(self, combo):
+        """Give a byte combobox the parameter names as it opens, if they changed since it last did"""
+        param_names = self.bms_parameters.choices()  # Cached until a name is added or removed
+        if getattr(combo, 'param_names', None) is not param_names:
+            combo['values'] = param_names
+            combo.param_names = param_names
+
+    def parameter_row(self, name):
+        param = self.bms_parameters[name]
+        return (param["description"], param["type"], param["unit"], param["scale"])
+
+    def fill_parameter_view(self):
+        """Show the parameters matching the search prefix"""
+        self.param_tree.delete(*self.param_tree.get_children())
+        for name in self.bms_parameters.with_prefix(self.param_search_var.get()):
+            self.param_tree.insert("", tk.END, iid=name, text=name, values=self.parameter_row(name))
  
     def create_profile_entries(self, profile_name):
         """Create entry fields for a specific temperature profile"""
@@ -1103,33 +1387,35 @@ class BMSMonitorApp:
         for widget in self.ocv_entries_frame.winfo_children()[2:]:  # Skip the headers
             widget.destroy()
         
-        # Create entries for SOC-OCV pairs
-        soc_entries = []
-        ocv_entries = []
-        
         # Get the data for this profile
         profile_data = self.temp_profiles[profile_name]
-        soc_values = profile_data["soc"]
-        ocv_values = profile_data["ocv"]
-        
-        for i, (soc, ocv) in enumerate(zip(soc_values, ocv_values)):
-            # SOC entry
-            soc_entry = ttk.Entry(self.ocv_entries_frame, width=10)
-            soc_entry.grid(row=i+1, column=0, padx=5, pady=3)
-            soc_entry.insert(0, str(soc))
-            soc_entries.append(soc_entry)
-            
-            # OCV entry
-            ocv_entry = ttk.Entry(self.ocv_entries_frame, width=10)
-            ocv_entry.grid(row=i+1, column=1, padx=5, pady=3)
-            ocv_entry.insert(0, str(ocv))
-            ocv_entries.append(ocv_entry)
         
-        # Store the entries in the profile dictionary
-        self.profile_entries[profile_name] = {
-            "soc": soc_entries,
-            "ocv": ocv_entries
+        # Entries are parsed again only after they were edited; values
+        # holds the parsed points row by row, NaN for empty entries
+        entries = {
+            "soc": [],
+            "ocv": [],
+            "variables": [],
+            "values": profile_data.copy(),
+            "dirty": set()
         }
+        for soc, ocv in zip(profile_data["soc"], profile_data["ocv"]):
+            self.add_ocv_entry_row(entries, f"{soc:g}", f"{ocv:g}")
+        
+        # Store the entries in the profile dictionary
+        self.profile_entries[profile_name] = entries
+
+    def add_ocv_entry_row(self, entries, soc_text, ocv_text):
+        """Append a row of SOC and OCV entries that marks itself dirty when edited"""
+        row = len(entries["soc"])
+        for column, key, text in ((0, "soc", soc_text), (1, "ocv", ocv_text)):
+            variable = tk.StringVar(value=text)
+            entry = ttk.Entry(self.ocv_entries_frame, width=10, textvariable=variable)
+            entry.grid(row=row+1, column=column, padx=5, pady=3)
+            variable.trace_add("write", lambda *args: entries["dirty"].add(row))
+            entries[key].append(entry)
+            entries["variables"].append(variable)
+        return row
 
     def on_profile_select(self, event):
         """Handle selection of a different temperature profile"""
@@ -1152,18 +1438,33 @@ class BMSMonitorApp:
             messagebox.showerror("Profile Selection Error", f"Error changing profiles: {str(e)}")
 
     def save_current_profile_data(self):
-        """Save the current entries to the profile data"""
+        """Save the edited entries to the profile data"""
         try:
             if self.current_profile in self.profile_entries:
                 entries = self.profile_entries[self.current_profile]
-                soc_values = [float(entry.get()) for entry in entries["soc"] if entry.get()]
-                ocv_values = [float(entry.get()) for entry in entries["ocv"] if entry.get()]
+                rows = len(entries["soc"])
+                values = entries["values"]
+                if len(values) != rows:
+                    # Rows were added or removed, new rows are dirty already
+                    resized = np.full(rows, np.nan, dtype=PROFILE_DTYPE)
+                    kept = min(rows, len(values))
+                    resized[:kept] = values[:kept]
+                    values = entries["values"] = resized
+                elif not entries["dirty"]:
+                    return
                 
-                # Update the profile data
-                self.temp_profiles[self.current_profile] = {
-                    "soc": soc_values,
-                    "ocv": ocv_values
-                }
+                # Parse only the rows edited since the last save
+                for row in sorted(entries["dirty"]):
+                    if row < rows:
+                        soc_text = entries["soc"][row].get().strip()
+                        ocv_text = entries["ocv"][row].get().strip()
+                        values[row] = (float(soc_text) if soc_text else np.nan,
+                                       float(ocv_text) if ocv_text else np.nan)
+                entries["dirty"].clear()
+                
+                # Update the profile data, leaving out incomplete rows
+                complete = ~(np.isnan(values["soc"]) | np.isnan(values["ocv"]))
+                self.temp_profiles[self.current_profile] = values[complete]
         except ValueError as e:
             messagebox.showerror("Invalid Value", "Please ensure all entries contain valid numbers.")
         except Exception as e:
@@ -1332,82 +1633,82 @@ class BMSMonitorApp:
             messagebox.showerror("Clone Error", f"Error cloning profile: {str(e)}")
 
     def generate_ocv_graph(self):
+        """Schedule a redraw of the OCV graph, coalescing quick successive edits"""
         # Save current profile data first
         self.save_current_profile_data()
         
+        if self.ocv_redraw_job is not None:
+            self.root.after_cancel(self.ocv_redraw_job)
+        self.ocv_redraw_job = self.root.after(self.OCV_REDRAW_MS, self.redraw_ocv_graph)
+    
+    def redraw_ocv_graph(self):
+        """Update the OCV curves in place; lines are only created or removed with profiles"""
+        self.ocv_redraw_job = None
         try:
-            # Clear previous plot
-            self.ax.clear()
-            
             # Determine if we show all curves or just the current one
-            if self.show_all_curves_var.get():
-                # Plot all temperature profiles
-                colors = plt.cm.tab10(np.linspace(0, 1, len(self.temp_profiles)))
-                legend_entries = []
-                
-                for i, (temp, data) in enumerate(self.temp_profiles.items()):
-                    soc_values = data["soc"]
-                    ocv_values = data["ocv"]
-                    
-                    # Sort the data by SOC
-                    soc_ocv_pairs = sorted(zip(soc_values, ocv_values), key=lambda pair: pair[0])
-                    soc_values = [pair[0] for pair in soc_ocv_pairs]
-                    ocv_values = [pair[1] for pair in soc_ocv_pairs]
-                    
-                    # Plot with a unique color
-                    line, = self.ax.plot(soc_values, ocv_values, '-o', 
-                                        linewidth=2, markersize=4, 
-                                        label=temp, color=colors[i])
-                    
-                    # Highlight the current profile with a thicker line
-                    if temp == self.current_profile:
-                        line.set_linewidth(3)
-                        line.set_markersize(6)
-                    
-                    legend_entries.append(line)
-                
-                # Add a legend
-                self.ax.legend(handles=legend_entries, loc='best')
-                
-                # Update the graph info label
-                self.graph_info.config(text="Showing all temperature profiles")
-                
+            show_all = self.show_all_curves_var.get()
+            if show_all:
+                names = list(self.temp_profiles)
             else:
-                # Plot only the current profile
-                data = self.temp_profiles[self.current_profile]
-                soc_values = data["soc"]
-                ocv_values = data["ocv"]
+                names = [self.current_profile] if self.current_profile in self.temp_profiles else []
+            
+            # Create and remove lines only when the plotted profiles change
+            layout_changed = list(self.ocv_lines) != names
+            if layout_changed:
+                for name in [name for name in self.ocv_lines if name not in names]:
+                    self.ocv_lines.pop(name).remove()
+                self.ocv_lines = {name: self.ocv_lines.get(name) or self.ax.plot([], [], '-o')[0]
+                                  for name in names}
+            
+            colors = plt.cm.tab10(np.linspace(0, 1, len(names))) if show_all else None
+            for i, name in enumerate(names):
+                data = self.temp_profiles[name]
+                soc_values = np.asarray(data["soc"], dtype=float)
+                ocv_values = np.asarray(data["ocv"], dtype=float)
                 
                 # Sort the data by SOC
-                soc_ocv_pairs = sorted(zip(soc_values, ocv_values), key=lambda pair: pair[0])
-                soc_values = [pair[0] for pair in soc_ocv_pairs]
-                ocv_values = [pair[1] for pair in soc_ocv_pairs]
-                
-                # Create the plot with a blue line
-                self.ax.plot(soc_values, ocv_values, 'b-o', linewidth=2, markersize=6)
+                order = np.argsort(soc_values, kind="stable")
+                line = self.ocv_lines[name]
+                line.set_data(soc_values[order], ocv_values[order])
+                line.set_label(name)
                 
-                # Update the graph info label
+                if show_all:
+                    # Highlight the current profile with a thicker line
+                    line.set_color(colors[i])
+                    current = name == self.current_profile
+                    line.set_linewidth(3 if current else 2)
+                    line.set_markersize(6 if current else 4)
+                else:
+                    line.set_color('b')
+                    line.set_linewidth(2)
+                    line.set_markersize(6)
+            
+            # The y-axis fits every profile so switching between them keeps the scale
+            ocv_range = self.temp_profiles.ocv_range()
+            limits = (ocv_range[0] * 0.98, ocv_range[1] * 1.02) if ocv_range else (2.8, 4.2)
+            if limits != self.ax.get_ylim():
+                self.ax.set_ylim(*limits)
+            
+            # The legend copies the line styles, so it follows the highlighted profile
+            highlighted = self.current_profile if show_all else None
+            if layout_changed or highlighted != self.ocv_highlighted:
+                legend = self.ax.get_legend()
+                if legend is not None:
+                    legend.remove()
+                if show_all and names:
+                    self.ax.legend(handles=list(self.ocv_lines.values()), loc='best')
+                self.ocv_highlighted = highlighted
+            if layout_changed:
+                self.figure.tight_layout()
+            
+            # Update the graph info label
+            if show_all:
+                self.graph_info.config(text="Showing all temperature profiles")
+            else:
                 self.graph_info.config(text=f"Showing profile: {self.current_profile}")
             
-            # Set graph labels and properties
-            self.ax.set_xlabel('State of Charge (%)')
-            self.ax.set_ylabel('Open Circuit Voltage (V)')
-            self.ax.set_title('OCV vs. SOC Relationship by Temperature')
-            self.ax.grid(True)
-            self.ax.set_xlim(0, 100)
-            
-            # Get all OCV values for y-axis limits
-            all_ocv = []
-            for data in self.temp_profiles.values():
-                all_ocv.extend(data["ocv"])
-            
-            min_v = min(all_ocv) * 0.98 if all_ocv else 2.8
-            max_v = max(all_ocv) * 1.02 if all_ocv else 4.2
-            self.ax.set_ylim(min_v, max_v)
-            
             # Update the canvas
-            self.figure.tight_layout()
-            self.canvas.draw()
+            self.canvas.draw_idle()
             
         except Exception as e:
             messagebox.showerror("Graph Error", f"Error generating graph: {str(e)}")
@@ -1421,37 +1722,26 @@ class BMSMonitorApp:
             # Add a new row for SOC-OCV entry
             if self.current_profile in self.profile_entries:
                 entries = self.profile_entries[self.current_profile]
-                row_count = len(entries["soc"])
                 
-                # Create new entries at the end
-                soc_entry = ttk.Entry(self.ocv_entries_frame, width=10)
-                soc_entry.grid(row=row_count+1, column=0, padx=5, pady=3)
-                
-                ocv_entry = ttk.Entry(self.ocv_entries_frame, width=10)
-                ocv_entry.grid(row=row_count+1, column=1, padx=5, pady=3)
-                
-                # Add to the entries list
-                entries["soc"].append(soc_entry)
-                entries["ocv"].append(ocv_entry)
-                
-                # Update the profile data with placeholder values
+                # Placeholder values from the profile data
                 soc_values = self.temp_profiles[self.current_profile]["soc"]
                 ocv_values = self.temp_profiles[self.current_profile]["ocv"]
                 
                 # Suggest a new SOC value
-                if soc_values:
-                    new_soc = min(100, max(soc_values) + 10)
+                if len(soc_values):
+                    new_soc = min(100, soc_values.max() + 10)
                 else:
                     new_soc = 0
                     
                 # Suggest a new OCV value
-                if ocv_values:
+                if len(ocv_values):
                     new_ocv = ocv_values[-1] + 0.1
                 else:
                     new_ocv = 3.0
-                    
-                soc_entry.insert(0, str(new_soc))
-                ocv_entry.insert(0, str(new_ocv))
+                
+                # Create new entries at the end, to be parsed on the next save
+                row = self.add_ocv_entry_row(entries, f"{new_soc:g}", f"{new_ocv:g}")
+                entries["dirty"].add(row)
                 
         except Exception as e:
             messagebox.showerror("Add Point Error", f"Error adding point: {str(e)}")
@@ -1470,6 +1760,7 @@ class BMSMonitorApp:
                     # Remove the last entry
                     last_soc_entry = entries["soc"].pop()
                     last_ocv_entry = entries["ocv"].pop()
+                    del entries["variables"][-2:]
                     
                     # Destroy the widgets
                     last_soc_entry.destroy()
@@ -1493,19 +1784,15 @@ class BMSMonitorApp:
             
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".json",
-                filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+                filetypes=[("JSON Files", "*.json"), ("NumPy Profile Files", "*.npz"), ("All Files", "*.*")]
             )
             
             if file_path:
-                import json
-                
-                # Create a serializable version of the data
-                export_data = {}
-                for temp, data in self.temp_profiles.items():
-                    export_data[temp] = data
-                
-                with open(file_path, 'w') as file:
-                    json.dump(export_data, file, indent=4)
+                if file_path.lower().endswith('.npz'):
+                    self.temp_profiles.save_npz(file_path)
+                else:
+                    with open(file_path, 'w') as file:
+                        json.dump(self.temp_profiles.to_dict(), file, indent=4)
                     
                 messagebox.showinfo("Export Successful", 
                                 f"Exported {len(self.temp_profiles)} temperature profiles to {file_path}")
@@ -1541,11 +1828,40 @@ class BMSMonitorApp:
         except Exception as e:
             messagebox.showerror("Export Error", f"Error exporting OCV map: {str(e)}")
 
+    def export_firmware_table(self):
+        """Export all profiles as a fixed-point lookup table for the firmware"""
+        try:
+            # Save current profile data
+            self.save_current_profile_data()
+            
+            temperature_step = simpledialog.askfloat("Firmware Table", "Temperature step (°C):",
+                                                     initialvalue=5.0, minvalue=0.1)
+            if temperature_step is None:
+                return
+            table = FirmwareTable(self.temp_profiles, temperature_step=temperature_step)
+            
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".h",
+                initialfile="ocv_table.h",
+                filetypes=[("C Header Files", "*.h"), ("All Files", "*.*")]
+            )
+            
+            if file_path:
+                blob_path = table.save(file_path)
+                rows, columns = table.raw.shape
+                messagebox.showinfo("Export Successful",
+                                f"Exported a {rows} x {columns} table to {file_path} and {blob_path}\n\n"
+                                f"Maximum error per profile:\n" + "\n".join(table.report()))
+                    
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting firmware table: {str(e)}")
+
     def import_ocv_maps(self):
         """Import temperature profiles from a JSON file"""
         try:
             file_path = filedialog.askopenfilename(
-                filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv"), ("All Files", "*.*")]
+                filetypes=[("JSON Files", "*.json"), ("NumPy Profile Files", "*.npz"), ("CSV Files", "*.csv"),
+                           ("All Files", "*.*")]
             )
             
             if not file_path:
@@ -1554,10 +1870,12 @@ class BMSMonitorApp:
             # Check file extension
             if file_path.lower().endswith('.json'):
                 self.import_json_profiles(file_path)
+            elif file_path.lower().endswith('.npz'):
+                self.import_profiles(load_npz(file_path), file_path)
             elif file_path.lower().endswith('.csv'):
                 self.import_csv_profile(file_path)
             else:
-                messagebox.showerror("Import Error", "Unsupported file format. Please use JSON or CSV files.")
+                messagebox.showerror("Import Error", "Unsupported file format. Please use JSON, NPZ or CSV files.")
                 
         except Exception as e:
             messagebox.showerror("Import Error", f"Error importing OCV maps: {str(e)}")
@@ -1570,6 +1888,14 @@ class BMSMonitorApp:
             with open(file_path, 'r') as file:
                 imported_data = json.load(file)
             
+            self.import_profiles(imported_data, file_path)
+                    
+        except Exception as e:
+            messagebox.showerror("JSON Import Error", f"Error importing profiles: {str(e)}")
+
+    def import_profiles(self, imported_data, file_path):
+        """Add profiles read from a file, replacing or merging with the existing ones"""
+        try:
             if not imported_data:
                 messagebox.showerror("Import Error", "No valid data found in the file.")
                 return
@@ -1594,8 +1920,10 @@ class BMSMonitorApp:
             
             # Import the profiles
             for temp, data in imported_data.items():
+                if temp not in self.temp_profiles:
+                    self.profile_listbox.insert(tk.END, temp)
                 self.temp_profiles[temp] = data
-                self.profile_listbox.insert(tk.END, temp)
+                self.profile_entries.pop(temp, None)
             
             # Select the first profile if none are selected
             if not self.profile_listbox.curselection() and self.profile_listbox.size() > 0:
@@ -1613,7 +1941,7 @@ class BMSMonitorApp:
                             f"Imported {len(imported_data)} temperature profiles from {file_path}")
                     
         except Exception as e:
-            messagebox.showerror("JSON Import Error", f"Error importing profiles: {str(e)}")
+            messagebox.showerror("Import Error", f"Error importing profiles: {str(e)}")
 
     def import_csv_profile(self, file_path):
         """Import a single temperature profile from a CSV file"""
@@ -1663,83 +1991,268 @@ class BMSMonitorApp:
                 messagebox.showerror("Import Error", "No valid SOC-OCV data found in the CSV file.")
                 return
                 
-            # Check if profile already exists
-            if temp_name in self.temp_profiles:
-                replace = messagebox.askyesno("Profile Exists", 
-                                            f"A profile named '{temp_name}' already exists. Replace it?")
-                if not replace:
-                    temp_name = simpledialog.askstring("New Profile Name", 
-                                                    "Enter a new name for the imported profile:")
-                    if not temp_name or temp_name in self.temp_profiles:
-                        return
-            
-            # Add the new profile
-            self.temp_profiles[temp_name] = {
-                "soc": soc_values,
-                "ocv": ocv_values
-            }
-            
-            # Add to listbox if not already present
-            if temp_name not in [self.profile_listbox.get(i) for i in range(self.profile_listbox.size())]:
-                self.profile_listbox.insert(tk.END, temp_name)
-            
-            # Select the new profile
-            for i in range(self.profile_listbox.size()):
-                if self.profile_listbox.get(i) == temp_name:
-                    self.profile_listbox.select_clear(0, tk.END)
-                    self.profile_listbox.select_set(i)
-                    self.current_profile = temp_name
-                    break
-            
-            # Create entries for the new profile
-            self.create_profile_entries(temp_name)
-            
-            # Update the graph
-            self.generate_ocv_graph()
-            
-            messagebox.showinfo("Import Successful", 
-                            f"Imported profile '{temp_name}' from {file_path}")
+            temp_name = self.add_imported_profile(temp_name, soc_values, ocv_values)
+            if temp_name:
+                messagebox.showinfo("Import Successful", 
+                                f"Imported profile '{temp_name}' from {file_path}")
                     
         except Exception as e:
             messagebox.showerror("CSV Import Error", f"Error importing profile: {str(e)}")
     
-    def refresh_data(self):
-        # In a real application, this would fetch data from your BMS
-        # For demo purposes, we'll generate random data
-        
-        # Update voltage values
-        for entry in self.voltage_entries:
-            entry.config(state='normal')
-            voltage = random.uniform(3.1, 4.1)
-            entry.delete(0, tk.END)
-            entry.insert(0, f"{voltage:.3f}V")
-            
-            # Color based on voltage level (visual indication)
-            if voltage > 4.0:
-                entry.config(bg="#ffcccc")  # Light red for high voltage
-            elif voltage < 3.3:
-                entry.config(bg="#ffffcc")  # Light yellow for low voltage
-            else:
-                entry.config(bg="#e6ffe6")  # Light green for normal
-                
-            entry.config(state='readonly')
-        
-        # Update temperature values
-        for entry in self.temp_entries:
-            entry.config(state='normal')
-            temp = random.uniform(15, 45)
-            entry.delete(0, tk.END)
-            entry.insert(0, f"{temp:.1f}°C")
-            
-            # Color based on temperature level
-            if temp > 40:
-                entry.config(bg="#ffcccc")  # Light red for high temp
-            elif temp < 20:
-                entry.config(bg="#ccccff")  # Light blue for low temp
-            else:
-                entry.config(bg="#e6ffe6")  # Light green for normal
-                
-            entry.config(state='readonly')
+    def profile_at_temperature(self, temp_name):
+        """Another profile with the temperature of this name, or None"""
+        try:
+            temperature = parse_temperature(temp_name)
+        except ValueError:
+            return None
+        for name in self.temp_profiles:
+            if name == temp_name:
+                continue
+            try:
+                if parse_temperature(name) == temperature:
+                    return name
+            except ValueError:
+                continue
+        return None
+    
+    def add_imported_profile(self, temp_name, soc_values, ocv_values):
+        """Add an imported profile and select it; returns the name used, or None if cancelled"""
+        # Check if profile already exists
+        if temp_name in self.temp_profiles:
+            replace = messagebox.askyesno("Profile Exists", 
+                                        f"A profile named '{temp_name}' already exists. Replace it?")
+            if not replace:
+                temp_name = simpledialog.askstring("New Profile Name", 
+                                                "Enter a new name for the imported profile:")
+                if not temp_name or temp_name in self.temp_profiles:
+                    return None
+        
+        # The lookup and the firmware table take one profile per temperature
+        other = self.profile_at_temperature(temp_name)
+        if other is not None:
+            replace = messagebox.askyesno("Same Temperature",
+                                        f"'{other}' is a profile at the same temperature as '{temp_name}'. "
+                                        f"Replace it?")
+            if not replace:
+                return None
+            del self.temp_profiles[other]
+            self.profile_entries.pop(other, None)
+            names = list(self.profile_listbox.get(0, tk.END))
+            self.profile_listbox.delete(names.index(other))
+        
+        # Add the new profile
+        self.temp_profiles[temp_name] = {
+            "soc": soc_values,
+            "ocv": ocv_values
+        }
+        
+        # Add to listbox if not already present
+        if temp_name not in [self.profile_listbox.get(i) for i in range(self.profile_listbox.size())]:
+            self.profile_listbox.insert(tk.END, temp_name)
+        
+        # Select the new profile
+        for i in range(self.profile_listbox.size()):
+            if self.profile_listbox.get(i) == temp_name:
+                self.profile_listbox.select_clear(0, tk.END)
+                self.profile_listbox.select_set(i)
+                self.current_profile = temp_name
+                break
+        
+        # Create entries for the new profile
+        self.create_profile_entries(temp_name)
+        
+        # Update the graph
+        self.generate_ocv_graph()
+        return temp_name
+    
+    def import_cycler_ocv(self):
+        """Build a temperature profile from a raw cycler export, like ocv_mapping.m"""
+        if self.ocv_extraction is not None and self.ocv_extraction.is_alive():
+            messagebox.showinfo("Cycler Import", "Cycler data is already being read.")
+            return
+        
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")]
+        )
+        
+        if file_path:
+            try:
+                # Multi-gigabyte exports are read in the background
+                self.ocv_extraction = OCVExtraction(file_path)
+                self.ocv_extraction.start()
+                self.poll_ocv_extraction()
+            except Exception as e:
+                messagebox.showerror("Cycler Import Error", f"Error reading cycler data: {str(e)}")
+    
+    def poll_ocv_extraction(self):
+        """Show the cycler import progress and add the profile once it is done"""
+        extraction = self.ocv_extraction
+        if extraction.is_alive():
+            percent = 100.0 * extraction.bytes_read / extraction.size if extraction.size else 0.0
+            self.graph_info.config(text=f"Reading cycler data: {percent:.0f}%")
+            self.root.after(200, self.poll_ocv_extraction)
+            return
+        
+        self.ocv_extraction = None
+        self.graph_info.config(text="")
+        try:
+            if extraction.error is not None:
+                raise extraction.error
+            bins = extraction.result
+            if not bins.count.any():
+                messagebox.showerror("Cycler Import Error", 
+                                   "No rows after the first cycle with current in step 2 or 4 were found.")
+                return
+            
+            temp_name = simpledialog.askstring("Temperature Profile", 
+                                             "Enter name for the temperature profile:",
+                                             initialvalue=f"{bins.temperature:.0f}°C" if bins.temperature is not None else "")
+            if not temp_name:
+                return
+            profile = bins.profile()
+            temp_name = self.add_imported_profile(temp_name, profile["soc"], profile["ocv"])
+            if temp_name:
+                empty = bins.points - len(profile["soc"])
+                messagebox.showinfo("Import Successful", 
+                                f"Imported profile '{temp_name}' from {bins.rows} rows of {extraction.file_path}"
+                                + (f"\n{empty} SOC values had no data and were left out" if empty else ""))
+        except Exception as e:
+            messagebox.showerror("Cycler Import Error", f"Error reading cycler data: {str(e)}")
+    
+    def fit_cell_models(self):
+        """Fit the hysteresis cell model of model.m to cycler exports, one process per file"""
+        if self.model_fits is not None:
+            messagebox.showinfo("Cell Model", "Cell models are already being fitted.")
+            return
+        
+        file_paths = filedialog.askopenfilenames(
+            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")]
+        )
+        
+        if file_paths:
+            try:
+                if self.model_executor is None:
+                    self.model_executor = ProcessPoolExecutor()
+                self.model_fits = submit_cycler_files(self.model_executor, file_paths)
+                self.poll_model_fits()
+            except Exception as e:
+                self.model_fits = None
+                messagebox.showerror("Cell Model Error", f"Error fitting cell models: {str(e)}")
+    
+    def poll_model_fits(self):
+        """Show the fitting progress and add the model OCV curves once all are done"""
+        done = sum(future.done() for future in self.model_fits)
+        if done < len(self.model_fits):
+            self.graph_info.config(text=f"Fitting cell models: {done}/{len(self.model_fits)}")
+            self.root.after(200, self.poll_model_fits)
+            return
+        
+        futures = self.model_fits
+        self.model_fits = None
+        self.graph_info.config(text="")
+        lines = []
+        for future in futures:
+            try:
+                model = future.result()
+            except Exception as e:
+                lines.append(f"Failed: {str(e)}")
+                continue
+            if model.temperature is None:
+                lines.append(f"Not added, no T1 temperature in the data: {model.summary()}")
+                continue
+            profile = model.profile()
+            temp_name = f"{model.temperature:.0f}°C {model.name} model"
+            try:
+                check_profile(temp_name, profile["soc"], profile["ocv"])
+            except ValueError as e:
+                lines.append(f"Not added: {str(e)}")
+                continue
+            temp_name = self.add_imported_profile(temp_name, profile["soc"], profile["ocv"])
+            if temp_name:
+                lines.append(model.summary())
+        messagebox.showinfo("Cell Model", "\n\n".join(lines))
+    
+    def refresh_data(self, frame=None):
+        """Draw an acquired frame, or sample the data source directly when none is given"""
+        if frame is None:
+            voltages, temperatures, current = self.acquisition.source()
+            frame = BMSFrame(-1, time.time(), voltages, temperatures, current)
+        
+        # Only cells whose text or alarm color changed are redrawn
+        self.voltage_grid.update_values(frame.voltages)
+        self.temp_grid.update_values(frame.temperatures)
+        
+        # Update the summary parameters and publish them for transmission
+        stats = self.pack_stats.update(frame)
+        cell_soc = self.soc_engine.soc
+        if cell_soc is not None and len(cell_soc):
+            stats["SOC"] = float(np.clip(cell_soc.mean(), 0.0, 100.0))
+        self.live_values.update(frame, stats)
+        if "Highest_Cell_V" in stats:
+            soc_text = f" SOC {stats['SOC']:.1f}%" if "SOC" in stats else ""
+            self.voltage_summary.config(
+                text=f"Highest: {stats['Highest_Cell_V']:.3f}V (Cell {stats['High_Cell_ID']})   "
+                     f"Lowest: {stats['Lowest_Cell_V']:.3f}V (Cell {stats['Low_Cell_ID']})   "
+                     f"Delta: {stats['Delta_Cell_V'] * 1000:.1f}mV   "
+                     f"Average: {stats['Avg_Cell_V']:.3f}V   "
+                     f"Pack: {stats['Voltage']:.1f}V {stats['Current']:.1f}A{soc_text}")
+        if "High_Temp" in stats:
+            self.temp_summary.config(
+                text=f"Highest: {stats['High_Temp']:.1f}°C (Temp {stats['High_Temp_ID']})   "
+                     f"Lowest: {stats['Low_Temp']:.1f}°C (Temp {stats['Low_Temp_ID']})   "
+                     f"Average: {stats['Avg_Temp']:.1f}°C")
+    
+    def poll_acquisition(self):
+        """Drain the acquisition queue and draw only the newest frame"""
+        frames = self.acquisition.drain()
+        
+        # Every frame is kept in the history and counted into the SOC, even the ones not drawn
+        for frame in frames:
+            self.history.append(frame)
+            self.soc_engine.update(frame.timestamp, frame.current / self.pack_stats.cells_parallel,
+                                   frame.voltages)
+        
+        if frames:
+            # Frames that arrived faster than we can draw are coalesced
+            self.frames_coalesced += len(frames) - 1
+            self.frames_drawn += 1
+            self.refresh_data(frames[-1])
+            
+            # The trend plot is only drawn while it is visible
+            if self.notebook.select() == str(self.trends_tab):
+                self.trend_plot.update(self.history)
+            
+            dropped = self.frames_coalesced + self.acquisition.dropped
+            self.acquisition_status.config(
+                text=f"Frame {frames[-1].sequence} | Drawn: {self.frames_drawn} | Dropped: {dropped}")
+        
+        self.poll_job = self.root.after(self.UI_POLL_MS, self.poll_acquisition)
+    
+    def get_update_rate(self):
+        """Read the update rate from the configuration tab, in milliseconds"""
+        try:
+            rate = int(self.update_rate_entry.get())
+            return rate if rate > 0 else 500
+        except ValueError:
+            return 500
+    
+    def get_history_length(self):
+        """Read the number of samples kept in the history buffers"""
+        try:
+            length = int(self.history_length_entry.get())
+            return length if length > 0 else 14400
+        except ValueError:
+            return 14400
+    
+    def on_close(self):
+        self.root.after_cancel(self.poll_job)
+        if self.ocv_extraction is not None:
+            self.ocv_extraction.stop()
+        if self.model_executor is not None:
+            self.model_executor.shutdown(wait=False, cancel_futures=True)
+        self.acquisition.stop()
+        self.disconnect_can_bus()
+        self.root.destroy()
     
     def save_config(self):
         # In a real application, this would save to the BMS
@@ -1760,9 +2273,22 @@ class BMSMonitorApp:
             "balance_start": self.balance_start_entry.get(),
             "balance_enabled": self.balance_enable_var.get(),
             "can_id": self.can_id_entry.get(),
-            "update_rate": self.update_rate_entry.get()
+            "update_rate": self.update_rate_entry.get(),
+            "history_length": self.history_length_entry.get()
         }
         
+        # Apply the new sampling rate to the acquisition thread
+        try:
+            self.acquisition.set_period(int(self.update_rate_entry.get()))
+        except ValueError:
+            messagebox.showerror("Input Error", "Update rate must be a positive whole number of milliseconds.")
+            return
+        
+        # Reallocate the history buffers if their length changed
+        history_length = self.get_history_length()
+        if history_length != self.history.max_samples:
+            self.history = PackHistory(self.voltage_grid.count, self.temp_grid.count, max_samples=history_length)
+        
         print("Saved configuration:")
         for key, value in config.items():
             print(f"  {key}: {value}")
@@ -1771,6 +2297,342 @@ class BMSMonitorApp:
         messagebox.showinfo("Configuration Saved", 
                          "BMS configuration has been updated successfully.")
 
+class CellGridView:
+    """Heatmap of cell values drawn on a single canvas.
+    
+    Cells are grouped by slave with a header row above each group. Only the
+    rows scrolled into view are materialized; every visible cell owns one
+    rectangle and one text item, and update_values only touches the items
+    whose displayed value or alarm color changed since the previous frame.
+    """
+    def __init__(self, parent, label, value_format, decimals=3, thresholds=(0, 0),
+                 colors=("white", "white", "white"), columns=14,
+                 cell_width=78, cell_height=40, padding=5, header_height=24):
+        self.label = label
+        self.value_format = value_format
+        self.decimals = decimals
+        self.thresholds = thresholds  # (low, high) alarm limits
+        self.colors = colors  # (low, normal, high) fill colors
+        self.columns = columns
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.padding = padding
+        self.header_height = header_height
+        
+        # Create the canvas with a vertical scrollbar
+        self.canvas = tk.Canvas(parent, background="white", highlightthickness=0,
+                                yscrollincrement=cell_height + padding)
+        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Materialize newly exposed rows on resize and mouse wheel scrolling
+        self.canvas.bind("<Configure>", lambda e: self.render_visible())
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        
+        self.set_layout(0, 1)
+    
+    def set_layout(self, count, group_size):
+        """Size the grid for count cells, grouped by group_size cells per slave"""
+        self.canvas.delete("all")
+        self.count = count
+        self.group_size = max(1, group_size)
+        
+        # Row table: (slave, first_cell, end_cell), header rows have no cells
+        self.rows = []
+        self.row_tops = []
+        y = self.padding
+        for group_start in range(0, count, self.group_size):
+            slave = group_start // self.group_size
+            group_end = min(group_start + self.group_size, count)
+            
+            self.rows.append((slave, None, None))
+            self.row_tops.append(y)
+            y += self.header_height
+            
+            for row_start in range(group_start, group_end, self.columns):
+                self.rows.append((slave, row_start, min(row_start + self.columns, group_end)))
+                self.row_tops.append(y)
+                y += self.cell_height + self.padding
+        
+        # Latest values for every cell, and what is currently drawn
+        self.values = np.full(count, np.nan)
+        self.color_idx = np.ones(count, dtype=np.int8)
+        self.drawn_values = np.full(count, np.nan)
+        self.drawn_colors = np.full(count, -1, dtype=np.int8)
+        
+        # Canvas items of the materialized rows only
+        self.row_items = {}
+        self.cell_items = {}
+        self.visible_cells = np.empty(0, dtype=np.intp)
+        
+        # Configure scrolling
+        width = self.columns * (self.cell_width + self.padding) + self.padding
+        self.canvas.config(scrollregion=(0, 0, width, y))
+        self.canvas.yview_moveto(0)
+        self.render_visible()
+    
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.render_visible()
+    
+    def render_visible(self):
+        """Create the items for rows in view and delete those scrolled out"""
+        if not self.rows:
+            return
+        
+        # Visible row range, with one spare row on each side
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first = max(0, bisect.bisect_right(self.row_tops, top) - 2)
+        last = min(len(self.rows), bisect.bisect_right(self.row_tops, bottom) + 1)
+        
+        stale_rows = [row for row in self.row_items if row < first or row >= last]
+        new_rows = [row for row in range(first, last) if row not in self.row_items]
+        if not stale_rows and not new_rows:
+            return
+        
+        for row in stale_rows:
+            self.release_row(row)
+        for row in new_rows:
+            self.materialize_row(row)
+        
+        self.visible_cells = np.fromiter(self.cell_items, dtype=np.intp, count=len(self.cell_items))
+    
+    def materialize_row(self, row):
+        slave, start, end = self.rows[row]
+        y0 = self.row_tops[row]
+        
+        if start is None:
+            # Slave header
+            header_id = self.canvas.create_text(self.padding, y0 + self.header_height / 2,
+                                                text=f"Slave {slave + 1}", anchor=tk.W,
+                                                font=("", 10, "bold"))
+            self.row_items[row] = [header_id]
+            return
+        
+        items = []
+        for i in range(start, end):
+            x0 = self.padding + (i - start) * (self.cell_width + self.padding)
+            color = self.color_idx[i]
+            
+            rect_id = self.canvas.create_rectangle(x0, y0, x0 + self.cell_width, y0 + self.cell_height,
+                                                   fill=self.colors[color], outline="#999999")
+            text_id = self.canvas.create_text(x0 + self.cell_width / 2, y0 + self.cell_height / 2,
+                                              text=self.cell_text(i), justify=tk.CENTER)
+            self.cell_items[i] = (rect_id, text_id)
+            self.drawn_values[i] = self.values[i]
+            self.drawn_colors[i] = color
+            items.extend((rect_id, text_id))
+        self.row_items[row] = items
+    
+    def release_row(self, row):
+        for item_id in self.row_items.pop(row):
+            self.canvas.delete(item_id)
+        
+        slave, start, end = self.rows[row]
+        if start is not None:
+            for i in range(start, end):
+                del self.cell_items[i]
+    
+    def cell_text(self, i):
+        value = self.values[i]
+        text = "--" if np.isnan(value) else self.value_format.format(value)
+        return f"{self.label} {i+1}\n{text}"
+    
+    def update_values(self, values):
+        """Store a new frame and redraw the visible cells that changed"""
+        values = np.round(np.asarray(values, dtype=float)[:self.count], self.decimals)
+        n = len(values)
+        self.values[:n] = values
+        
+        # Classify every value at once: 0 = low, 1 = normal, 2 = high
+        low, high = self.thresholds
+        color_idx = self.color_idx[:n]
+        color_idx.fill(1)
+        color_idx[values < low] = 0
+        color_idx[values > high] = 2
+        
+        # Only materialized cells are compared and drawn
+        cells = self.visible_cells
+        new_values = self.values[cells]
+        old_values = self.drawn_values[cells]
+        same_value = (new_values == old_values) | (np.isnan(new_values) & np.isnan(old_values))
+        changed = cells[~same_value | (self.color_idx[cells] != self.drawn_colors[cells])]
+        
+        for i in changed:
+            rect_id, text_id = self.cell_items[i]
+            self.canvas.itemconfigure(text_id, text=self.cell_text(i))
+            if self.color_idx[i] != self.drawn_colors[i]:
+                self.canvas.itemconfigure(rect_id, fill=self.colors[self.color_idx[i]])
+            self.drawn_values[i] = self.values[i]
+            self.drawn_colors[i] = self.color_idx[i]
+        
+        return len(changed)
+
+class TrendPlot:
+    """Scrolling trend of selected cells, voltage envelopes and pack current.
+    
+    All traces are animated artists that are updated with set_data and
+    blitted over a cached background. The full figure is only redrawn when
+    the settings, the axis limits or the window size change.
+    """
+    def __init__(self, parent):
+        # Trend settings
+        control_frame = ttk.Frame(parent)
+        control_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(control_frame, text="Cells (e.g. 1-8,12):").pack(side=tk.LEFT, padx=5)
+        self.cells_entry = ttk.Entry(control_frame, width=20)
+        self.cells_entry.pack(side=tk.LEFT, padx=5)
+        self.cells_entry.insert(0, "1-16")
+        
+        ttk.Label(control_frame, text="Window (s):").pack(side=tk.LEFT, padx=5)
+        self.window_entry = ttk.Entry(control_frame, width=8)
+        self.window_entry.pack(side=tk.LEFT, padx=5)
+        self.window_entry.insert(0, "60")
+        
+        ttk.Button(control_frame, text="Apply", command=self.apply_settings).pack(side=tk.LEFT, padx=5)
+        
+        self.fps_label = ttk.Label(control_frame, text="")
+        self.fps_label.pack(side=tk.RIGHT, padx=5)
+        
+        # Create graph area
+        self.figure, (self.voltage_ax, self.current_ax) = plt.subplots(
+            2, 1, sharex=True, figsize=(8, 5), gridspec_kw={"height_ratios": [3, 1]})
+        self.canvas = FigureCanvasTkAgg(self.figure, parent)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        # Re-cache the background whenever the full figure is drawn
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        
+        self.cells = []
+        self.cell_lines = []
+        self.envelope_lines = []
+        self.current_line = None
+        self.last_update = None
+        self.apply_settings()
+    
+    def apply_settings(self):
+        """Parse the settings and rebuild the traces"""
+        try:
+            cells = self.parse_cells(self.cells_entry.get())
+            window = float(self.window_entry.get())
+            if window <= 0:
+                raise ValueError("Window must be positive")
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter cell numbers like 1-8,12 and a positive window.")
+            return
+        
+        self.cells = cells
+        self.window = window
+        
+        for ax in (self.voltage_ax, self.current_ax):
+            ax.clear()
+        
+        # Traces for the selected cells
+        self.cell_lines = [self.voltage_ax.plot([], [], linewidth=1, label=f"Cell {cell + 1}", animated=True)[0]
+                           for cell in cells]
+        
+        # Min/max/avg envelopes over all cells
+        self.envelope_lines = [
+            self.voltage_ax.plot([], [], 'r--', linewidth=1.5, label="Max", animated=True)[0],
+            self.voltage_ax.plot([], [], 'b--', linewidth=1.5, label="Min", animated=True)[0],
+            self.voltage_ax.plot([], [], 'k-', linewidth=1.5, label="Avg", animated=True)[0],
+        ]
+        self.current_line = self.current_ax.plot([], [], 'g-', linewidth=1.5, animated=True)[0]
+        
+        # Set graph labels and properties
+        self.voltage_ax.set_ylabel('Cell Voltage (V)')
+        self.voltage_ax.set_ylim(3.0, 4.2)
+        self.voltage_ax.grid(True)
+        self.voltage_ax.legend(loc='upper left', ncol=6, fontsize='small')
+        
+        self.current_ax.set_xlabel('Time (s)')
+        self.current_ax.set_ylabel('Current (A)')
+        self.current_ax.set_ylim(-50, 50)
+        self.current_ax.set_xlim(-self.window, 0)
+        self.current_ax.grid(True)
+        
+        self.figure.tight_layout()
+        self.canvas.draw()
+    
+    @staticmethod
+    def parse_cells(text):
+        """Parse a selection like "1-8,12" into zero-based cell indices"""
+        cells = []
+        for part in text.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition("-")
+            start = int(start)
+            end = int(end) if end else start
+            if start < 1 or end < start:
+                raise ValueError(f"Invalid cell range: {part}")
+            cells.extend(range(start - 1, end))
+        return cells
+    
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_traces()
+    
+    def draw_traces(self):
+        for line in self.cell_lines + self.envelope_lines:
+            self.voltage_ax.draw_artist(line)
+        self.current_ax.draw_artist(self.current_line)
+    
+    def update(self, history):
+        """Show the latest window of the history"""
+        if not len(history) or self.background is None:
+            return
+        
+        # Time relative to the newest sample keeps the x limits fixed
+        latest = history.timestamps.view()[0][-1]
+        timestamps, voltages, _, current = history.window(latest - self.window)
+        if voltages.shape[0] == 0 or voltages.shape[1] == 0:
+            return  # No cells configured, or nothing inside the window
+        x = timestamps - latest
+        
+        for line, cell in zip(self.cell_lines, self.cells):
+            if cell < voltages.shape[0]:
+                line.set_data(x, voltages[cell])
+        
+        v_max = voltages.max(axis=0)
+        v_min = voltages.min(axis=0)
+        self.envelope_lines[0].set_data(x, v_max)
+        self.envelope_lines[1].set_data(x, v_min)
+        self.envelope_lines[2].set_data(x, voltages.mean(axis=0))
+        self.current_line.set_data(x, current)
+        
+        # Fall back to a full redraw only when the data leaves the axes
+        if (self.expand_limits(self.voltage_ax, v_min.min(), v_max.max(), 0.05) |
+                self.expand_limits(self.current_ax, current.min(), current.max(), 5)):
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_traces()
+            self.canvas.blit(self.figure.bbox)
+        
+        # Report the achieved frame rate
+        now = time.perf_counter()
+        if self.last_update is not None and now > self.last_update:
+            self.fps_label.config(text=f"{1.0 / (now - self.last_update):.1f} fps")
+        self.last_update = now
+    
+    @staticmethod
+    def expand_limits(ax, low, high, margin):
+        """Widen the y limits to fit low..high, returns True if they changed"""
+        bottom, top = ax.get_ylim()
+        if not np.isfinite(low) or not np.isfinite(high) or (low >= bottom and high <= top):
+            return False
+        ax.set_ylim(min(bottom, low - margin), max(top, high + margin))
+        return True
+
 class CustomParameterDialog:
     def __init__(self, parent, existing_params):
         self.result = None
@@ -1798,9 +2660,15 @@ class CustomParameterDialog:
         ttk.Label(self.dialog, text="Data Type:").grid(row=2, column=0, padx=10, pady=5, sticky=tk.W)
         self.type_var = tk.StringVar(value="uint8")
         type_combo = ttk.Combobox(self.dialog, textvariable=self.type_var, 
-                                 values=["uint8", "int8", "uint16", "int16"], width=10)
+                                 values=["uint8", "int8", "uint16", "int16", "uint32", "int32"], width=10)
         type_combo.grid(row=2, column=1, padx=10, pady=5, sticky=tk.W)
         
+        # Byte order of multi-byte types
+        self.byteorder_var = tk.StringVar(value="little")
+        byteorder_combo = ttk.Combobox(self.dialog, textvariable=self.byteorder_var,
+                                       values=["little", "big"], width=8, state="readonly")
+        byteorder_combo.grid(row=2, column=2, padx=10, pady=5, sticky=tk.W)
+        
         # Unit
         ttk.Label(self.dialog, text="Unit:").grid(row=3, column=0, padx=10, pady=5, sticky=tk.W)
         self.unit_entry = ttk.Entry(self.dialog, width=10)
@@ -1834,6 +2702,7 @@ class CustomParameterDialog:
         param_name = self.name_entry.get().strip()
         description = self.desc_entry.get().strip()
         param_type = self.type_var.get()
+        byteorder = self.byteorder_var.get()
         unit = self.unit_entry.get().strip()
         scale = self.scale_entry.get().strip()
         
@@ -1859,7 +2728,7 @@ class CustomParameterDialog:
             return
         
         # Store the result
-        self.result = (param_name, description, param_type, unit, scale)
+        self.result = (param_name, description, param_type, unit, scale, byteorder)
         
         # Close the dialog
         self.dialog.destroy()
@@ -0,0 +1,113 @@
+import numpy as np
+
+from can_codec import SignalDefinition, TYPE_SIZES, scale_factor, to_raw_array, type_range
+from can_messages import CANMessage
+
+MUX_GROUPS_PER_ID = 256  # The multiplexor is one byte
+
+
+class MultiplexedFrames:
+    """Carries many same-typed values, e.g. Cell_1..Cell_N, in multiplexed frames.
+
+    Byte 0 of each frame is the mux index and the rest holds as many values
+    as fit, three 16-bit or seven 8-bit values. The DLC is cut to the bytes
+    actually used. One CAN ID carries up to 256 groups, larger packs
+    continue on the following IDs.
+
+    Every ID sends its groups round-robin. Each ID gets the longest whole
+    period in ms that still sends all of its own groups within refresh_ms,
+    so a partly filled last ID is not sent faster than it needs. encode_all() and
+    decode_all() convert a whole pack or a whole capture at once.
+    """
+    def __init__(self, prefix, count, param_type="uint16", scale=0.0001, offset=0, first_id=0x700,
+                 refresh_ms=1000, extended=False):
+        if param_type not in TYPE_SIZES:
+            raise ValueError(f"Unsupported parameter type '{param_type}' for multiplexed frames")
+        self.prefix = prefix
+        self.count = count
+        self.param_type = param_type
+        self.scale = scale
+        self.factor = scale_factor(scale)
+        self.offset = offset
+        self.first_id = first_id
+        self.extended = extended
+
+        self.size = TYPE_SIZES[param_type]
+        self.per_frame = 7 // self.size
+        self.dlc = 1 + self.per_frame * self.size
+        self.low, self.high = type_range(param_type)
+        self.groups = -(-count // self.per_frame)
+        self.num_ids = -(-self.groups // MUX_GROUPS_PER_ID)
+        self.dtype = np.dtype(("<" if self.size > 1 else "") + ("u" if self.low == 0 else "i") + str(self.size))
+
+        self.id_groups = [min(self.groups - id_index * MUX_GROUPS_PER_ID, MUX_GROUPS_PER_ID)
+                          for id_index in range(self.num_ids)]
+        self.periods_ms = [refresh_ms // groups for groups in self.id_groups]
+        if self.periods_ms and min(self.periods_ms) < 1:
+            raise ValueError(f"{max(self.id_groups)} frames on one ID cannot be refreshed every {refresh_ms}ms")
+        max_id = 0x1FFFFFFF if extended else 0x7FF
+        if first_id + self.num_ids - 1 > max_id:
+            raise ValueError(f"Multiplexed frames need IDs up to 0x{first_id + self.num_ids - 1:X}")
+
+    @property
+    def refresh_ms(self):
+        """Achieved time to send every group once, set by the slowest ID"""
+        return max((period * groups for period, groups in zip(self.periods_ms, self.id_groups)), default=0)
+
+    def value_name(self, index):
+        return f"{self.prefix}_{index + 1}"  # Values are numbered from 1
+
+    def messages(self):
+        """Message definitions with one multiplexed signal group per mux index"""
+        messages = []
+        for id_index in range(self.num_ids):
+            name = f"{self.prefix}_Mux_{id_index + 1}"
+            signals = [SignalDefinition(f"{name}_Index", 0, 8, multiplex="M")]
+            first_group = id_index * MUX_GROUPS_PER_ID
+            for group in range(first_group, min(first_group + MUX_GROUPS_PER_ID, self.groups)):
+                for slot in range(self.per_frame):
+                    index = group * self.per_frame + slot
+                    if index >= self.count:
+                        break
+                    signals.append(SignalDefinition(self.value_name(index), 8 + 8 * self.size * slot, 8 * self.size,
+                                                    self.low < 0, "little", self.scale, self.offset,
+                                                    multiplex=group - first_group))
+            messages.append(CANMessage(self.first_id + id_index, name, self.dlc, self.extended,
+                                       period_ms=self.periods_ms[id_index], signals=signals))
+        return messages
+
+    def encode_all(self, values):
+        """Payloads of every group for a whole pack, an (groups x dlc) uint8 array in send order"""
+        values = np.asarray(values, dtype=float)[:self.count]
+        raw = np.zeros(self.groups * self.per_frame, dtype=np.int64)
+        raw[:len(values)] = to_raw_array(values, self.factor, self.offset, self.low, self.high)
+
+        payloads = np.zeros((self.groups, self.dlc), dtype=np.uint8)
+        payloads[:, 0] = np.arange(self.groups) % MUX_GROUPS_PER_ID
+        payloads[:, 1:] = raw.astype(self.dtype).view(np.uint8).reshape(self.groups, -1)
+        return payloads
+
+    def can_ids(self):
+        """CAN ID of every row of encode_all()"""
+        return self.first_id + np.arange(self.groups) // MUX_GROUPS_PER_ID
+
+    def decode_all(self, can_ids, payloads, out=None):
+        """Scatter received frames into an array of all values.
+
+        can_ids and payloads are the IDs and (N x dlc) payloads of captured
+        frames. Values not received keep their previous content in out, or
+        NaN in a new array. Later frames overwrite earlier ones.
+        """
+        if out is None:
+            out = np.full(self.count, np.nan)
+        payloads = np.asarray(payloads, dtype=np.uint8)
+        id_index = np.asarray(can_ids, dtype=np.int64) - self.first_id
+        keep = (id_index >= 0) & (id_index < self.num_ids) & (payloads.shape[1] >= self.dlc)
+        payloads = payloads[keep, :self.dlc]
+        groups = id_index[keep] * MUX_GROUPS_PER_ID + payloads[:, 0]
+
+        raw = np.ascontiguousarray(payloads[:, 1:]).view(self.dtype)
+        indexes = groups[:, None] * self.per_frame + np.arange(self.per_frame)
+        valid = indexes < self.count
+        out[indexes[valid]] = raw[valid] / self.factor + self.offset
+        return out
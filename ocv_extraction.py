@@ -0,0 +1,128 @@
+import os
+import threading
+
+import numpy as np
+
+from cycler_data import read_cycler_chunks
+
+OCV_COLUMNS = ("Voltage", "Current", "T1", "SOC_DOD", "StepIndex", "CycleIndex")
+OCV_STEPS = (2, 4)  # Charge and discharge steps of the capacity test
+# Columns a row needs to be selected and binned, a missing T1 only leaves out its temperature
+OCV_REQUIRED = ("Voltage", "Current", "SOC_DOD", "StepIndex", "CycleIndex")
+
+
+def select_ocv_rows(chunk):
+    """Rows of the capacity test as in ocv_mapping.m, and their SOC in %.
+
+    Rows after the first cycle, in step 2 or 4 and with current flowing are
+    kept. SOC_DOD counts depth of discharge on discharge rows, so it is
+    flipped there.
+    """
+    current = chunk["Current"]
+    keep = (chunk["CycleIndex"] > 1) & np.isin(chunk["StepIndex"], OCV_STEPS) & (current != 0)
+    soc = chunk["SOC_DOD"][keep]
+    return keep, np.where(current[keep] < 0, 100 - soc, soc)
+
+
+class OCVBins:
+    """Per-SOC voltage statistics accumulated one chunk at a time.
+
+    Python version of ocv_mapping.m: the voltage of the rows picked by
+    select_ocv_rows() is averaged in 1 % bins centred on the whole SOC
+    values. Only sums are kept, so any amount of data fits.
+    """
+    def __init__(self, points=101):
+        self.points = points
+        self.count = np.zeros(points, dtype=np.int64)
+        self.voltage_sum = np.zeros(points)
+        self.voltage_square_sum = np.zeros(points)
+        self.voltage_min = np.full(points, np.inf)
+        self.voltage_max = np.full(points, -np.inf)
+        self.temperature_sum = 0.0
+        self.temperature_count = 0
+        self.rows = 0  # Rows read, kept or not
+
+    def add(self, chunk):
+        """Filter a chunk of cycler data and add it to the bins"""
+        self.rows += len(chunk["Current"])
+        keep, soc = select_ocv_rows(chunk)
+        voltage = chunk["Voltage"][keep]
+
+        bins = np.floor(soc + 0.5).astype(np.int64)
+        inside = (bins >= 0) & (bins < self.points)
+        bins = bins[inside]
+        voltage = voltage[inside]
+        self.count += np.bincount(bins, minlength=self.points)
+        self.voltage_sum += np.bincount(bins, voltage, minlength=self.points)
+        self.voltage_square_sum += np.bincount(bins, voltage * voltage, minlength=self.points)
+        np.minimum.at(self.voltage_min, bins, voltage)
+        np.maximum.at(self.voltage_max, bins, voltage)
+        temperature = chunk["T1"][keep][inside]
+        temperature = temperature[~np.isnan(temperature)]
+        self.temperature_sum += temperature.sum()
+        self.temperature_count += len(temperature)
+
+    @property
+    def soc(self):
+        return np.arange(self.points)
+
+    @property
+    def mean(self):
+        """Average voltage per bin, NaN for empty bins like mean() of nothing in MATLAB"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.voltage_sum / self.count
+
+    @property
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.voltage_sum / self.count
+            return np.sqrt(np.maximum(self.voltage_square_sum / self.count - mean * mean, 0.0))
+
+    @property
+    def temperature(self):
+        """Mean T1 of the binned rows in °C, None before any with a temperature were added"""
+        return self.temperature_sum / self.temperature_count if self.temperature_count else None
+
+    def profile(self):
+        """Temperature profile of the OCV tab from the bins that received data"""
+        filled = self.count > 0
+        return {"soc": self.soc[filled].tolist(), "ocv": [round(value, 6) for value in self.mean[filled]]}
+
+
+def extract_ocv(file_path, chunk_rows=16384, progress=None, stop_event=None):
+    """OCVBins of a whole cycler export, read in chunks"""
+    bins = OCVBins()
+    for chunk in read_cycler_chunks(file_path, OCV_COLUMNS, chunk_rows, progress, OCV_REQUIRED):
+        if stop_event is not None and stop_event.is_set():
+            break
+        bins.add(chunk)
+    return bins
+
+
+class OCVExtraction(threading.Thread):
+    """Runs extract_ocv() in the background so the GUI stays responsive.
+
+    bytes_read and size give the progress; result holds the OCVBins and
+    error the exception once the thread has finished.
+    """
+    def __init__(self, file_path, chunk_rows=16384):
+        super().__init__(name="OCVExtraction", daemon=True)
+        self.file_path = file_path
+        self.chunk_rows = chunk_rows
+        self.size = os.path.getsize(file_path)
+        self.bytes_read = 0
+        self.result = None
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        try:
+            self.result = extract_ocv(self.file_path, self.chunk_rows, self.set_progress, self._stop_event)
+        except Exception as e:
+            self.error = e
+
+    def set_progress(self, bytes_read):
+        self.bytes_read = bytes_read
@@ -0,0 +1,125 @@
+import re
+
+import numpy as np
+
+TEMPERATURE_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def parse_temperature(name):
+    """Temperature in °C of a profile name such as "25°C" or "-10 °C" """
+    match = TEMPERATURE_RE.search(name)
+    if match is None:
+        raise ValueError(f"Profile '{name}' has no temperature in its name")
+    return float(match.group())
+
+
+def check_profile(name, soc, ocv):
+    """Temperature, name and SOC-sorted points of a profile, ValueError if OCVLookup cannot use it"""
+    soc = np.asarray(soc, dtype=float)
+    ocv = np.asarray(ocv, dtype=float)
+    if len(soc) != len(ocv) or len(soc) < 2:
+        raise ValueError(f"Profile '{name}' needs at least two SOC-OCV pairs")
+    order = np.argsort(soc, kind="stable")
+    soc, ocv = soc[order], ocv[order]
+    if np.any(np.diff(soc) <= 0):
+        raise ValueError(f"Profile '{name}' has repeated SOC values")
+    if np.any(np.diff(ocv) < 0):
+        raise ValueError(f"OCV of profile '{name}' decreases with SOC")
+    return parse_temperature(name), name, soc, ocv
+
+
+class OCVLookup:
+    """OCV as a function of SOC and temperature, compiled from the OCV tab profiles.
+
+    Every profile is sorted by SOC, checked and resampled onto a common
+    SOC grid, giving a (temperatures x SOC points) array. ocv() interpolates
+    bilinearly in that grid and soc() inverts it at the given temperature.
+    Both take whole arrays, e.g. every cell of the pack with its
+    temperature, and clamp to the range of the profiles.
+    """
+    def __init__(self, profiles, soc_step=0.5):
+        if not profiles:
+            raise ValueError("No OCV profiles to build a lookup from")
+        if soc_step <= 0:
+            raise ValueError("The SOC step must be positive")
+
+        curves = [check_profile(name, data["soc"], data["ocv"]) for name, data in profiles.items()]
+        curves.sort(key=lambda curve: curve[0])
+
+        self.temperatures = np.array([curve[0] for curve in curves])
+        if np.any(np.diff(self.temperatures) == 0):
+            raise ValueError("Two profiles have the same temperature")
+        self.names = [curve[1] for curve in curves]
+
+        self.soc_min = min(curve[2][0] for curve in curves)
+        self.soc_max = max(curve[2][-1] for curve in curves)
+        points = int(round((self.soc_max - self.soc_min) / soc_step)) + 1
+        self.soc_grid = np.linspace(self.soc_min, self.soc_max, max(points, 2))
+        self.soc_step = self.soc_grid[1] - self.soc_grid[0]
+        # Profiles not covering the whole range are held flat at their ends
+        self.ocv_grid = np.array([np.interp(self.soc_grid, soc, ocv) for _, _, soc, ocv in curves])
+
+        # A single profile is used at every temperature
+        self._temperature_axis = self.temperatures
+        self._grid = self.ocv_grid
+        if len(curves) == 1:
+            self._temperature_axis = np.append(self.temperatures, self.temperatures[0] + 1.0)
+            self._grid = np.vstack([self.ocv_grid, self.ocv_grid])
+
+    def _temperature_weights(self, temperature):
+        """Lower grid row and interpolation weight of every temperature"""
+        axis = self._temperature_axis
+        temperature = np.clip(temperature, axis[0], axis[-1])
+        row = np.clip(np.searchsorted(axis, temperature, side="right") - 1, 0, len(axis) - 2)
+        weight = (temperature - axis[row]) / (axis[row + 1] - axis[row])
+        return row, weight
+
+    def ocv(self, soc, temperature):
+        """OCV in V at SOC in % and temperature in °C, broadcast over arrays"""
+        soc, temperature = np.broadcast_arrays(np.asarray(soc, dtype=float), np.asarray(temperature, dtype=float))
+        row, t_weight = self._temperature_weights(temperature)
+
+        position = np.clip((soc - self.soc_min) / self.soc_step, 0, len(self.soc_grid) - 1)
+        column = np.minimum(position.astype(np.intp), len(self.soc_grid) - 2)
+        s_weight = position - column
+
+        grid = self._grid
+        low = grid[row, column] * (1 - s_weight) + grid[row, column + 1] * s_weight
+        high = grid[row + 1, column] * (1 - s_weight) + grid[row + 1, column + 1] * s_weight
+        return low * (1 - t_weight) + high * t_weight
+
+    def soc(self, ocv, temperature):
+        """SOC in % giving ocv in V at temperature in °C, the inverse of ocv()
+
+        The curve at each temperature is interpolated between the grid rows
+        first, so the result is exact for values produced by ocv(). On a flat
+        part of the curve the lowest matching SOC is returned.
+        """
+        ocv, temperature = np.broadcast_arrays(np.asarray(ocv, dtype=float), np.asarray(temperature, dtype=float))
+        shape = ocv.shape
+        ocv = ocv.reshape(-1)
+        row, t_weight = self._temperature_weights(temperature.reshape(-1))
+
+        # Bisect the curve of every value at once, evaluating only the grid points visited
+        points = len(self.soc_grid)
+        flat = self._grid.reshape(-1)
+        lower = row * points
+        upper = lower + points
+
+        def curve(column):
+            return flat[lower + column] * (1 - t_weight) + flat[upper + column] * t_weight
+
+        low = np.zeros(len(ocv), dtype=np.intp)
+        high = np.full(len(ocv), points - 1, dtype=np.intp)
+        for _ in range(int(np.ceil(np.log2(points - 1))) if points > 2 else 0):
+            middle = (low + high) // 2
+            below = curve(middle) < ocv
+            low = np.where(below, middle, low)
+            high = np.where(below, high, middle)
+        column = low
+        start = curve(column)
+        span = curve(column + 1) - start
+        # A flat interval only matches at its start, values above it lie past its end
+        fraction = np.divide(ocv - start, span, out=(ocv > start).astype(float), where=span > 0)
+        soc = self.soc_grid[column] + np.clip(fraction, 0.0, 1.0) * self.soc_step
+        return soc.reshape(shape)
@@ -0,0 +1,112 @@
+import numpy as np
+
+
+class PackStatistics:
+    """Per-frame summary statistics of the pack.
+
+    update() reduces a whole frame with NumPy and stores the results keyed by
+    the parameter names used in the CAN parameter registry, so they can be
+    shown and encoded without any conversion. The same reductions are kept
+    per slave in per_slave, one array entry per slave.
+    """
+    def __init__(self, cells_per_slave, temps_per_slave, cells_parallel=1):
+        self.cells_per_slave = cells_per_slave
+        self.temps_per_slave = temps_per_slave
+        self.cells_parallel = cells_parallel
+        self.values = {}
+        self.per_slave = {}
+
+    def update(self, frame):
+        """Compute all statistics for a frame and return the pack-level values"""
+        voltages = np.asarray(frame.voltages, dtype=float)
+        temperatures = np.asarray(frame.temperatures, dtype=float)
+        values = {}
+        per_slave = {}
+
+        if voltages.size:
+            high = int(np.argmax(voltages))
+            low = int(np.argmin(voltages))
+            values["Highest_Cell_V"] = voltages[high]
+            values["Lowest_Cell_V"] = voltages[low]
+            values["Delta_Cell_V"] = voltages[high] - voltages[low]
+            values["Avg_Cell_V"] = voltages.mean()
+            values["High_Cell_ID"] = high + 1  # Cells are numbered from 1
+            values["Low_Cell_ID"] = low + 1
+            values["Voltage"] = voltages.sum() / self.cells_parallel
+
+            per_slave.update(self.reduce_per_slave(voltages, self.cells_per_slave,
+                                                   ("Highest_Cell_V", "Lowest_Cell_V", "Delta_Cell_V",
+                                                    "Avg_Cell_V", "High_Cell_ID", "Low_Cell_ID")))
+
+        if temperatures.size:
+            high = int(np.argmax(temperatures))
+            low = int(np.argmin(temperatures))
+            values["High_Temp"] = temperatures[high]
+            values["Low_Temp"] = temperatures[low]
+            values["Avg_Temp"] = temperatures.mean()
+            values["High_Temp_ID"] = high + 1
+            values["Low_Temp_ID"] = low + 1
+
+            per_slave.update(self.reduce_per_slave(temperatures, self.temps_per_slave,
+                                                   ("High_Temp", "Low_Temp", None,
+                                                    "Avg_Temp", "High_Temp_ID", "Low_Temp_ID")))
+
+        values["Current"] = float(frame.current)
+        if "Voltage" in values:
+            values["Power"] = values["Voltage"] * values["Current"] / 1000.0  # kW
+
+        self.values = values
+        self.per_slave = per_slave
+        return values
+
+    @staticmethod
+    def reduce_per_slave(data, group_size, names):
+        """Max, min, spread, mean and 1-based arg indices for each slave group"""
+        if group_size <= 0 or data.size % group_size:
+            # Frame does not match the topology, treat it as a single slave
+            group_size = data.size
+        groups = data.reshape(-1, group_size)
+        offsets = np.arange(groups.shape[0]) * group_size + 1
+
+        high_idx = groups.argmax(axis=1)
+        low_idx = groups.argmin(axis=1)
+        rows = np.arange(groups.shape[0])
+        high = groups[rows, high_idx]
+        low = groups[rows, low_idx]
+
+        results = (high, low, high - low, groups.mean(axis=1), high_idx + offsets, low_idx + offsets)
+        return {name: result for name, result in zip(names, results) if name}
+
+
+class ParameterValues:
+    """Latest physical value of every measured parameter, by name.
+
+    Summary parameters come from the statistics, Cell_N and Temp_N straight
+    from the latest frame. Lookups are resolved on demand, so publishing a
+    new frame is a single reference swap that is safe to read from other
+    threads.
+    """
+    def __init__(self):
+        self.snapshot = ({}, None)
+
+    def update(self, frame, stats):
+        self.snapshot = (stats, frame)
+
+    def get(self, name, default=None):
+        stats, frame = self.snapshot
+        if name in stats:
+            return stats[name]
+
+        # Individual cells and sensors are numbered from 1
+        prefix, _, index = name.partition("_")
+        if frame is None or not index.isdigit():
+            return default
+        index = int(index) - 1
+        if prefix == "Cell" and 0 <= index < len(frame.voltages):
+            return frame.voltages[index]
+        if prefix == "Temp" and 0 <= index < len(frame.temperatures):
+            return frame.temperatures[index]
+        return default
+
+    def __contains__(self, name):
+        return self.get(name) is not None
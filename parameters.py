@@ -0,0 +1,131 @@
+import bisect
+from collections.abc import MutableMapping
+
+# Parameters available before any are added or generated
+DEFAULT_PARAMETERS = {
+    # System parameters
+    "SOC": {"description": "State of Charge (%)", "type": "uint8", "unit": "%", "scale": 1},
+    "SOH": {"description": "State of Health (%)", "type": "uint8", "unit": "%", "scale": 1},
+    "Current": {"description": "Pack Current (A)", "type": "int16", "unit": "A", "scale": 0.1},
+    "Voltage": {"description": "Pack Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.1},
+    "Power": {"description": "Pack Power (kW)", "type": "int16", "unit": "kW", "scale": 0.01},
+    "Status": {"description": "BMS Status", "type": "uint8", "unit": "", "scale": 1},
+    "Flags": {"description": "Error/Warning Flags", "type": "uint8", "unit": "", "scale": 1},
+    
+    # Cell voltage parameters
+    "Highest_Cell_V": {"description": "Highest Cell Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "Lowest_Cell_V": {"description": "Lowest Cell Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "Delta_Cell_V": {"description": "Max Cell Voltage Difference (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "Avg_Cell_V": {"description": "Average Cell Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "High_Cell_ID": {"description": "Highest Voltage Cell ID", "type": "uint8", "unit": "", "scale": 1},
+    "Low_Cell_ID": {"description": "Lowest Voltage Cell ID", "type": "uint8", "unit": "", "scale": 1},
+    
+    # Temperature parameters
+    "High_Temp": {"description": "Highest Temperature (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    "Low_Temp": {"description": "Lowest Temperature (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    "Avg_Temp": {"description": "Average Temperature (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    "High_Temp_ID": {"description": "Highest Temperature Sensor ID", "type": "uint8", "unit": "", "scale": 1},
+    "Low_Temp_ID": {"description": "Lowest Temperature Sensor ID", "type": "uint8", "unit": "", "scale": 1},
+    
+    # Cell balancing
+    "Bal_Status": {"description": "Balancing Status", "type": "uint8", "unit": "", "scale": 1},
+    "Cells_Balancing": {"description": "Number of Cells Balancing", "type": "uint8", "unit": "", "scale": 1},
+    
+    # Individual cell/temp values (these would be expanded based on configuration)
+    "Cell_1": {"description": "Cell 1 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "Cell_2": {"description": "Cell 2 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "Cell_3": {"description": "Cell 3 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    "Cell_4": {"description": "Cell 4 Voltage (V)", "type": "uint16", "unit": "V", "scale": 0.001},
+    
+    "Temp_1": {"description": "Temperature Sensor 1 (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    "Temp_2": {"description": "Temperature Sensor 2 (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    "Temp_3": {"description": "Temperature Sensor 3 (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    "Temp_4": {"description": "Temperature Sensor 4 (°C)", "type": "int8", "unit": "°C", "scale": 1},
+    
+    # Raw hex value (no parameter mapping)
+    "": {"description": "Custom hex value", "type": "hex", "unit": "", "scale": 1},
+}
+
+
+class ParameterRegistry(MutableMapping):
+    """BMS parameter definitions by name, with a sorted index of the names.
+
+    The index is kept sorted, ignoring case, as parameters are added, so
+    listing them, finding their position and prefix searches never sort. Listeners are
+    called with the names that were added, replaced or removed; update()
+    changes many parameters with a single notification.
+    """
+    def __init__(self, parameters=None):
+        self.parameters = {}
+        self.names = []  # Sorted, without the "" entry for custom hex values
+        self.keys_index = []  # (casefolded name, name) of every entry in names
+        self.listeners = []
+        self._choices = None
+        if parameters:
+            self.update(parameters)
+
+    def __getitem__(self, name):
+        return self.parameters[name]
+
+    def __setitem__(self, name, definition):
+        self.add(name, definition)
+        self.notify([name])
+
+    def __delitem__(self, name):
+        del self.parameters[name]
+        if name:
+            position = self.index(name)
+            del self.names[position]
+            del self.keys_index[position]
+        self._choices = None
+        self.notify([name])
+
+    def __iter__(self):
+        return iter(self.parameters)
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def add(self, name, definition):
+        """Store a definition without notifying, returns whether the name is new"""
+        added = name not in self.parameters
+        self.parameters[name] = definition
+        if added and name:
+            key = (name.casefold(), name)
+            position = bisect.bisect_left(self.keys_index, key)
+            self.keys_index.insert(position, key)
+            self.names.insert(position, name)
+            self._choices = None
+        return added
+
+    def update(self, other=(), **kwargs):
+        items = list(other.items() if hasattr(other, "items") else other) + list(kwargs.items())
+        for name, definition in items:
+            self.add(name, definition)
+        if items:
+            self.notify([name for name, _ in items])
+
+    def notify(self, names):
+        for listener in self.listeners:
+            listener(names)
+
+    def index(self, name):
+        """Position of a name in the sorted index"""
+        return bisect.bisect_left(self.keys_index, (name.casefold(), name))
+
+    def prefix_range(self, prefix):
+        """Index positions start, stop of the names starting with prefix, ignoring case"""
+        prefix = prefix.casefold()
+        return (bisect.bisect_left(self.keys_index, (prefix,)),
+                bisect.bisect_left(self.keys_index, (prefix + "\U0010ffff",)))
+
+    def with_prefix(self, prefix):
+        """Sorted names starting with prefix, ignoring case"""
+        start, stop = self.prefix_range(prefix)
+        return self.names[start:stop]
+
+    def choices(self):
+        """Combobox values: an empty entry followed by all names, cached until a name is added"""
+        if self._choices is None:
+            self._choices = ("",) + tuple(self.names)
+        return self._choices
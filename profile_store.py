@@ -0,0 +1,87 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+PROFILE_DTYPE = np.dtype([("soc", "<f8"), ("ocv", "<f8")])
+
+
+def make_profile(soc, ocv):
+    """Structured array of SOC-OCV points"""
+    soc = np.asarray(soc, dtype=float).reshape(-1)
+    ocv = np.asarray(ocv, dtype=float).reshape(-1)
+    if len(soc) != len(ocv):
+        raise ValueError(f"{len(soc)} SOC values but {len(ocv)} OCV values")
+    points = np.empty(len(soc), dtype=PROFILE_DTYPE)
+    points["soc"] = soc
+    points["ocv"] = ocv
+    return points
+
+
+class ProfileStore(MutableMapping):
+    """Temperature profiles of the OCV tab, one structured array per profile.
+
+    Profiles are stored as arrays of (soc, ocv) points, so profile["soc"]
+    and profile["ocv"] are array views like the lists used before. Any
+    mapping with soc and ocv sequences is converted when stored. Replace a
+    profile rather than editing its array in place, so the cached OCV
+    range stays valid.
+
+    save_npz() and load_npz() keep all profiles in one concatenated array
+    with offsets, which loads far faster than JSON for large maps.
+    """
+    def __init__(self, profiles=None):
+        self.profiles = {}
+        self._ocv_range = None
+        if profiles:
+            self.update(profiles)
+
+    def __getitem__(self, name):
+        return self.profiles[name]
+
+    def __setitem__(self, name, profile):
+        if not (isinstance(profile, np.ndarray) and profile.dtype == PROFILE_DTYPE):
+            profile = make_profile(profile["soc"], profile["ocv"])
+        self.profiles[name] = profile
+        self._ocv_range = None
+
+    def __delitem__(self, name):
+        del self.profiles[name]
+        self._ocv_range = None
+
+    def __iter__(self):
+        return iter(self.profiles)
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def ocv_range(self):
+        """Lowest and highest OCV of all profiles, None when there are no points"""
+        if self._ocv_range is None and self.profiles:
+            ocv = np.concatenate([profile["ocv"] for profile in self.profiles.values()])
+            if len(ocv):
+                self._ocv_range = (float(ocv.min()), float(ocv.max()))
+        return self._ocv_range
+
+    def to_dict(self):
+        """Profiles as lists, for JSON"""
+        return {name: {"soc": profile["soc"].tolist(), "ocv": profile["ocv"].tolist()}
+                for name, profile in self.profiles.items()}
+
+    def save_npz(self, file_path):
+        names = list(self.profiles)
+        points = [self.profiles[name] for name in names]
+        offsets = np.zeros(len(points) + 1, dtype=np.int64)
+        np.cumsum([len(profile) for profile in points], out=offsets[1:])
+        np.savez(file_path, names=np.array(names, dtype=str), offsets=offsets,
+                 points=np.concatenate(points) if points else np.empty(0, dtype=PROFILE_DTYPE))
+
+
+def load_npz(file_path):
+    """Profiles saved by ProfileStore.save_npz(), as a name to array dict"""
+    with np.load(file_path, allow_pickle=False) as data:
+        names = data["names"].tolist()
+        offsets = data["offsets"]
+        points = data["points"]
+    if points.dtype != PROFILE_DTYPE or len(offsets) != len(names) + 1:
+        raise ValueError(f"{file_path} does not hold temperature profiles")
+    return {name: points[start:stop] for name, start, stop in zip(names, offsets[:-1], offsets[1:])}
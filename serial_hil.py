@@ -0,0 +1,230 @@
+import argparse
+import os
+import select
+import struct
+import termios
+import threading
+import time
+import tty
+
+import numpy as np
+
+from can_codec import to_raw_array
+from cycler_data import load_cycler_csv
+
+# Request packet of serial_testing.m: three voltages, three temperatures,
+# current, two padding bytes and the timestamp
+REQUEST = struct.Struct("<3H3HH2xI")
+REQUEST_DTYPE = np.dtype([("voltages", "<u2", (3,)), ("temperatures", "<u2", (3,)), ("current", "<u2"),
+                          ("padding", "V2"), ("timestamp", "<u4")])
+assert REQUEST_DTYPE.itemsize == REQUEST.size
+# Response packet, Simulation_TX_TypeDef in simulation.h: capacities in mAh,
+# cell SOCs and pack SOC
+RESPONSE = struct.Struct("<3H3HH")
+RESPONSE_SIZE = RESPONSE.size
+
+UINT16 = (0, 0xFFFF)
+UINT32 = (0, 0xFFFFFFFF)
+
+BAUD_RATES = {9600: termios.B9600, 19200: termios.B19200, 38400: termios.B38400, 57600: termios.B57600,
+              115200: termios.B115200, 230400: termios.B230400}
+
+
+def encode_requests(cells):
+    """Every request packet of a test run, as one contiguous bytes buffer.
+
+    Values are scaled and saturated like the uint16()/uint32() casts of
+    serial_testing.m, so a negative mean current is sent as 0 there too.
+    """
+    rows = min(len(cell["TotalTime"]) for cell in cells)
+    packets = np.zeros(rows, dtype=REQUEST_DTYPE)
+    for i, cell in enumerate(cells):
+        packets["voltages"][:, i] = to_raw_array(cell["Voltage"][:rows], 10000, 0, *UINT16)
+        packets["temperatures"][:, i] = to_raw_array(cell["T1"][:rows], 10, 0, *UINT16)
+    current = np.mean([cell["Current"][:rows] for cell in cells], axis=0)
+    packets["current"] = to_raw_array(current, 100, 0, *UINT16)
+    packets["timestamp"] = to_raw_array(cells[0]["TotalTime"][:rows], 1000, 0, *UINT32)
+    return packets.tobytes()
+
+
+class SerialPort:
+    """Raw 8N1 serial port on a POSIX tty, like MATLAB's serialport"""
+    def __init__(self, path="/dev/ttyACM0", baudrate=115200):
+        if baudrate not in BAUD_RATES:
+            raise ValueError(f"Unsupported baud rate {baudrate}")
+        self.path = path
+        self.baudrate = baudrate
+        self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        try:
+            tty.setraw(self.fd)
+            attributes = termios.tcgetattr(self.fd)
+            attributes[4] = attributes[5] = BAUD_RATES[baudrate]  # Input and output speed
+            termios.tcsetattr(self.fd, termios.TCSANOW, attributes)
+            termios.tcflush(self.fd, termios.TCIOFLUSH)
+        except termios.error:
+            os.close(self.fd)
+            raise
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fd, view):]
+
+    def readinto(self, buffer, timeout=None):
+        """Read whatever is available into buffer, returns the byte count or 0 on timeout"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return 0
+        return os.readv(self.fd, [buffer])
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SerialHILRunner:
+    """Streams request packets and collects the 14-byte responses.
+
+    Python version of serial_testing.m. Instead of one write and a blocking
+    read per row, up to window requests are written ahead and responses are
+    read straight into a preallocated (rows x 14) array, so a run is limited
+    by the link and not by round trips.
+    """
+    def __init__(self, port, window=32, timeout=2.0):
+        if window < 1:
+            raise ValueError("The window must be at least one row")
+        self.port = port
+        self.window = window
+        self.timeout = timeout
+
+    def run(self, requests, progress=None):
+        rows = len(requests) // REQUEST.size
+        responses = np.zeros((rows, RESPONSE_SIZE), dtype=np.uint8)
+        requests = memoryview(requests)
+        received = memoryview(responses.reshape(-1))
+        total = rows * RESPONSE_SIZE
+
+        sent = 0
+        read = 0  # Response bytes read
+        while read < total:
+            completed = read // RESPONSE_SIZE
+            if sent < rows and sent - completed < self.window:
+                # Top the window up with one write
+                count = min(rows, completed + self.window) - sent
+                self.port.write(requests[sent * REQUEST.size:(sent + count) * REQUEST.size])
+                sent += count
+
+            count = self.port.readinto(received[read:], self.timeout)
+            if not count:
+                raise TimeoutError(f"No response after {completed} of {rows} rows")
+            read += count
+            if progress is not None:
+                progress(read // RESPONSE_SIZE, rows)
+        return responses
+
+
+class PtyBMSStandIn(threading.Thread):
+    """BMS stand-in on a pseudo terminal, for running without the board.
+
+    Open path like a serial port. Like the CAN stand-in it starts at an SOC
+    interpolated from the first voltages and counts coulombs from there,
+    answering every request with a Simulation_TX_TypeDef packet.
+    """
+    def __init__(self, capacity_mah=2650, ocv_soc=(0, 100), ocv_voltage=(3.0, 4.2)):
+        super().__init__(name="PtyBMSStandIn", daemon=True)
+        self.master, self.slave = os.openpty()
+        self.path = os.ttyname(self.slave)
+        self.capacity_mah = capacity_mah
+        self.ocv_soc = np.asarray(ocv_soc, dtype=float)
+        self.ocv_voltage = np.asarray(ocv_voltage, dtype=float)
+        self.soc = None  # Percent, per cell
+        self.last_timestamp = None
+        self.handled = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        pending = b""
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([self.master], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                pending += os.read(self.master, 65536)
+            except OSError:
+                break
+            count = len(pending) // REQUEST.size
+            if not count:
+                continue
+            packets = np.frombuffer(pending[:count * REQUEST.size], dtype=REQUEST_DTYPE)
+            pending = pending[count * REQUEST.size:]
+
+            data = memoryview(self.respond(packets).tobytes())
+            while data:
+                data = data[os.write(self.master, data):]
+            self.handled += count
+
+    def respond(self, packets):
+        """Response packets for a batch of requests, integrated in one pass"""
+        timestamps = packets["timestamp"].astype(float)
+        if self.soc is None:
+            self.soc = np.interp(packets["voltages"][0] / 10000.0, self.ocv_voltage, self.ocv_soc)
+            self.last_timestamp = timestamps[0]
+        dt_ms = np.diff(timestamps, prepend=self.last_timestamp)
+        self.last_timestamp = timestamps[-1]
+
+        charge_mah = packets["current"] / 100.0 * dt_ms / 3600.0
+        soc = np.clip(self.soc + 100.0 * np.cumsum(charge_mah)[:, None] / self.capacity_mah, 0.0, 100.0)
+        self.soc = soc[-1]
+
+        replies = np.zeros((len(packets), 7), dtype="<u2")
+        replies[:, :3] = np.round(soc / 100.0 * self.capacity_mah)
+        replies[:, 3:6] = np.round(soc)
+        replies[:, 6] = np.round(soc.mean(axis=1))
+        return replies
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay cycler data to the BMS over a serial link")
+    parser.add_argument("cells", nargs=3, help="Cycler CSV files of the three cells")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--standin", action="store_true", help="Answer with a simulated BMS on a pty")
+    parser.add_argument("--window", type=int, default=32, help="Requests written ahead of the responses")
+    parser.add_argument("--rows", type=int, default=10699, help="Rows to replay")
+    parser.add_argument("--output", default="serial_responses.npy")
+    args = parser.parse_args()
+
+    cells = [load_cycler_csv(path, max_rows=args.rows) for path in args.cells]
+    requests = encode_requests(cells)
+
+    standin = None
+    path = args.port
+    if args.standin:
+        standin = PtyBMSStandIn()
+        standin.start()
+        path = standin.path
+
+    port = SerialPort(path, args.baudrate)
+    try:
+        start = time.monotonic()
+        responses = SerialHILRunner(port, args.window).run(requests)
+        duration = time.monotonic() - start
+    finally:
+        port.close()
+        if standin is not None:
+            standin.stop()
+            standin.join()
+            standin.close()
+
+    np.save(args.output, responses)
+    print(f"{len(responses)} rows in {duration:.2f}s, responses in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import csv
+import os
+
+import numpy as np
+
+NOMINAL_CAPACITY_MAH = 2650
+LOOKUP_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lookuptable.csv")
+
+
+def load_lookup_table(file_path=LOOKUP_TABLE_PATH):
+    """SOC and voltage columns of lookuptable.csv as written by ocv_mapping.m"""
+    soc = []
+    voltage = []
+    with open(file_path, "r", newline="") as file:
+        for row in csv.DictReader(file):
+            try:
+                soc.append(float(row["Var1"]))
+                voltage.append(float(row["Var2"]))
+            except (KeyError, TypeError, ValueError):
+                continue  # Bins without data are written as NaN or empty
+    return np.array(soc), np.array(voltage)
+
+
+def efficiency_factors(current, capacity_ah, nominal_capacity_mah=NOMINAL_CAPACITY_MAH):
+    """mu_cc and mu_dc of coloumb_counting_test.m: the largest charge and discharge capacity over nominal"""
+    current = np.asarray(current, dtype=float)
+    capacity_ah = np.asarray(capacity_ah, dtype=float)
+    charge = capacity_ah[current > 0]
+    discharge = capacity_ah[current < 0]
+    mu_charge = charge.max() * 1000 / nominal_capacity_mah if len(charge) else 1.0
+    mu_discharge = discharge.max() * 1000 / nominal_capacity_mah if len(discharge) else 1.0
+    return mu_charge, mu_discharge
+
+
+class CoulombCounter:
+    """SOC by coulomb counting from an OCV-based starting point.
+
+    Python version of coloumb_counting_test.m. The starting SOC is
+    interpolated from the lookup table at the first voltage, then the
+    charge I x dt x mu is summed, with mu_charge while charging and
+    mu_discharge otherwise. Current is in A, positive when charging.
+
+    run() evaluates whole test runs for any number of cells at once.
+    update() is the streaming form for the live monitor: it keeps the
+    capacity of every cell between frames and starts over when the number
+    of cells changes.
+    """
+    def __init__(self, lookup_soc, lookup_voltage, nominal_capacity_mah=NOMINAL_CAPACITY_MAH,
+                 mu_charge=1.0, mu_discharge=1.0):
+        lookup_soc = np.asarray(lookup_soc, dtype=float)
+        lookup_voltage = np.asarray(lookup_voltage, dtype=float)
+        valid = ~(np.isnan(lookup_soc) | np.isnan(lookup_voltage))
+        self.lookup_soc = lookup_soc[valid]
+        self.lookup_voltage = lookup_voltage[valid]
+        if len(self.lookup_voltage) < 2 or np.any(np.diff(self.lookup_voltage) <= 0):
+            raise ValueError("The lookup table voltage must rise with SOC")
+        self.nominal_capacity_mah = nominal_capacity_mah
+        self.mu_charge = mu_charge
+        self.mu_discharge = mu_discharge
+
+        self.capacity_mah = None  # Per cell, while streaming
+        self.last_timestamp = None
+
+    @classmethod
+    def from_csv(cls, file_path=LOOKUP_TABLE_PATH, **kwargs):
+        return cls(*load_lookup_table(file_path), **kwargs)
+
+    def initial_soc(self, voltage):
+        """SOC in % at each voltage, clamped to the ends of the table"""
+        return np.interp(voltage, self.lookup_voltage, self.lookup_soc)
+
+    def charge_mah(self, current, dt_s):
+        """Charge added in mAh for currents in A over time steps in seconds"""
+        current = np.asarray(current, dtype=float)
+        mu = np.where(current > 0, self.mu_charge, self.mu_discharge)
+        return current * 1000.0 * (np.asarray(dt_s, dtype=float) / 3600.0) * mu
+
+    def run(self, time_s, current, first_voltage):
+        """SOC in % and capacity in mAh of every row of a test run.
+
+        time_s holds the row times, current the currents as a (rows,) or
+        (cells x rows) array and first_voltage the voltage of each cell at
+        the first row. The first row is the starting point, every later row
+        adds its current over the time since the previous row.
+        """
+        dt_s = np.diff(np.asarray(time_s, dtype=float), prepend=time_s[0])
+        start = self.initial_soc(first_voltage) / 100.0 * self.nominal_capacity_mah
+        capacity = np.expand_dims(start, -1) + np.cumsum(self.charge_mah(current, dt_s), axis=-1)
+        return 100.0 * capacity / self.nominal_capacity_mah, capacity
+
+    def reset(self):
+        self.capacity_mah = None
+        self.last_timestamp = None
+
+    def update(self, timestamp, current, voltages):
+        """Advance every cell by one frame and return their SOC in %"""
+        voltages = np.asarray(voltages, dtype=float)
+        if self.capacity_mah is None or len(self.capacity_mah) != len(voltages):
+            self.capacity_mah = self.initial_soc(voltages) / 100.0 * self.nominal_capacity_mah
+        else:
+            self.capacity_mah = self.capacity_mah + self.charge_mah(current, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+        return self.soc
+
+    @property
+    def soc(self):
+        if self.capacity_mah is None:
+            return None
+        return 100.0 * self.capacity_mah / self.nominal_capacity_mah